@@ -227,7 +227,13 @@ class MobileMCPServer:
         tools.append(Tool(
             name="mobile_list_elements",
             description=desc_list_elements,
-            inputSchema={"type": "object", "properties": {}, "required": []}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pruned": {"type": "boolean", "description": "精简层级：压缩dump，去掉不可见节点、折叠布局链（仅Android）", "default": False}
+                },
+                "required": []
+            }
         ))
         
         # ==================== 截图（视觉兜底）====================
@@ -252,7 +258,8 @@ class MobileMCPServer:
                     "compress": {"type": "boolean", "description": "是否压缩", "default": True},
                     "crop_x": {"type": "integer", "description": "裁剪中心 X"},
                     "crop_y": {"type": "integer", "description": "裁剪中心 Y"},
-                    "crop_size": {"type": "integer", "description": "裁剪大小"}
+                    "crop_size": {"type": "integer", "description": "裁剪大小"},
+                    "max_bytes": {"type": "integer", "description": "字节预算（>0 时自动选择 JPEG 质量和缩放）"}
                 },
                 "required": []
             }
@@ -281,7 +288,13 @@ class MobileMCPServer:
         tools.append(Tool(
             name="mobile_screenshot_with_som",
             description=desc_som,
-            inputSchema={"type": "object", "properties": {}, "required": []}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pruned": {"type": "boolean", "description": "精简层级：压缩dump，去掉不可见节点、折叠布局链（仅Android）", "default": False}
+                },
+                "required": []
+            }
         ))
         
         tools.append(Tool(
@@ -333,7 +346,8 @@ class MobileMCPServer:
                 "properties": {
                     "text": {"type": "string", "description": "元素文本"},
                     "position": {"type": "string", "description": "位置：top/bottom/left/right"},
-                    "verify": {"type": "string", "description": "点击后验证的文本（可选）"}
+                    "verify": {"type": "string", "description": "点击后验证的文本（可选）"},
+                    "pruned": {"type": "boolean", "description": "精简层级：压缩dump，去掉不可见节点、折叠布局链（仅Android）", "default": False}
                 },
                 "required": ["text"]
             }
@@ -731,7 +745,8 @@ class MobileMCPServer:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "text": {"type": "string", "description": "文本"}
+                    "text": {"type": "string", "description": "文本"},
+                    "pruned": {"type": "boolean", "description": "精简层级：压缩dump，去掉不可见节点、折叠布局链（仅Android）", "default": False}
                 },
                 "required": ["text"]
             }
@@ -940,12 +955,13 @@ class MobileMCPServer:
         try:
             # 截图
             if name == "mobile_take_screenshot":
-                result = self.tools.take_screenshot(
+                result = await self.tools.take_screenshot_async(
                     description=arguments.get("description", ""),
                     compress=arguments.get("compress", True),
                     crop_x=arguments.get("crop_x", 0),
                     crop_y=arguments.get("crop_y", 0),
-                    crop_size=arguments.get("crop_size", 0)
+                    crop_size=arguments.get("crop_size", 0),
+                    max_bytes=arguments.get("max_bytes", 0)
                 )
                 return [TextContent(type="text", text=self.format_response(result))]
             
@@ -954,14 +970,14 @@ class MobileMCPServer:
                 return [TextContent(type="text", text=self.format_response(result))]
             
             elif name == "mobile_screenshot_with_grid":
-                result = self.tools.take_screenshot_with_grid(
+                result = await self.tools.take_screenshot_with_grid_async(
                     grid_size=arguments.get("grid_size", 100),
                     show_popup_hints=arguments.get("show_popup_hints", False)
                 )
                 return [TextContent(type="text", text=self.format_response(result))]
             
             elif name == "mobile_screenshot_with_som":
-                result = self.tools.take_screenshot_with_som()
+                result = await self.tools.take_screenshot_with_som_async(pruned=arguments.get("pruned", False))
                 return [TextContent(type="text", text=self.format_response(result))]
             
             elif name == "mobile_click_by_som":
@@ -986,7 +1002,8 @@ class MobileMCPServer:
                 result = self.tools.click_by_text(
                     arguments["text"],
                     position=arguments.get("position"),
-                    verify=arguments.get("verify")
+                    verify=arguments.get("verify"),
+                    pruned=arguments.get("pruned", False)
                 )
                 return [TextContent(type="text", text=self.format_response(result))]
             
@@ -1103,7 +1120,7 @@ class MobileMCPServer:
             
             # 辅助
             elif name == "mobile_list_elements":
-                result = self.tools.list_elements()
+                result = self.tools.list_elements(pruned=arguments.get("pruned", False))
                 return [TextContent(type="text", text=self.format_response(result))]
             
             elif name == "mobile_find_close_button":
@@ -1125,7 +1142,7 @@ class MobileMCPServer:
                 return [TextContent(type="text", text=self.format_response(result))]
             
             elif name == "mobile_assert_text":
-                result = self.tools.assert_text(arguments["text"])
+                result = self.tools.assert_text(arguments["text"], pruned=arguments.get("pruned", False))
                 return [TextContent(type="text", text=self.format_response(result))]
             
             # Toast 检测（仅 Android）
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无障碍事件源 - 基于 `adb shell uiautomator events` 的界面变化推送
+
+功能：
+1. 后台线程读取 uiautomator events 输出，解析窗口切换 / 内容变化等事件
+2. 记录最近事件时间、按类型计数
+3. 等待者（可跨线程 / 跨事件循环）在新事件到达时被唤醒
+4. LocalEventProducer：本地替身事件源，测试时不需要真机
+
+注意：
+    uiautomator events 会注册独立的 UiAutomation 连接，部分系统上会和
+    uiautomator2 服务冲突，因此默认关闭（环境变量 ACCESSIBILITY_EVENTS=true 开启）。
+    事件流异常退出时自动标记为不可用，等待逻辑回退到轮询。
+
+用法:
+    source = AccessibilityEventSource(client)
+    source.start()
+    source.last_event_time            # 最近一次界面变化事件的时间
+    await source.wait_for_event(after=t, timeout=2.0)
+    await source.wait_for_quiet(0.3, timeout=5.0, after=action_time)
+
+    # 测试
+    producer = LocalEventProducer(source)
+    producer.emit('TYPE_WINDOW_CONTENT_CHANGED')
+"""
+import asyncio
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# 会引起页面结构变化的事件类型
+CHANGE_EVENT_TYPES = frozenset([
+    'TYPE_WINDOW_STATE_CHANGED',
+    'TYPE_WINDOW_CONTENT_CHANGED',
+    'TYPE_WINDOWS_CHANGED',
+    'TYPE_VIEW_SCROLLED',
+    'TYPE_VIEW_TEXT_CHANGED',
+    'TYPE_VIEW_SELECTED',
+])
+
+_EVENT_TYPE_RE = re.compile(r'EventType:\s*(\w+)')
+_PACKAGE_RE = re.compile(r'PackageName:\s*([\w.]+)')
+
+
+class AccessibilityEventSource:
+    """
+    无障碍事件源
+
+    reader 线程 / LocalEventProducer 通过 feed_line() 或 emit() 写入事件，
+    等待者通过 wait_for_event() / wait_for_quiet() 等待。
+    """
+
+    def __init__(self, mobile_client=None, command: Optional[List[str]] = None):
+        """
+        初始化事件源
+
+        Args:
+            mobile_client: MobileClient实例（用于拼 adb 命令），只用本地替身时可为 None
+            command: 自定义事件流命令（默认 adb -s <id> shell uiautomator events）
+        """
+        self.client = mobile_client
+        self.command = command
+
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.error = ''
+
+        # 事件状态
+        self.sequence = 0
+        self.last_event_time = 0.0
+        self.last_event_type = ''
+        self.last_package = ''
+        self.counts: Dict[str, int] = {}
+
+        # 异步等待者：(事件循环, asyncio.Event)
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    # ==================== 生命周期 ====================
+
+    @property
+    def active(self) -> bool:
+        """事件流是否可用（不可用时等待逻辑应回退到轮询）"""
+        return self._running
+
+    def _build_command(self) -> List[str]:
+        if self.command:
+            return list(self.command)
+        device_manager = self.client.device_manager
+        cmd = [device_manager.adb_path]
+        if device_manager.current_device_id:
+            cmd += ['-s', device_manager.current_device_id]
+        return cmd + ['shell', 'uiautomator', 'events']
+
+    def start(self) -> bool:
+        """
+        启动事件流读取线程
+
+        Returns:
+            是否启动成功
+        """
+        with self._lock:
+            if self._running:
+                return True
+            try:
+                self._process = subprocess.Popen(
+                    self._build_command(),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL,
+                    bufsize=1,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace'
+                )
+            except Exception as e:
+                self.error = str(e)
+                print(f"  ⚠️  无障碍事件流启动失败，回退轮询: {e}", file=sys.stderr)
+                return False
+            self._running = True
+            self.error = ''
+            self._thread = threading.Thread(target=self._read_loop, name='a11y-events', daemon=True)
+            self._thread.start()
+        print(f"  📡 无障碍事件流已启动", file=sys.stderr)
+        return True
+
+    def start_local(self):
+        """本地替身模式：不启动进程，事件全部由 LocalEventProducer 写入"""
+        with self._lock:
+            self._running = True
+            self.error = ''
+
+    def stop(self):
+        """停止事件流"""
+        with self._lock:
+            self._running = False
+            process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.terminate()
+                process.wait(timeout=2)
+            except Exception:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
+        self._wake_all()
+
+    def _read_loop(self):
+        """reader 线程：逐行读取事件输出"""
+        process = self._process
+        try:
+            for line in process.stdout:
+                if not self._running:
+                    break
+                self.feed_line(line)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self._running and self._process is process:
+                self._running = False
+                if not self.error:
+                    try:
+                        code = process.wait(timeout=1)
+                    except Exception:
+                        code = process.poll()
+                    self.error = f"事件流已退出 (code={code})"
+                print(f"  ⚠️  无障碍事件流中断，回退轮询: {self.error}", file=sys.stderr)
+                self._wake_all()
+
+    # ==================== 事件写入 ====================
+
+    def feed_line(self, line: str) -> Optional[str]:
+        """
+        解析一行 uiautomator events 输出
+
+        Args:
+            line: 原始输出行
+
+        Returns:
+            识别出的界面变化事件类型，无关行返回 None
+        """
+        match = _EVENT_TYPE_RE.search(line)
+        if not match:
+            return None
+        event_type = match.group(1)
+        if event_type not in CHANGE_EVENT_TYPES:
+            return None
+        package = _PACKAGE_RE.search(line)
+        self.emit(event_type, package.group(1) if package else '')
+        return event_type
+
+    def emit(self, event_type: str, package: str = ''):
+        """记录一个界面变化事件并唤醒等待者"""
+        with self._lock:
+            self.sequence += 1
+            self.last_event_time = time.time()
+            self.last_event_type = event_type
+            self.last_package = package
+            self.counts[event_type] = self.counts.get(event_type, 0) + 1
+        self._wake_all()
+
+    def _wake_all(self):
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+
+    # ==================== 等待 API ====================
+
+    async def _wait_next(self, timeout: float) -> bool:
+        """等待下一个事件（或事件流中断），超时返回 False"""
+        if timeout <= 0:
+            return False
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters.append((asyncio.get_running_loop(), event))
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters = [w for w in self._waiters if w[1] is not event]
+
+    async def wait_for_event(self, after: float, timeout: float) -> bool:
+        """
+        等待 after 之后的界面变化事件
+
+        Args:
+            after: 时间戳
+            timeout: 最大等待时间（秒）
+
+        Returns:
+            是否等到了事件
+        """
+        deadline = time.time() + timeout
+        while self._running:
+            if self.last_event_time > after:
+                return True
+            if not await self._wait_next(deadline - time.time()):
+                return self.last_event_time > after
+        return self.last_event_time > after
+
+    async def wait_for_quiet(self, quiet: float, timeout: float, after: float = 0.0,
+                             min_wait: float = 0.5) -> bool:
+        """
+        等待事件流安静 quiet 秒（页面稳定）
+
+        安静从 max(after, 最近事件时间) 开始计算：after 之后收到过事件时，
+        最后一个事件之后连续 quiet 秒没有新事件即稳定；after 之后还没有任何事件时
+        （界面尚未响应操作），至少等到 after + max(quiet, min_wait)
+
+        Args:
+            quiet: 连续多久没有事件认为稳定（秒）
+            timeout: 最大等待时间（秒）
+            after: 操作时间，0 表示从调用时刻开始计算
+            min_wait: 操作之后没有事件时的最短等待（秒）
+
+        Returns:
+            是否等到了稳定，事件流中断或超时返回 False
+        """
+        now = time.time()
+        after = after or now
+        deadline = now + timeout
+        while self._running:
+            now = time.time()
+            if self.last_event_time > after:
+                ready_at = self.last_event_time + quiet
+            else:
+                ready_at = after + max(quiet, min_wait)
+            if now >= ready_at:
+                return True
+            if ready_at > deadline:
+                return False
+            # 等到预计稳定时刻；期间有新事件则重新计算
+            await self._wait_next(ready_at - now)
+        return False
+
+    def stats(self) -> Dict:
+        """获取事件源统计"""
+        return {
+            'active': self._running,
+            'events': self.sequence,
+            'last_event_type': self.last_event_type,
+            'last_event_age': round(time.time() - self.last_event_time, 3) if self.last_event_time else None,
+            'counts': dict(self.counts),
+            'error': self.error,
+        }
+
+
+class LocalEventProducer:
+    """
+    本地替身事件源（测试用）
+
+    用法:
+        source = AccessibilityEventSource()
+        producer = LocalEventProducer(source)
+        producer.emit('TYPE_WINDOW_STATE_CHANGED')
+        producer.play([(0.1, 'TYPE_WINDOW_CONTENT_CHANGED'), (0.2, 'TYPE_VIEW_SCROLLED')])
+    """
+
+    def __init__(self, source: AccessibilityEventSource):
+        self.source = source
+        source.start_local()
+
+    def emit(self, event_type: str = 'TYPE_WINDOW_CONTENT_CHANGED', package: str = ''):
+        """立即产生一个事件"""
+        self.source.emit(event_type, package)
+
+    def feed(self, line: str):
+        """按 uiautomator events 的原始输出格式写入一行"""
+        self.source.feed_line(line)
+
+    def play(self, events: List[Tuple[float, str]]) -> threading.Thread:
+        """
+        在后台线程中按时间间隔依次产生事件
+
+        Args:
+            events: [(距上一个事件的秒数, 事件类型), ...]
+
+        Returns:
+            后台线程
+        """
+        def run():
+            for delay, event_type in events:
+                time.sleep(delay)
+                self.source.emit(event_type)
+
+        thread = threading.Thread(target=run, name='a11y-local-producer', daemon=True)
+        thread.start()
+        return thread
@@ -162,11 +162,13 @@ class BasicMobileToolsLite:
     
     def take_screenshot(self, description: str = "", compress: bool = True, 
                         max_width: int = 720, quality: int = 75,
-                        crop_x: int = 0, crop_y: int = 0, crop_size: int = 0) -> Dict:
+                        crop_x: int = 0, crop_y: int = 0, crop_size: int = 0,
+                        max_bytes: int = 0) -> Dict:
         """截图（使用统一管理器）"""
         result = self.screenshot_manager.take_screenshot(
             description=description, compress=compress, max_width=max_width, 
-            quality=quality, crop_x=crop_x, crop_y=crop_y, crop_size=crop_size
+            quality=quality, crop_x=crop_x, crop_y=crop_y, crop_size=crop_size,
+            max_bytes=max_bytes
         )
         
         # 记录操作（如果成功）
@@ -175,6 +177,16 @@ class BasicMobileToolsLite:
         
         return result
     
+    async def take_screenshot_async(self, description: str = "", compress: bool = True,
+                                    max_width: int = 720, quality: int = 75,
+                                    crop_x: int = 0, crop_y: int = 0, crop_size: int = 0,
+                                    max_bytes: int = 0) -> Dict:
+        """截图（在工作池中执行，不阻塞事件循环）"""
+        return await self.client.work_pool.run(
+            self.take_screenshot, description=description, compress=compress, max_width=max_width,
+            quality=quality, crop_x=crop_x, crop_y=crop_y, crop_size=crop_size, max_bytes=max_bytes
+        )
+    
     def take_screenshot_with_grid(self, grid_size: int = 100, show_popup_hints: bool = False) -> Dict:
         """网格截图（使用统一管理器）"""
         result = self.screenshot_manager.take_screenshot_with_grid(grid_size, show_popup_hints)
@@ -185,9 +197,13 @@ class BasicMobileToolsLite:
         
         return result
     
-    def take_screenshot_with_som(self) -> Dict:
+    async def take_screenshot_with_grid_async(self, grid_size: int = 100, show_popup_hints: bool = False) -> Dict:
+        """网格截图（在工作池中执行，不阻塞事件循环）"""
+        return await self.client.work_pool.run(self.take_screenshot_with_grid, grid_size, show_popup_hints)
+    
+    def take_screenshot_with_som(self, pruned: bool = False) -> Dict:
         """SoM截图（使用统一管理器）"""
-        result = self.screenshot_manager.take_screenshot_with_som()
+        result = self.screenshot_manager.take_screenshot_with_som(pruned=pruned)
         
         # 记录操作并设置SoM元素
         if result.get('success'):
@@ -198,6 +214,10 @@ class BasicMobileToolsLite:
         
         return result
     
+    async def take_screenshot_with_som_async(self, pruned: bool = False) -> Dict:
+        """SoM截图（在工作池中执行，不阻塞事件循环）"""
+        return await self.client.work_pool.run(self.take_screenshot_with_som, pruned=pruned)
+    
     # ==================== 点击功能（使用统一管理器）====================
     
     def click_at_coords(self, x: int, y: int, image_width: int = 0, image_height: int = 0,
@@ -227,10 +247,10 @@ class BasicMobileToolsLite:
         return result
     
     def click_by_text(self, text: str, timeout: float = 3.0, position: Optional[str] = None, 
-                       verify: Optional[str] = None) -> Dict:
+                       verify: Optional[str] = None, pruned: bool = False) -> Dict:
         """文本点击（使用统一管理器）"""
         result = self.click_manager.click('text', text=text, timeout=timeout, 
-                                        position=position, verify=verify)
+                                        position=position, verify=verify, pruned=pruned)
         
         # 记录操作
         if result.get('success'):
@@ -307,6 +327,7 @@ class BasicMobileToolsLite:
                 
                 if element:
                     element.press(duration=duration)
+                    self.client.invalidate_hierarchy('long_press')
                     return {"success": True, "message": f"✅ iOS长按成功: {resource_id}"}
                 else:
                     return {"success": False, "message": f"❌ 未找到元素: {resource_id}"}
@@ -315,6 +336,7 @@ class BasicMobileToolsLite:
                 elem = self.client.u2(resourceId=resource_id)
                 if elem.exists(timeout=2):
                     elem.long_click(duration=duration)
+                    self.client.invalidate_hierarchy('long_press')
                     return {"success": True, "message": f"✅ Android长按成功: {resource_id}"}
                 else:
                     return {"success": False, "message": f"❌ 未找到元素: {resource_id}"}
@@ -332,6 +354,7 @@ class BasicMobileToolsLite:
                 element = ios_client.wda.find_element_by_name(text)
                 if element:
                     element.press(duration=duration)
+                    self.client.invalidate_hierarchy('long_press')
                     return {"success": True, "message": f"✅ iOS长按成功: {text}"}
                 else:
                     return {"success": False, "message": f"❌ 未找到文本: {text}"}
@@ -339,6 +362,7 @@ class BasicMobileToolsLite:
                 elem = self.client.u2(text=text)
                 if elem.exists(timeout=2):
                     elem.long_click(duration=duration)
+                    self.client.invalidate_hierarchy('long_press')
                     return {"success": True, "message": f"✅ Android长按成功: {text}"}
                 else:
                     return {"success": False, "message": f"❌ 未找到文本: {text}"}
@@ -362,6 +386,7 @@ class BasicMobileToolsLite:
                 x = int(screen_width * x_percent / 100)
                 y = int(screen_height * y_percent / 100)
                 self.client.u2.long_click(x, y, duration)
+            self.client.invalidate_hierarchy('long_press')
             
             return {"success": True, "message": f"✅ 百分比长按成功: ({x_percent}%, {y_percent}%)"}
         except Exception as e:
@@ -375,6 +400,7 @@ class BasicMobileToolsLite:
                 ios_client.wda.tap(x, y, duration=duration)
             else:
                 self.client.u2.long_click(x, y, duration)
+            self.client.invalidate_hierarchy('long_press')
             
             return {"success": True, "message": f"✅ 坐标长按成功: ({x}, {y})"}
         except Exception as e:
@@ -397,6 +423,7 @@ class BasicMobileToolsLite:
                 if element:
                     element.clear_text()
                     element.send_keys(text)
+                    self.client.invalidate_hierarchy('input')
                     # 记录操作
                     self._record_input(text, 'id', resource_id, element_desc=resource_id)
                     return {"success": True, "message": f"✅ iOS输入成功: {text}"}
@@ -407,6 +434,7 @@ class BasicMobileToolsLite:
                 if elem.exists(timeout=2):
                     elem.clear_text()
                     elem.set_text(text)
+                    self.client.invalidate_hierarchy('input')
                     # 记录操作
                     self._record_input(text, 'id', resource_id, element_desc=resource_id)
                     return {"success": True, "message": f"✅ Android输入成功: {text}"}
@@ -426,6 +454,7 @@ class BasicMobileToolsLite:
                 active_element = ios_client.wda.active_element
                 if active_element:
                     active_element.send_keys(text)
+                self.client.invalidate_hierarchy('input')
                 # 记录操作（需要计算百分比）
                 try:
                     screen_size = self.client.get_screen_size()
@@ -440,6 +469,7 @@ class BasicMobileToolsLite:
                 self.client.u2.click(x, y)  # 先点击聚焦
                 time.sleep(0.3)
                 self.client.u2.send_keys(text)
+                self.client.invalidate_hierarchy('input')
                 # 记录操作（需要计算百分比）
                 try:
                     info = self.client.u2.info
@@ -507,6 +537,7 @@ class BasicMobileToolsLite:
                 ios_client.wda.swipe(start_x, start_y, end_x, end_y, duration=0.5)
             else:
                 self.client.u2.swipe(start_x, start_y, end_x, end_y, duration=0.5)
+            self.client.invalidate_hierarchy('swipe')
             
             # 记录操作
             self._record_swipe(direction)
@@ -541,6 +572,7 @@ class BasicMobileToolsLite:
                     return {"success": False, "message": f"❌ iOS不支持按键: {key}"}
             else:
                 self.client.u2.press(key)
+            self.client.invalidate_hierarchy('key')
             
             # 记录操作
             self._record_key(key)
@@ -562,6 +594,7 @@ class BasicMobileToolsLite:
                 ios_client.wda.press('home')  # iOS用home键收起键盘
             else:
                 self.client.u2.press('back')  # Android用返回键收起键盘
+            self.client.invalidate_hierarchy('key')
             
             return {"success": True, "message": "✅ 键盘已收起"}
         except Exception as e:
@@ -577,6 +610,7 @@ class BasicMobileToolsLite:
                 ios_client.wda.app_activate(package_name)
             else:
                 self.client.u2.app_start(package_name)
+            self.client.invalidate_hierarchy('launch')
             
             return {"success": True, "message": f"✅ 应用启动成功: {package_name}"}
         except Exception as e:
@@ -590,6 +624,7 @@ class BasicMobileToolsLite:
                 ios_client.wda.app_terminate(package_name)
             else:
                 self.client.u2.app_stop(package_name)
+            self.client.invalidate_hierarchy('stop')
             
             return {"success": True, "message": f"✅ 应用终止成功: {package_name}"}
         except Exception as e:
@@ -636,7 +671,10 @@ class BasicMobileToolsLite:
                     return {"success": False, "connected": False, "message": "iOS客户端未初始化"}
             else:
                 info = self.client.u2.info
-                return {"success": True, "connected": True, "device_info": info}
+                return {"success": True, "connected": True, "device_info": info,
+                        "hierarchy_cache": self.client.hierarchy_cache.stats(),
+                        "hierarchy_watcher": self.client.hierarchy_watcher.stats(),
+                        "screen_stream": self.client.screen_stream.stats() if self.client.screen_stream else None}
         except Exception as e:
             return {"success": False, "connected": False, "message": f"❌ 连接检查失败: {e}"}
     
@@ -656,9 +694,9 @@ class BasicMobileToolsLite:
     
     # ==================== 辅助工具====================
     
-    def list_elements(self) -> List[Dict]:
+    def list_elements(self, pruned: bool = False) -> List[Dict]:
         """列出页面元素（使用统一管理器）"""
-        return self.element_manager.list_elements()
+        return self.element_manager.list_elements(pruned=pruned)
     
     def find_close_button(self) -> Dict:
         """查找关闭按钮"""
@@ -742,6 +780,7 @@ class BasicMobileToolsLite:
                     ios_client.wda.tap(x, y)
                 else:
                     self.client.u2.click(x, y)
+                self.client.invalidate_hierarchy('click')
                 
                 return {"success": True, "message": "✅ 已点击关闭按钮", "clicked": True}
             else:
@@ -754,10 +793,10 @@ class BasicMobileToolsLite:
         # 简化实现，使用close_popup
         return self.close_popup()
     
-    def assert_text(self, text: str) -> Dict:
+    def assert_text(self, text: str, pruned: bool = False) -> Dict:
         """断言文本"""
         try:
-            element = self.element_manager.find_element_by_text(text)
+            element = self.element_manager.find_element_by_text(text, pruned=pruned)
             if element:
                 return {"success": True, "message": f"✅ 找到文本: {text}"}
             else:
@@ -54,8 +54,8 @@ class DynamicConfig:
     
     # ==================== 页面检测阈值 ====================
     
-    # 页面变化阈值（0-1）- 百分比
-    # 默认 0.05 = 5% 变化就认为页面发生了变化
+    # 页面变化阈值（0-1）- 变化节点占UI树节点的比例（结构哈希 diff）
+    # 默认 0.05 = 5% 节点变化就认为页面发生了变化
     page_change_threshold: float = 0.05
     
     # 页面稳定阈值（秒）- 连续多久无变化认为稳定
@@ -80,11 +80,33 @@ class DynamicConfig:
     # 最多点击多少个关闭按钮（避免误点击）
     max_close_buttons: int = 1
     
+    # ==================== 层级抓取 ====================
+    
+    # 层级抓取后端：auto(按设备测速自动选择), exec_out, shell_dump, u2_dump
+    # （u2_compressed 只用于精简模式，配置为它时完整模式按默认顺序抓取）
+    hierarchy_backend: str = "auto"
+    
+    # 自动选择时的完整性要求（0-1）- 有意义节点（文本/描述/ID/可点击）数量
+    # 不低于各后端最大值的该比例才可入选
+    hierarchy_min_completeness: float = 0.98
+    
     # ==================== 截图策略 ====================
     
     # 截图策略：always(总是), on_failure(失败时), never(从不), smart(智能)
     screenshot_strategy: str = "smart"
     
+    # 截图后端（Android）：u2(设备端PNG编码), raw(exec-out screencap原始帧，无PNG编解码)
+    screenshot_backend: str = "u2"
+    
+    # 截图去重：画面感知哈希未变化时直接返回上次的截图文件（不重新编码/写盘）
+    screenshot_dedup: bool = True
+    
+    # 截图缩放：lanczos(整图LANCZOS), fast(整数倍reduce+LANCZOS收尾), area(cv2 INTER_AREA)
+    screenshot_resize: str = "lanczos"
+    
+    # 截图格式：jpeg(压缩JPEG，裁剪/原图PNG), webp(压缩有损WebP，裁剪/原图无损WebP)
+    screenshot_format: str = "jpeg"
+    
     # ==================== 重试策略 ====================
     
     # 操作失败时的最大重试次数
@@ -180,6 +202,12 @@ class DynamicConfig:
             "screen_orientation": (str, "screen_orientation"),
             "lock_screen_orientation": (bool, "lock_screen_orientation"),
             "screenshot_strategy": (str, "screenshot_strategy"),
+            "screenshot_backend": (str, "screenshot_backend"),
+            "screenshot_dedup": (bool, "screenshot_dedup"),
+            "screenshot_resize": (str, "screenshot_resize"),
+            "screenshot_format": (str, "screenshot_format"),
+            "hierarchy_backend": (str, "hierarchy_backend"),
+            "hierarchy_min_completeness": (float, "hierarchy_min_completeness"),
         }
         
         for key, (type_cast, attr_name) in simple_configs.items():
@@ -230,6 +258,14 @@ class DynamicConfig:
                 "max_close_buttons": cls.max_close_buttons,
             },
             "screenshot_strategy": cls.screenshot_strategy,
+            "screenshot_backend": cls.screenshot_backend,
+            "screenshot_dedup": cls.screenshot_dedup,
+            "screenshot_resize": cls.screenshot_resize,
+            "screenshot_format": cls.screenshot_format,
+            "hierarchy": {
+                "backend": cls.hierarchy_backend,
+                "min_completeness": cls.hierarchy_min_completeness,
+            },
             "retry_strategy": {
                 "max_retries": cls.max_retries,
                 "retry_delay": cls.retry_delay,
@@ -260,6 +296,12 @@ class DynamicConfig:
         cls.wait_before_close_ad = 0.3
         cls.max_close_buttons = 1
         cls.screenshot_strategy = "smart"
+        cls.screenshot_backend = "u2"
+        cls.screenshot_dedup = True
+        cls.screenshot_resize = "lanczos"
+        cls.screenshot_format = "jpeg"
+        cls.hierarchy_backend = "auto"
+        cls.hierarchy_min_completeness = 0.98
         cls.max_retries = 3
         cls.retry_delay = 1.0
         
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+层级抓取后端选择器 - 按设备测速，自动选择最快且足够完整的后端
+
+功能：
+1. 首次连接设备时在后台对各完整 dump 后端（exec_out / shell_dump / u2_dump）测速
+2. 记录每个后端的耗时、节点数、有意义节点数（文本/描述/ID/可点击）
+3. 按完整性规则过滤后选择最快的后端
+4. 结果按设备持久化到 ~/.mobile_mcp/hierarchy_backends.json，下次直接复用
+
+用法:
+    selector = HierarchyBackendSelector(capture)
+    backend = selector.select()              # 有记录直接复用，否则测速
+    backend = selector.select(force=True)    # 强制重新测速
+"""
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from mobile_mcp.utils.ui_tree import UITree, FLAG_CLICKABLE
+
+
+class HierarchyBackendSelector:
+    """
+    层级抓取后端选择器
+
+    完整性规则：后端的有意义节点数 >= 所有后端最大值 × min_completeness
+
+    选出的后端用于完整（full）模式，压缩 dump 会丢掉纯布局节点，不参与选择
+    （精简模式固定走 u2_compressed，见 HierarchyCapture.capture_compressed）
+    """
+
+    CANDIDATES = ('exec_out', 'shell_dump', 'u2_dump')
+
+    # 测速记录的有效期，系统升级等情况下重新测
+    MAX_AGE_DAYS = 30
+
+    def __init__(self, capture, store_file: Optional[str] = None, repeat: int = 3,
+                 min_completeness: Optional[float] = None):
+        """
+        初始化选择器
+
+        Args:
+            capture: HierarchyCapture实例
+            store_file: 持久化文件路径，默认 ~/.mobile_mcp/hierarchy_backends.json
+            repeat: 每个后端的测速次数（另有 1 次预热）
+            min_completeness: 完整性要求，None 使用 DynamicConfig.hierarchy_min_completeness
+        """
+        self.capture = capture
+        self.repeat = repeat
+        self._min_completeness = min_completeness
+
+        if store_file is None:
+            mobile_mcp_dir = Path.home() / ".mobile_mcp"
+            self.store_file = mobile_mcp_dir / "hierarchy_backends.json"
+        else:
+            self.store_file = Path(store_file)
+
+        self.last_results: Dict[str, Dict] = {}
+
+    @property
+    def min_completeness(self) -> float:
+        if self._min_completeness is not None:
+            return self._min_completeness
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            return DynamicConfig.hierarchy_min_completeness
+        except ImportError:
+            return 0.98
+
+    # ==================== 持久化 ====================
+
+    def device_key(self) -> str:
+        """设备标识：序列号 + 型号 + 系统版本（同型号不同系统版本后端表现也可能不同）"""
+        client = self.capture.client
+        device_id = client.device_manager.current_device_id or 'default'
+        model = ''
+        sdk = ''
+        try:
+            info = client.u2.info
+            model = info.get('productName', '')
+            sdk = info.get('sdkInt', '')
+        except Exception:
+            pass
+        return f"{device_id}|{model}|{sdk}"
+
+    def load(self) -> Dict[str, Dict]:
+        """读取所有设备的测速记录"""
+        try:
+            with open(self.store_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"  ⚠️  读取层级后端记录失败: {e}", file=sys.stderr)
+            return {}
+
+    def save(self, device_key: str, record: Dict):
+        """写入当前设备的测速记录"""
+        data = self.load()
+        data[device_key] = record
+        try:
+            self.store_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.store_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.store_file)
+        except Exception as e:
+            print(f"  ⚠️  保存层级后端记录失败: {e}", file=sys.stderr)
+
+    # ==================== 测速与选择 ====================
+
+    def measure(self, backend: str) -> Dict:
+        """
+        测量单个后端
+
+        Returns:
+            {'ok', 'median_ms', 'min_ms', 'nodes', 'meaningful', 'bytes', 'error'}
+        """
+        try:
+            # 预热（u2 首次调用会拉起服务）
+            xml_string = self.capture._run(backend)
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                xml_string = self.capture._run(backend)
+                samples.append((time.perf_counter() - start) * 1000)
+
+            tree = UITree.from_xml(xml_string)
+            meaningful = sum(
+                1 for i in range(len(tree))
+                if tree.text[i] or tree.content_desc[i] or tree.resource_id[i] or tree.flags[i] & FLAG_CLICKABLE
+            )
+            return {
+                'ok': True,
+                'median_ms': round(statistics.median(samples), 1),
+                'min_ms': round(min(samples), 1),
+                'nodes': len(tree),
+                'meaningful': meaningful,
+                'bytes': len(xml_string),
+            }
+        except Exception as e:
+            return {'ok': False, 'error': str(e)[:200]}
+
+    def benchmark(self) -> Dict[str, Dict]:
+        """对所有候选后端测速"""
+        results = {}
+        for backend in self.CANDIDATES:
+            results[backend] = self.measure(backend)
+            result = results[backend]
+            if result['ok']:
+                print(f"  ⏱️  {backend}: {result['median_ms']}ms, {result['nodes']}节点"
+                      f"（有意义 {result['meaningful']}）", file=sys.stderr)
+            else:
+                print(f"  ⚠️  {backend}: 不可用 ({result['error']})", file=sys.stderr)
+        self.last_results = results
+        return results
+
+    def choose(self, results: Dict[str, Dict]) -> Optional[str]:
+        """
+        按完整性规则过滤后选择最快的后端
+
+        Args:
+            results: benchmark() 的结果
+
+        Returns:
+            后端名称，全部不可用时返回 None
+        """
+        available = {name: r for name, r in results.items() if name in self.CANDIDATES and r.get('ok')}
+        if not available:
+            return None
+        baseline = max(r['meaningful'] for r in available.values())
+        required = baseline * self.min_completeness
+        eligible = [name for name, r in available.items() if r['meaningful'] >= required]
+        if not eligible:
+            eligible = list(available)
+        return min(eligible, key=lambda name: available[name]['median_ms'])
+
+    def select(self, force: bool = False) -> Optional[str]:
+        """
+        为当前设备选择后端
+
+        Args:
+            force: 是否忽略已有记录，重新测速
+
+        Returns:
+            后端名称，测速失败返回 None（调用方按默认顺序抓取）
+        """
+        device_key = self.device_key()
+        if not force:
+            record = self.load().get(device_key)
+            if self._record_usable(record):
+                self.last_results = record.get('results', {})
+                return record['selected']
+
+        print(f"  🔬 首次连接，测试层级抓取后端...", file=sys.stderr)
+        results = self.benchmark()
+        selected = self.choose(results)
+        if selected is None:
+            return None
+
+        self.save(device_key, {
+            'selected': selected,
+            'min_completeness': self.min_completeness,
+            'measured_at': datetime.now().isoformat(),
+            'results': results,
+        })
+        print(f"  ✅ 层级抓取后端: {selected}", file=sys.stderr)
+        return selected
+
+    def _record_usable(self, record: Optional[Dict]) -> bool:
+        """记录是否可直接复用（存在、规则一致、未过期）"""
+        if not record or record.get('selected') not in self.CANDIDATES:
+            return False
+        if record.get('min_completeness') != self.min_completeness:
+            return False
+        try:
+            measured_at = datetime.fromisoformat(record['measured_at'])
+        except Exception:
+            return False
+        return (datetime.now() - measured_at).days < self.MAX_AGE_DAYS
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI 层级缓存 - 所有管理器共享的、带版本号的 hierarchy 缓存
+
+功能：
+1. 每个设备（MobileClient）一份缓存，同一步骤内多个工具只 dump 一次
+2. 任何会改变界面的操作（点击、滑动、输入、按键、启动应用）都会使缓存失效
+3. 版本号单调递增：每次失效或写入新 dump 都会 +1
+4. 同一版本的 XML 只解析一次为 UITree，供所有管理器复用
+5. 命中/未命中统计
+6. 精简模式（pruned）：压缩 dump + UITree.pruned()，同一版本只精简一次
+7. 单飞合并：并发的未命中请求共享同一次 dump 和同一次解析（client.single_flight）
+
+用法:
+    cache = HierarchyCache(client)
+    xml_string = cache.get_xml()             # 有效缓存直接返回
+    xml_string = cache.get_xml(fresh=True)   # 强制重新抓取（验证循环用）
+    tree = cache.get_tree()                  # 解析后的 UI 树（同一版本只解析一次）
+    tree = cache.get_tree(pruned=True)       # 精简树（压缩 dump，去掉不可见节点、折叠布局链）
+    tree = await cache.get_tree_async()      # 协程中使用，抓取在线程池中执行
+    cache.invalidate('click')                # 操作后失效
+    cache.stats()
+"""
+import asyncio
+import functools
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from mobile_mcp.utils.ui_tree import UITree
+
+# dump 开头 <hierarchy rotation="N"> 的方向（只在 XML 头部查找）
+_ROTATION_RE = re.compile(r'<hierarchy[^>]*\brotation="(\d+)"')
+
+
+class HierarchyCache:
+    """
+    共享 UI 层级缓存
+
+    缓存条目只有在「版本号未变化」且「未超过 TTL」时才有效：
+    - 版本号保证操作之后不会读到旧页面
+    - TTL 兜底页面自身的变化（动画、异步加载）
+    """
+
+    def __init__(self, mobile_client, ttl: float = 1.0):
+        """
+        初始化缓存
+
+        Args:
+            mobile_client: MobileClient实例（通过其 hierarchy_capture 抓取）
+            ttl: 缓存有效期（秒），与 snapshot 原有的 1 秒缓存一致
+        """
+        self.client = mobile_client
+        self.ttl = ttl
+
+        self._lock = threading.RLock()
+        self.version = 0
+
+        # 当前缓存条目
+        self._xml: Optional[str] = None
+        self._xml_version = -1
+        self._timestamp = 0.0
+        self._captured_at = 0.0
+        # 条目来源：full（完整 dump）/ compressed（压缩 dump，只能用于精简树）
+        self._mode = 'full'
+
+        # 当前条目解析出的 UI 树
+        self._tree: Optional[UITree] = None
+        self._tree_version = -1
+
+        # 当前条目的精简树
+        self._pruned_tree: Optional[UITree] = None
+        self._pruned_version = -1
+
+        # 屏幕尺寸缓存：方向 -> (宽, 高)，每个方向只查询一次设备
+        self._display_sizes: Dict[Optional[str], Tuple[int, int]] = {}
+
+        # 最近一次界面操作的时间（供等待逻辑判断「操作之后」）
+        self.last_action_time = 0.0
+        self.last_action = ''
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _is_valid(self, max_age: Optional[float], compressed: bool = False) -> bool:
+        """当前条目是否可用（压缩 dump 的条目只能满足精简请求）"""
+        if self._xml is None or self._xml_version != self.version:
+            return False
+        if self._mode == 'compressed' and not compressed:
+            return False
+        age_limit = self.ttl if max_age is None else max_age
+        return time.time() - self._timestamp < age_limit
+
+    def _fetch(self, fresh: bool, max_age: Optional[float],
+               compressed: bool = False) -> Tuple[str, int, float]:
+        """
+        取缓存条目或重新抓取
+
+        未命中时，同一版本、同一模式的并发请求合并为一次抓取（fresh 请求也会合并到
+        正在进行的抓取上，调用方需要「某时刻之后」的页面时应按 captured_at 判断）
+
+        Args:
+            compressed: 是否接受（未命中时使用）压缩 dump
+
+        Returns:
+            (XML字符串, 条目版本号（未写入缓存时为 -1）, 抓取开始时间)
+        """
+        with self._lock:
+            if not fresh and self._is_valid(max_age, compressed):
+                self.hits += 1
+                return self._xml, self._xml_version, self._captured_at
+            self.misses += 1
+            base_version = self.version
+
+        def capture():
+            captured_at = time.time()
+            if compressed:
+                xml_string = self.client.hierarchy_capture.capture_compressed()
+            else:
+                xml_string = self.client.hierarchy_capture.capture()
+            version = self.store(xml_string, captured_at=captured_at, base_version=base_version,
+                                 mode='compressed' if compressed else 'full')
+            return xml_string, version, captured_at
+
+        mode = 'compressed' if compressed else 'full'
+        return self.client.single_flight.do(('hierarchy', mode, base_version), capture)
+
+    def get_xml(self, fresh: bool = False, max_age: Optional[float] = None) -> str:
+        """
+        获取页面 XML
+
+        Args:
+            fresh: 是否跳过缓存强制抓取（结果仍会写入缓存）
+            max_age: 本次调用可接受的最大缓存年龄（秒），None 使用 ttl
+
+        Returns:
+            XML字符串
+        """
+        return self._fetch(fresh, max_age)[0]
+
+    def get_tree(self, fresh: bool = False, max_age: Optional[float] = None,
+                 pruned: bool = False) -> UITree:
+        """
+        获取解析后的 UI 树
+
+        与 get_xml 共享同一个缓存条目，同一版本的 XML 只解析一次
+
+        Args:
+            fresh: 是否跳过缓存强制抓取
+            max_age: 本次调用可接受的最大缓存年龄（秒），None 使用 ttl
+            pruned: 是否返回精简树（可复用完整条目，未命中时使用压缩 dump）
+
+        Returns:
+            UITree实例（captured_at 为对应 dump 的开始时间）
+        """
+        if pruned:
+            return self._get_pruned_tree(fresh, max_age)
+
+        return self._parse(*self._fetch(fresh, max_age))
+
+    async def get_tree_async(self, fresh: bool = False, max_age: Optional[float] = None,
+                             pruned: bool = False) -> UITree:
+        """
+        协程版 get_tree：抓取和解析在线程池中执行，不阻塞事件循环
+
+        参数同 get_tree
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.get_tree, fresh, max_age, pruned))
+
+    def _parse(self, xml_string: str, version: int, captured_at: float) -> UITree:
+        """解析条目 XML（同一版本只解析一次，并发解析合并）"""
+        with self._lock:
+            if version >= 0 and self._tree is not None and self._tree_version == version:
+                return self._tree
+
+        if version >= 0:
+            return self.client.single_flight.do(
+                ('parse', version), functools.partial(self._build_tree, xml_string, version, captured_at))
+        return self._build_tree(xml_string, version, captured_at)
+
+    def _build_tree(self, xml_string: str, version: int, captured_at: float) -> UITree:
+        """解析 XML 并写入当前条目"""
+        with self._lock:
+            if version >= 0 and self._tree is not None and self._tree_version == version:
+                return self._tree
+
+        tree = UITree.from_xml(xml_string)
+        tree.captured_at = captured_at
+        with self._lock:
+            if version >= 0 and self._xml_version == version:
+                self._tree = tree
+                self._tree_version = version
+        return tree
+
+    def _get_pruned_tree(self, fresh: bool, max_age: Optional[float]) -> UITree:
+        """获取精简树（同一版本只精简一次）"""
+        xml_string, version, captured_at = self._fetch(fresh, max_age, compressed=True)
+        with self._lock:
+            if version >= 0 and self._pruned_tree is not None and self._pruned_version == version:
+                return self._pruned_tree
+
+        screen_width, screen_height = self._screen_size(xml_string)
+        tree = self._parse(xml_string, version, captured_at).pruned(screen_width, screen_height)
+        with self._lock:
+            if version >= 0 and self._xml_version == version:
+                self._pruned_tree = tree
+                self._pruned_version = version
+        return tree
+
+    def _screen_size(self, xml_string: str) -> Tuple[int, int]:
+        """
+        屏幕尺寸（用于去掉屏幕外节点）
+
+        按 dump 头部的 rotation 缓存，同一方向只查询一次设备（u2.info 是一次 RPC）；
+        获取失败返回 (0, 0) 只做零面积过滤，下次再试
+        """
+        match = _ROTATION_RE.search(xml_string, 0, 512)
+        rotation = match.group(1) if match else None
+        size = self._display_sizes.get(rotation)
+        if size is not None:
+            return size
+        try:
+            info = self.client.u2.info
+            size = (info.get('displayWidth', 0), info.get('displayHeight', 0))
+        except Exception:
+            return 0, 0
+        if size[0] and size[1]:
+            self._display_sizes[rotation] = size
+        return size
+
+    def get_tree_since(self, after: float) -> Optional[UITree]:
+        """
+        取「在 after 之后开始抓取」的当前缓存树，没有则返回 None（不触发抓取）
+
+        Args:
+            after: 时间戳
+
+        Returns:
+            UITree实例或None
+        """
+        with self._lock:
+            if (self._xml is None or self._xml_version != self.version
+                    or self._mode != 'full' or self._captured_at <= after):
+                return None
+        try:
+            tree = self.get_tree(max_age=float('inf'))
+        except Exception:
+            return None
+        return tree if tree.captured_at > after else None
+
+    def store(self, xml_string: str, captured_at: Optional[float] = None,
+              base_version: Optional[int] = None, mode: str = 'full') -> int:
+        """
+        写入一份新抓取的 XML
+
+        Args:
+            xml_string: XML字符串
+            captured_at: 抓取开始时间，None 表示当前时间
+            base_version: 抓取开始时的版本号；抓取期间发生了界面操作（版本已变）
+                          则这份 XML 可能是操作前的页面，不写入缓存
+            mode: full（完整 dump）/ compressed（压缩 dump）
+
+        Returns:
+            新条目的版本号，未写入时返回 -1
+        """
+        with self._lock:
+            if base_version is not None and base_version != self.version:
+                return -1
+            self.version += 1
+            self._xml = xml_string
+            self._xml_version = self.version
+            self._timestamp = time.time()
+            self._captured_at = captured_at if captured_at is not None else self._timestamp
+            self._mode = mode
+            self._tree = None
+            self._tree_version = -1
+            self._pruned_tree = None
+            self._pruned_version = -1
+            return self.version
+
+    def invalidate(self, reason: str = '') -> int:
+        """
+        使缓存失效（界面操作后调用）
+
+        Args:
+            reason: 触发失效的操作名称（click / swipe / input / key / launch ...）
+
+        Returns:
+            新的版本号
+        """
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            self.last_action_time = time.time()
+            self.last_action = reason
+            return self.version
+
+    def stats(self) -> Dict:
+        """获取缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'invalidations': self.invalidations,
+                'last_action': self.last_action,
+                'cached': self._is_valid(None),
+                'mode': self._mode,
+                'single_flight': self.client.single_flight.stats(),
+            }
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI 层级抓取 - 统一的 hierarchy dump 后端
+
+功能：
+1. exec-out 单次往返抓取（uiautomator dump 直接输出到 stdout，设备上不落临时文件）
+2. 传统三次 shell 往返（dump -> cat -> rm）
+3. uiautomator2 JSON-RPC dump_hierarchy（完整 / 压缩）
+4. 连接设备时在后台按设备测速选择后端（见 HierarchyBackendSelector，结果持久化），
+   测速完成前按默认顺序抓取，不阻塞工具调用
+
+用法:
+    capture = HierarchyCapture(client)
+    capture.start_selection()                 # 连接时调用，后台测速
+    xml_string = capture.capture()            # 按设备选定的后端抓取，失败按优先级回退
+    xml_string = capture.capture('exec_out')  # 指定后端
+"""
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from mobile_mcp.core.hierarchy_backend_selector import HierarchyBackendSelector
+
+
+# uiautomator dump 输出到 stdout 后会在末尾追加一行提示，需要剥离
+_XML_END_TAG = '</hierarchy>'
+
+
+def _shell_output(response) -> str:
+    """
+    统一 u2.shell 的返回值
+
+    uiautomator2 2.x 返回 (output, exit_code) 元组，3.x 返回 ShellResponse，
+    旧代码里直接当 str 处理会导致判断永远失败
+    """
+    if response is None:
+        return ''
+    if isinstance(response, str):
+        return response
+    output = getattr(response, 'output', None)
+    if output is None and isinstance(response, (tuple, list)) and response:
+        output = response[0]
+    return output if isinstance(output, str) else str(output or '')
+
+
+def extract_hierarchy_xml(raw: str) -> Optional[str]:
+    """
+    从 uiautomator dump 的原始输出中截取 XML
+
+    Args:
+        raw: 原始输出（可能带有 "UI hierchary dumped to: ..." 提示）
+
+    Returns:
+        XML字符串，无法识别时返回 None
+    """
+    if not raw:
+        return None
+    start = raw.find('<?xml')
+    if start < 0:
+        start = raw.find('<hierarchy')
+    end = raw.rfind(_XML_END_TAG)
+    if start < 0 or end < 0:
+        return None
+    return raw[start:end + len(_XML_END_TAG)]
+
+
+class HierarchyCapture:
+    """
+    UI 层级抓取器
+
+    后端：
+    - exec_out:   adb exec-out uiautomator dump /dev/tty（一次往返，无临时文件）
+    - shell_dump: u2.shell dump -> cat -> rm（三次往返，旧实现）
+    - u2_dump:    u2.dump_hierarchy(compressed=False)
+    - u2_compressed: u2.dump_hierarchy(compressed=True)（去掉不重要的布局节点）
+    """
+
+    BACKENDS = ('exec_out', 'shell_dump', 'u2_dump', 'u2_compressed')
+
+    # 默认优先级：exec_out 保留 NAF 元素且只需一次往返
+    DEFAULT_ORDER = ('exec_out', 'u2_dump')
+
+    # 压缩后端只给精简模式用，完整模式不会选用
+    COMPRESSED_BACKENDS = ('u2_compressed',)
+
+    # 连续失败多少次才暂停使用（uiautomator dump 在动画期间偶发 "could not get idle state"）
+    MAX_FAILURES = 3
+    # 暂停时长（秒），之后重新尝试；恢复后再失败一次就再次暂停，成功则清零
+    DISABLE_SECONDS = 60.0
+
+    def __init__(self, mobile_client, timeout: float = 10.0, auto_select: bool = True):
+        """
+        初始化抓取器
+
+        Args:
+            mobile_client: MobileClient实例
+            timeout: 单次 adb 调用超时（秒）
+            auto_select: 是否按设备测速选择后端（后台执行）
+        """
+        self.client = mobile_client
+        self.timeout = timeout
+        # 连续失败次数；达到 MAX_FAILURES 的后端暂停使用 DISABLE_SECONDS 秒
+        self._failures: Dict[str, int] = {}
+        self._disabled: Dict[str, str] = {}
+        self._disabled_until: Dict[str, float] = {}
+
+        # 按设备选择的后端（None 表示尚未选择）
+        self.auto_select = auto_select
+        self.selector = HierarchyBackendSelector(self)
+        self.selected: Optional[str] = None
+        self._select_attempted = False
+
+        # 同一设备上的 dump 串行执行（后台测速与工具调用的抓取互不干扰）
+        self._dump_lock = threading.Lock()
+
+    def _configured_backend(self) -> str:
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            return DynamicConfig.hierarchy_backend
+        except ImportError:
+            return 'auto'
+
+    def start_selection(self):
+        """在后台线程中测速选择后端（已有记录时很快返回），只执行一次"""
+        if not self.auto_select or self._select_attempted:
+            return
+        configured = self._configured_backend()
+        if configured and configured != 'auto':
+            return
+        self._select_attempted = True
+        threading.Thread(target=self._select, daemon=True, name='hierarchy-backend-select').start()
+
+    def _select(self):
+        try:
+            self.selected = self.selector.select()
+        except Exception as e:
+            print(f"  ⚠️  层级后端测速失败，使用默认顺序: {e}", file=sys.stderr)
+
+    def _preferred_backend(self) -> Optional[str]:
+        """当前优先使用的完整 dump 后端：手动配置 > 设备测速结果（测速未完成时为 None）"""
+        configured = self._configured_backend()
+        if configured and configured != 'auto':
+            if configured in self.BACKENDS and configured not in self.COMPRESSED_BACKENDS:
+                return configured
+            return None
+
+        # 延迟连接时没有在连接阶段启动，第一次抓取时启动（不等待结果）
+        self.start_selection()
+        return self.selected
+
+    def reselect(self) -> Optional[str]:
+        """重新测速并选择后端（设备或系统变化后调用）"""
+        self._failures.clear()
+        self._disabled.clear()
+        self._disabled_until.clear()
+        self._select_attempted = True
+        self.selected = self.selector.select(force=True)
+        return self.selected
+
+    def capture(self, backend: Optional[str] = None) -> str:
+        """
+        抓取当前页面的 XML
+
+        Args:
+            backend: 指定后端，None 则按 DEFAULT_ORDER 依次尝试
+
+        Returns:
+            XML字符串
+        """
+        if backend:
+            return self._run(backend)
+
+        preferred = self._preferred_backend()
+        order = self.DEFAULT_ORDER
+        if preferred:
+            order = (preferred,) + tuple(name for name in self.DEFAULT_ORDER if name != preferred)
+
+        last_error = None
+        for name in order:
+            if self._is_disabled(name):
+                continue
+            try:
+                xml_string = self._run(name)
+            except Exception as e:
+                last_error = e
+                # u2_dump 是兜底后端，失败通常是偶发的，不禁用
+                if name != 'u2_dump':
+                    self._record_failure(name, e)
+                continue
+            self._failures.pop(name, None)
+            return xml_string
+
+        raise RuntimeError(f"获取页面结构失败: {last_error}")
+
+    def capture_compressed(self) -> str:
+        """
+        抓取压缩后的 XML（精简模式用），压缩 dump 不可用时回退到常规抓取
+
+        Returns:
+            XML字符串
+        """
+        if not self._is_disabled('u2_compressed'):
+            try:
+                xml_string = self._run('u2_compressed')
+            except Exception as e:
+                self._record_failure('u2_compressed', e)
+            else:
+                self._failures.pop('u2_compressed', None)
+                return xml_string
+        return self.capture()
+
+    def _is_disabled(self, backend: str) -> bool:
+        """后端是否处于暂停期（暂停到期后自动恢复尝试）"""
+        if backend not in self._disabled:
+            return False
+        if time.time() < self._disabled_until.get(backend, float('inf')):
+            return True
+        del self._disabled[backend]
+        self._disabled_until.pop(backend, None)
+        return False
+
+    def _record_failure(self, backend: str, error: Exception):
+        """记录一次失败，连续失败达到 MAX_FAILURES 次时暂停该后端"""
+        failures = self._failures.get(backend, 0) + 1
+        self._failures[backend] = failures
+        if failures < self.MAX_FAILURES:
+            print(f"  ⚠️  {backend} 抓取失败（{failures}/{self.MAX_FAILURES}），本次切换后端: {error}",
+                  file=sys.stderr)
+            return
+        self._disabled[backend] = str(error)
+        self._disabled_until[backend] = time.time() + self.DISABLE_SECONDS
+        print(f"  ⚠️  {backend} 连续失败 {failures} 次，暂停 {self.DISABLE_SECONDS:.0f} 秒: {error}",
+              file=sys.stderr)
+
+    def _run(self, backend: str) -> str:
+        """执行指定后端"""
+        with self._dump_lock:
+            return self._run_backend(backend)
+
+    def _run_backend(self, backend: str) -> str:
+        if backend == 'exec_out':
+            return self.capture_exec_out()
+        elif backend == 'shell_dump':
+            return self.capture_shell_dump()
+        elif backend == 'u2_dump':
+            return self.capture_u2_dump()
+        elif backend == 'u2_compressed':
+            return self.capture_u2_dump(compressed=True)
+        raise ValueError(f"不支持的层级抓取后端: {backend}")
+
+    def capture_exec_out(self) -> str:
+        """单次往返：uiautomator dump 直接写到 stdout，通过 exec-out 原样回传"""
+        device_manager = self.client.device_manager
+        device_id = device_manager.current_device_id
+        cmd = [device_manager.adb_path]
+        if device_id:
+            cmd += ['-s', device_id]
+
+        last_output = ''
+        # /dev/tty 在部分 ROM 上不可写，退回 /dev/stdout
+        for target in ('/dev/tty', '/dev/stdout'):
+            result = subprocess.run(
+                cmd + ['exec-out', 'uiautomator', 'dump', target],
+                capture_output=True,
+                timeout=self.timeout
+            )
+            last_output = result.stdout.decode('utf-8', errors='replace')
+            xml_string = extract_hierarchy_xml(last_output)
+            if xml_string:
+                return xml_string
+
+        raise RuntimeError(f"exec-out dump 无有效输出: {last_output[:100]!r}")
+
+    def capture_shell_dump(self) -> str:
+        """三次往返：dump 到 /sdcard，cat 读回，再 rm 清理（旧实现，保留用于对比）"""
+        u2 = self.client.u2
+        u2.shell('uiautomator dump /sdcard/ui_dump.xml')
+        try:
+            output = _shell_output(u2.shell('cat /sdcard/ui_dump.xml'))
+        finally:
+            u2.shell('rm /sdcard/ui_dump.xml')
+        xml_string = extract_hierarchy_xml(output)
+        if not xml_string:
+            raise RuntimeError(f"shell dump 无有效输出: {output[:100]!r}")
+        return xml_string
+
+    def capture_u2_dump(self, compressed: bool = False) -> str:
+        """uiautomator2 JSON-RPC dump"""
+        xml_string = self.client.u2.dump_hierarchy(compressed=compressed)
+        if not isinstance(xml_string, str):
+            xml_string = str(xml_string)
+        return xml_string
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI 层级监视器 - 每个设备一个后台轮询任务，等待逻辑统一 await 「下一个版本」
+
+功能：
+1. 每个 MobileClient 只有一个 asyncio 轮询任务，不管有多少等待者，设备 RPC 负载都有上限
+2. 自适应轮询间隔：操作后立即回到最快间隔，页面不变时逐步退避
+3. 只在有等待者时轮询，空闲一段时间后任务自动退出，下次等待时再启动
+4. 抓取在线程池中执行，不阻塞事件循环
+5. 接入无障碍事件源后由事件驱动：有界面变化事件才抓取，轮询只作兜底（间隔 event_fallback_interval）
+
+用法:
+    watcher = HierarchyWatcher(client)
+    tree = await watcher.wait_for_tree(after=time.time(), timeout=2.0)
+    watcher.notify_action()   # 界面操作后调用（MobileClient.invalidate_hierarchy 已自动调用）
+"""
+import asyncio
+import sys
+import time
+from typing import Dict, Optional
+
+
+class HierarchyWatcher:
+    """
+    后台 hierarchy 监视器
+
+    发布的每棵树都带有 captured_at（dump 开始时间），
+    等待者用 wait_for_tree(after=T) 获取「T 之后开始抓取」的第一棵树。
+    """
+
+    def __init__(self, mobile_client, min_interval: float = 0.1, max_interval: float = 1.0,
+                 backoff: float = 1.5, idle_timeout: float = 5.0,
+                 events=None, event_fallback_interval: float = 2.0, event_debounce: float = 0.05):
+        """
+        初始化监视器
+
+        Args:
+            mobile_client: MobileClient实例（通过其 hierarchy_cache 抓取并写入共享缓存）
+            min_interval: 最快轮询间隔（秒），操作后使用
+            max_interval: 最慢轮询间隔（秒），页面长时间不变时退避到此值
+            backoff: 页面未变化时间隔的放大倍数
+            idle_timeout: 没有等待者且没有操作超过此时长（秒）后任务退出
+            events: AccessibilityEventSource实例（可选），可用时改为事件驱动
+            event_fallback_interval: 事件驱动模式下的兜底轮询间隔（秒）
+            event_debounce: 收到事件后合并连续事件的等待时间（秒）
+        """
+        self.client = mobile_client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+
+        self.interval = min_interval
+
+        # 无障碍事件源（可选）
+        self.events = events
+        self.event_fallback_interval = event_fallback_interval
+        self.event_debounce = event_debounce
+        self._last_poll_at = 0.0
+
+        # 与事件循环绑定的对象（事件循环变化时重建）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._cond: Optional[asyncio.Condition] = None
+
+        self._latest = None
+        self._waiters = 0
+        self._last_activity = 0.0
+
+        # 统计
+        self.polls = 0
+        self.event_polls = 0
+        self.changes = 0
+        self.errors = 0
+
+    # ==================== 任务管理 ====================
+
+    @property
+    def event_driven(self) -> bool:
+        """当前是否由无障碍事件驱动（事件流不可用时自动回退轮询）"""
+        return self.events is not None and self.events.active
+
+    def attach_events(self, events):
+        """接入无障碍事件源"""
+        self.events = events
+
+    def _ensure_events(self):
+        """事件源尚未启动（且未失败过）时启动，保证第一次等待前已在接收事件"""
+        if self.events is not None and not self.events.active and not self.events.error:
+            self.events.start()
+
+    def _ensure_started(self):
+        """确保当前事件循环上有轮询任务在运行"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._cond = asyncio.Condition()
+            self._task = None
+        self._ensure_events()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def notify_action(self):
+        """界面操作后调用：轮询间隔回到最快，并重新计时（可在任意线程调用）"""
+        self.interval = self.min_interval
+        self._last_activity = time.time()
+        self._ensure_events()
+        loop = self._loop
+        if loop is None or loop.is_closed() or self._task is None or self._task.done():
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass
+
+    def stop(self):
+        """停止轮询任务"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        """轮询主循环"""
+        cache = self.client.hierarchy_cache
+        while True:
+            if self._waiters == 0 and time.time() - self._last_activity > self.idle_timeout:
+                return
+
+            event_triggered = False
+            if self.event_driven:
+                # 事件驱动：上次抓取后有界面变化事件才抓取，否则按兜底间隔抓取
+                if self.events.last_event_time <= self._last_poll_at:
+                    await self.events.wait_for_event(self._last_poll_at, self.event_fallback_interval)
+                event_triggered = self.events.last_event_time > self._last_poll_at
+                if event_triggered:
+                    # 事件通常成串到达，稍等合并为一次抓取
+                    await asyncio.sleep(self.event_debounce)
+                self._wake.clear()
+            else:
+                # 等待一个间隔；期间有操作则重新计时（给界面响应时间）
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                    self._wake.clear()
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            # 没有等待者时不访问设备
+            if self._waiters == 0:
+                continue
+
+            self._last_poll_at = time.time()
+            if event_triggered:
+                self.event_polls += 1
+            try:
+                tree = await cache.get_tree_async(fresh=True)
+            except Exception as e:
+                self.errors += 1
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+                print(f"  ⚠️  页面监视抓取失败: {e}", file=sys.stderr)
+                continue
+
+            self.polls += 1
+            if self._latest is None or tree.root_hash != self._latest.root_hash:
+                self.changes += 1
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+            self._latest = tree
+            async with self._cond:
+                self._cond.notify_all()
+
+    # ==================== 等待 API ====================
+
+    async def wait_for_quiet(self, quiet: float, timeout: float, after: float = 0.0) -> Optional[bool]:
+        """
+        事件驱动模式下等待页面安静（操作之后连续 quiet 秒没有界面变化事件），不访问设备
+
+        Args:
+            quiet: 安静时长（秒）
+            timeout: 最大等待时间（秒）
+            after: 操作时间（安静从操作之后开始计算），0 表示从调用时刻开始
+
+        Returns:
+            是否稳定；事件源不可用时返回 None（调用方应回退到抓取对比）
+        """
+        self._ensure_events()
+        if not self.event_driven:
+            return None
+        stable = await self.events.wait_for_quiet(quiet, timeout, after=after)
+        if not stable and not self.event_driven:
+            return None
+        return stable
+
+    async def wait_for_tree(self, after: float, timeout: float):
+        """
+        等待「after 之后开始抓取」的下一棵 UI 树
+
+        共享缓存里已经有满足条件的树时直接返回，不访问设备
+
+        Args:
+            after: 时间戳（通常是操作时间或上一棵树的 captured_at）
+            timeout: 最大等待时间（秒）
+
+        Returns:
+            UITree实例，超时返回 None
+        """
+        cached = self.client.hierarchy_cache.get_tree_since(after)
+        if cached is not None:
+            return cached
+
+        self._ensure_started()
+        deadline = time.time() + timeout
+        self._waiters += 1
+        self._last_activity = time.time()
+        try:
+            async with self._cond:
+                while self._latest is None or self._latest.captured_at <= after:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        return None
+                return self._latest
+        finally:
+            self._waiters -= 1
+            self._last_activity = time.time()
+
+    def stats(self) -> Dict:
+        """获取监视器统计"""
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'interval': round(self.interval, 3),
+            'waiters': self._waiters,
+            'polls': self.polls,
+            'event_driven': self.event_driven,
+            'event_polls': self.event_polls,
+            'changes': self.changes,
+            'errors': self.errors,
+        }
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图输出格式 - 有损 / 无损编码参数
+
+格式（DynamicConfig.screenshot_format）：
+1. jpeg: 压缩截图 JPEG，局部裁剪 / 原图 PNG（默认）
+2. webp: 压缩截图有损 WebP（同等质量下 UI 截图体积明显更小），局部裁剪 / 原图无损 WebP
+
+Pillow 未编译 WebP 支持时自动回退到 jpeg（只提示一次）。
+
+各格式的编码 / 解码耗时和体积见 scripts/benchmark_screenshot_encode.py
+
+用法:
+    format, params = lossy_spec('webp', quality=75)     # ('WEBP', {'quality': 75, 'method': 4})
+    format, params = lossless_spec('webp')              # ('WEBP', {'lossless': True, ...})
+    store.put(img, prefix, format, **params)
+"""
+import sys
+from functools import lru_cache
+from typing import Dict, Tuple
+
+
+OUTPUT_FORMATS = ('jpeg', 'webp')
+
+# WebP 编码力度（0 最快 ~ 6 最小，4 为 Pillow 默认）
+WEBP_METHOD = 4
+# 无损 WebP 的压缩力度（0~100，越大越慢越小）
+WEBP_LOSSLESS_EFFORT = 80
+
+
+@lru_cache(maxsize=1)
+def webp_available() -> bool:
+    """Pillow 是否支持 WebP 编码"""
+    try:
+        from PIL import features
+        return bool(features.check('webp'))
+    except Exception:
+        return False
+
+
+def resolve_format(name: str) -> str:
+    """规范化格式名（未知格式或不支持 WebP 时回退到 jpeg）"""
+    name = (name or 'jpeg').lower()
+    if name not in OUTPUT_FORMATS:
+        return 'jpeg'
+    if name == 'webp' and not webp_available():
+        _warn_no_webp()
+        return 'jpeg'
+    return name
+
+
+@lru_cache(maxsize=1)
+def _warn_no_webp():
+    print("  ⚠️  Pillow 不支持 WebP 编码，截图改用 JPEG/PNG", file=sys.stderr)
+
+
+def lossy_spec(name: str, quality: int) -> Tuple[str, Dict]:
+    """
+    有损编码参数（压缩截图、网格 / SoM 标注图）
+
+    Returns:
+        (PIL 格式名, Image.save 参数)
+    """
+    if resolve_format(name) == 'webp':
+        return 'WEBP', {'quality': quality, 'method': WEBP_METHOD}
+    return 'JPEG', {'quality': quality}
+
+
+def lossless_spec(name: str) -> Tuple[str, Dict]:
+    """
+    无损编码参数（局部裁剪、原图）
+
+    Returns:
+        (PIL 格式名, Image.save 参数)
+    """
+    if resolve_format(name) == 'webp':
+        return 'WEBP', {'lossless': True, 'quality': WEBP_LOSSLESS_EFFORT, 'method': WEBP_METHOD}
+    return 'PNG', {}
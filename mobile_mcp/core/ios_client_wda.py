@@ -7,12 +7,15 @@ iOS客户端 - WDA版本（已重构，使用统一管理器）
 1. iOS设备连接管理
 2. 基础的WDA操作
 3. 截图、点击、元素列表等功能已移至统一管理器
+4. 本地定位：一次 source 解析出页面索引，所有定位策略在本地解析，按坐标点击
 """
 
+import sys
 import time
 import re
 from typing import Dict, Optional, List
 from .ios_device_manager_wda import IOSDeviceManagerWDA
+from ..utils.ios_tree import IOSPageIndex, IOSElement
 
 
 class IOSClientWDA:
@@ -42,6 +45,10 @@ class IOSClientWDA:
         self._snapshot_cache = None
         self._cache_timestamp = 0
         self._cache_ttl = 1  # 缓存1秒
+        
+        # 页面索引（与 source 缓存同步，同一份 source 只解析一次）
+        self._page_index: Optional[IOSPageIndex] = None
+        self._page_index_source = None
     
     def _connect_wda(self):
         """连接WDA服务"""
@@ -99,6 +106,44 @@ class IOSClientWDA:
         except Exception as e:
             raise RuntimeError(f"获取页面源码失败: {e}")
     
+    def invalidate_page_source(self):
+        """界面操作后使页面源码缓存失效"""
+        self._snapshot_cache = None
+        self._cache_timestamp = 0
+    
+    def get_page_index(self) -> IOSPageIndex:
+        """获取页面索引（共享 get_page_source 的 1 秒缓存）"""
+        source = self.get_page_source()
+        if self._page_index is None or self._page_index_source is not source:
+            self._page_index = IOSPageIndex.from_source(source)
+            self._page_index_source = source
+        return self._page_index
+    
+    def resolve_elements(self, locator: str) -> List[IOSElement]:
+        """
+        本地解析定位器（accessibility id -> name -> class name），只访问一次 source
+        
+        Args:
+            locator: 定位器
+            
+        Returns:
+            中心点在窗口内的元素列表，visible 的优先（可直接按坐标点击）
+        """
+        page = self.get_page_index()
+        return page.tappable(page.resolve(locator))
+    
+    def resolve_text(self, text: str, exact: bool = True) -> List[IOSElement]:
+        """本地文本查找（name / label / value），只返回中心点在窗口内的元素，visible 的优先"""
+        page = self.get_page_index()
+        return page.tappable(page.find_text(text, exact))
+    
+    def tap_element(self, element: IOSElement) -> None:
+        """按元素中心坐标点击，并使页面源码缓存失效"""
+        self._ensure_connected()
+        x, y = element.center
+        self.wda.tap(x, y)
+        self.invalidate_page_source()
+    
     def get_screen_size(self) -> tuple:
         """获取屏幕尺寸"""
         self._ensure_connected()
@@ -184,7 +229,7 @@ class IOSClientWDA:
             return (0, 0)
     
     def find_element(self, locator: str):
-        """查找元素（增强版）"""
+        """查找元素（增强版，返回 WDA 元素对象；只需点击时用 resolve_elements）"""
         self._ensure_connected()
         
         try:
@@ -217,7 +262,7 @@ class IOSClientWDA:
             return None
     
     def find_elements(self, locator: str) -> List:
-        """查找多个元素"""
+        """查找多个元素（返回 WDA 元素对象；只需点击时用 resolve_elements，只访问一次设备）"""
         self._ensure_connected()
         
         try:
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按字节预算编码 JPEG - 自动选择质量和缩放
+
+功能：
+1. 调用方给出目标字节数，在 (质量, 缩放) 上搜索不超过预算的最高质量编码
+2. 先在当前缩放下搜索质量（倍增步长试探后二分，每步一次编码，720px 宽约 5ms）；
+   最低质量仍超预算时再缩小一档重新搜索
+3. 记住上一屏选中的设置作为起点：页面类型不变时通常一两次编码即可命中；
+   起点只是提示，上一屏缩小过时会逐档向上试探，直到大一档放不下为止
+4. 返回编码结果和选中的设置，供响应中报告
+5. 线程安全：多个工作线程可共用一个实例（只有 _last 是共享状态，加锁读写）
+
+用法:
+    encoder = JPEGBudgetEncoder()
+    result = encoder.encode(img, max_bytes=80_000)
+    result.data, result.quality, result.size, result.scale
+"""
+import io
+import threading
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+from mobile_mcp.core.image_resize import resize_image
+
+
+class BudgetResult:
+    """预算编码结果"""
+
+    __slots__ = ('data', 'quality', 'size', 'scale', 'attempts', 'budget_met')
+
+    def __init__(self, data: bytes, quality: int, size: Tuple[int, int], scale: float,
+                 attempts: int, budget_met: bool):
+        self.data = data
+        self.quality = quality
+        self.size = size
+        self.scale = scale
+        self.attempts = attempts
+        self.budget_met = budget_met
+
+
+class JPEGBudgetEncoder:
+    """按字节预算搜索 JPEG 质量与缩放"""
+
+    # 缩放档位（相对于 max_width 限制后的尺寸）
+    SCALES = (1.0, 0.85, 0.7, 0.55, 0.4)
+
+    def __init__(self, min_quality: int = 30, max_quality: int = 90, resize_mode: str = 'lanczos'):
+        """
+        Args:
+            min_quality: 最低质量（低于此值文字难以辨认）
+            max_quality: 最高质量
+            resize_mode: 默认缩放模式（见 image_resize），encode 可按次指定
+        """
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.resize_mode = resize_mode
+        # 上一屏选中的 (质量, 缩放档位下标)
+        self._last: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(image: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=quality)
+        return buffer.getvalue()
+
+    def _scaled(self, image: Image.Image, scale_index: int, cache: List, resize_mode: str) -> Image.Image:
+        if cache[scale_index] is None:
+            scale = self.SCALES[scale_index]
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            cache[scale_index] = resize_image(image, size, resize_mode)
+        return cache[scale_index]
+
+    def _search(self, image: Image.Image, max_bytes: int, start: int) -> Tuple[Optional[Tuple[int, bytes]], int]:
+        """
+        从 start 出发搜索不超预算的最高质量
+
+        步长 1, 2, 4, 8... 向可行方向试探，找到边界后在区间内二分；
+        起点就是上一屏的结果时通常两次编码即可确认
+
+        Returns:
+            ((质量, 数据) 或 None, 编码次数)
+        """
+        start = min(self.max_quality, max(self.min_quality, start))
+        attempts = 1
+        data = self._encode(image, start)
+        step = 1
+        if len(data) <= max_bytes:
+            # 向上试探：best 可行，high 之上不可行
+            best, high = (start, data), self.max_quality
+            while best[0] < high:
+                probe = min(high, best[0] + step)
+                data = self._encode(image, probe)
+                attempts += 1
+                if len(data) > max_bytes:
+                    high = probe - 1
+                    break
+                best, step = (probe, data), step * 2
+        else:
+            # 向下试探：找到第一个可行质量，high 为已知不可行值减一
+            best, high = None, start - 1
+            while high >= self.min_quality:
+                probe = max(self.min_quality, high - step + 1)
+                data = self._encode(image, probe)
+                attempts += 1
+                if len(data) <= max_bytes:
+                    best = (probe, data)
+                    break
+                high, step = probe - 1, step * 2
+            if best is None:
+                return None, attempts
+
+        # 在 (best, high] 内二分
+        low = best[0] + 1
+        while low <= high:
+            mid = (low + high) // 2
+            data = self._encode(image, mid)
+            attempts += 1
+            if len(data) <= max_bytes:
+                best, low = (mid, data), mid + 1
+            else:
+                high = mid - 1
+        return best, attempts
+
+    def encode(self, image: Image.Image, max_bytes: int, resize_mode: Optional[str] = None) -> BudgetResult:
+        """
+        在预算内以尽量高的质量编码
+
+        Args:
+            image: 已限制到 max_width 的 RGB 图片
+            max_bytes: 字节预算
+            resize_mode: 缩放模式，None 使用构造时的默认值
+
+        Returns:
+            BudgetResult；最小缩放 + 最低质量仍超预算时返回该最小结果（budget_met=False）
+        """
+        resize_mode = resize_mode or self.resize_mode
+        with self._lock:
+            quality, scale_index = self._last or (75, 0)
+        scaled: List[Optional[Image.Image]] = [None] * len(self.SCALES)
+        attempts = 0
+
+        # 上一屏用了缩小档位：页面可能变简单了，大一档在最低质量下放得下就继续向上
+        while scale_index > 0:
+            data = self._encode(self._scaled(image, scale_index - 1, scaled, resize_mode), self.min_quality)
+            attempts += 1
+            if len(data) > max_bytes:
+                break
+            scale_index -= 1
+            quality = self.min_quality
+
+        # 当前档位搜索质量，最低质量都超预算时逐档缩小
+        best = None
+        for index in range(scale_index, len(self.SCALES)):
+            img = self._scaled(image, index, scaled, resize_mode)
+            best, count = self._search(img, max_bytes, quality if index == scale_index else self.min_quality)
+            attempts += count
+            scale_index = index
+            if best is not None:
+                break
+
+        budget_met = best is not None
+        if best is None:
+            # 最小档位 + 最低质量仍超预算：返回最小的结果
+            best = (self.min_quality, self._encode(img, self.min_quality))
+            attempts += 1
+
+        quality, data = best
+        with self._lock:
+            self._last = (quality, scale_index)
+        return BudgetResult(data, quality, img.size, self.SCALES[scale_index], attempts, budget_met)
@@ -11,6 +11,8 @@
 
 import asyncio
 import re
+import sys
+import time
 from typing import Dict, Optional
 
 
@@ -45,7 +47,8 @@ class ClickManager:
         if method == 'text':
             return self.click_by_text(kwargs.get('text'), 
                                     position=kwargs.get('position'),
-                                    verify=kwargs.get('verify'))
+                                    verify=kwargs.get('verify'),
+                                    pruned=kwargs.get('pruned', False))
         elif method == 'id':
             return self.click_by_id(kwargs.get('resource_id'),
                                   index=kwargs.get('index', 0))
@@ -65,32 +68,33 @@ class ClickManager:
             return {"success": False, "message": f"❌ 不支持的点击方式: {method}"}
     
     def click_by_text(self, text: str, timeout: float = 3.0, position: Optional[str] = None, 
-                       verify: Optional[str] = None) -> Dict:
-        """通过文本点击 - 统一实现"""
+                       verify: Optional[str] = None, pruned: bool = False) -> Dict:
+        """通过文本点击 - 统一实现（pruned: Android 使用精简层级查找）"""
         try:
             if self._is_ios():
                 return self._click_by_text_ios(text, timeout, position, verify)
             else:
-                return self._click_by_text_android(text, timeout, position, verify)
+                return self._click_by_text_android(text, timeout, position, verify, pruned)
         except Exception as e:
             return {"success": False, "message": f"❌ 文本点击失败: {e}"}
     
-    def _click_by_text_android(self, text: str, timeout: float, position: Optional[str], verify: Optional[str]) -> Dict:
+    def _click_by_text_android(self, text: str, timeout: float, position: Optional[str], verify: Optional[str],
+                               pruned: bool = False) -> Dict:
         """Android文本点击实现"""
         try:
-            # 1. 获取页面XML
-            xml_string = self.client.u2.dump_hierarchy(compressed=False)
+            # 1. 获取UI树（共享层级缓存，同一版本只 dump 并解析一次）
+            tree = self.client.hierarchy_cache.get_tree(pruned=pruned)
             
             # 2. 查找匹配的元素
             matching_elements = []
             
             # 精确匹配
-            for elem in self._find_elements_by_text(xml_string, text, exact=True):
+            for elem in self._find_elements_by_text(tree, text, exact=True):
                 matching_elements.append(elem)
             
             # 如果精确匹配没有结果，尝试模糊匹配
             if not matching_elements:
-                for elem in self._find_elements_by_text(xml_string, text, exact=False):
+                for elem in self._find_elements_by_text(tree, text, exact=False):
                     matching_elements.append(elem)
             
             if not matching_elements:
@@ -118,6 +122,7 @@ class ClickManager:
             y = (target_element['y1'] + target_element['y2']) // 2
             
             self.client.u2.click(x, y)
+            self.client.invalidate_hierarchy('click')
             
             # 5. 验证（如果指定了verify）
             if verify:
@@ -134,38 +139,44 @@ class ClickManager:
             return {"success": False, "message": f"❌ Android文本点击失败: {e}"}
     
     def _click_by_text_ios(self, text: str, timeout: float, position: Optional[str], verify: Optional[str]) -> Dict:
-        """iOS文本点击实现"""
+        """iOS文本点击实现（一次 source 本地定位，按坐标点击）"""
         try:
             ios_client = self._get_ios_client()
             if not ios_client:
                 return {"success": False, "message": "❌ iOS客户端未初始化"}
             
-            # iOS使用WDA的文本查找
-            elements = ios_client.wda.find_elements_by_name(text)
+            # 本地索引查找：先精确匹配，没有结果再模糊匹配
+            elements = ios_client.resolve_text(text, exact=True)
+            if not elements:
+                elements = ios_client.resolve_text(text, exact=False)
             
             if not elements:
                 return {"success": False, "message": f"❌ 未找到文本: {text}"}
             
-            # 处理位置参数
+            # 处理位置参数（有坐标，与 Android 规则一致）
             target_element = None
             if position and len(elements) > 1:
-                # 根据位置选择元素（简化实现）
                 if position == 'top':
-                    target_element = elements[0]
+                    target_element = min(elements, key=lambda e: e.y)
                 elif position == 'bottom':
-                    target_element = elements[-1]
+                    target_element = max(elements, key=lambda e: e.y)
+                elif position == 'left':
+                    target_element = min(elements, key=lambda e: e.x)
+                elif position == 'right':
+                    target_element = max(elements, key=lambda e: e.x)
                 else:
                     target_element = elements[0]
             else:
                 target_element = elements[0]
             
-            # 点击元素
-            target_element.click()
+            # 按坐标点击
+            ios_client.tap_element(target_element)
+            self.client.invalidate_hierarchy('click')
             
             # 验证
             if verify:
-                asyncio.sleep(0.5)
-                verify_elements = ios_client.wda.find_elements_by_name(verify)
+                time.sleep(0.5)
+                verify_elements = ios_client.resolve_text(verify, exact=False)
                 if verify_elements:
                     return {"success": True, "message": f"✅ 点击成功并验证到文本: {verify}"}
                 else:
@@ -189,9 +200,27 @@ class ClickManager:
     def _click_by_id_android(self, resource_id: str, index: int) -> Dict:
         """Android ID点击实现"""
         try:
-            # 标准化resource-id
+            # 标准化resource-id（简写补全为当前应用的包名，不匹配其他应用 / 输入法的同名 ID）
             normalized_id = self._normalize_resource_id(resource_id)
             
+            # 先查共享UI树的倒排索引：命中则直接按坐标点击，省去 selector 的多次 RPC
+            try:
+                tree = self.client.hierarchy_cache.get_tree()
+                matched = [node for node in tree.find(tree.index.find_id(normalized_id, suffix=False))
+                           if node.has_bounds]
+            except Exception as e:
+                print(f"  ⚠️  UI树获取失败，改用 selector 查找: {e}", file=sys.stderr)
+                matched = []
+            if matched:
+                if index >= len(matched):
+                    return {"success": False, "message": f"❌ 索引超出范围: {index} >= {len(matched)}"}
+                target = matched[index]
+                x, y = target.center
+                self.client.u2.click(x, y)
+                self.client.invalidate_hierarchy('click')
+                return {"success": True, "message": f"✅ ID点击成功: {normalized_id}[{index}]"}
+            
+            # 索引未命中（元素可能还没出现），回退到 selector 等待
             # 查找元素
             elements = self.client.u2(resourceId=normalized_id)
             if not elements.exists(timeout=2):
@@ -204,6 +233,7 @@ class ClickManager:
             
             target_element = all_elements[index]
             target_element.click()
+            self.client.invalidate_hierarchy('click')
             
             return {"success": True, "message": f"✅ ID点击成功: {normalized_id}[{index}]"}
             
@@ -217,17 +247,8 @@ class ClickManager:
             if not ios_client:
                 return {"success": False, "message": "❌ iOS客户端未初始化"}
             
-            # iOS使用不同的属性名
-            elements = []
-            try:
-                # 尝试多种定位方式
-                elements = ios_client.wda.find_elements_by_accessibility_id(resource_id)
-                if not elements:
-                    elements = ios_client.wda.find_elements_by_name(resource_id)
-                if not elements:
-                    elements = ios_client.wda.find_elements_by_class_name(resource_id)
-            except:
-                pass
+            # 本地解析定位器（accessibility id -> name -> class name），只访问一次 source
+            elements = ios_client.resolve_elements(resource_id)
             
             if not elements:
                 return {"success": False, "message": f"❌ 未找到元素: {resource_id}"}
@@ -236,7 +257,8 @@ class ClickManager:
                 return {"success": False, "message": f"❌ 索引超出范围: {index} >= {len(elements)}"}
             
             target_element = elements[index]
-            target_element.click()
+            ios_client.tap_element(target_element)
+            self.client.invalidate_hierarchy('click')
             
             return {"success": True, "message": f"✅ iOS元素点击成功: {resource_id}[{index}]"}
             
@@ -260,6 +282,7 @@ class ClickManager:
                 ios_client.wda.tap(final_x, final_y)
             else:
                 self.client.u2.click(final_x, final_y)
+            self.client.invalidate_hierarchy('click')
             
             return {"success": True, "message": f"✅ 坐标点击成功: ({final_x}, {final_y})"}
             
@@ -290,6 +313,7 @@ class ClickManager:
                 ios_client.wda.tap(x, y)
             else:
                 self.client.u2.click(x, y)
+            self.client.invalidate_hierarchy('click')
             
             return {"success": True, "message": f"✅ 百分比点击成功: ({x_percent}%, {y_percent}%) -> ({x}, {y})"}
             
@@ -316,50 +340,25 @@ class ClickManager:
                 ios_client.wda.tap(x, y)
             else:
                 self.client.u2.click(x, y)
+            self.client.invalidate_hierarchy('click')
             
             return {"success": True, "message": f"✅ SoM点击成功: #{index}"}
             
         except Exception as e:
             return {"success": False, "message": f"❌ SoM点击失败: {e}"}
     
-    def _find_elements_by_text(self, xml_string: str, text: str, exact: bool = True) -> list:
-        """从XML中查找包含指定文本的元素"""
+    def _find_elements_by_text(self, tree, text: str, exact: bool = True) -> list:
+        """从UI树中查找包含指定文本的元素（走倒排索引，不随页面大小线性扫描）"""
         elements = []
-        try:
-            import xml.etree.ElementTree as ET
-            root = ET.fromstring(xml_string)
-            
-            def search_node(node):
-                elem_text = node.get('text', '')
-                desc = node.get('content-desc', '')
-                
-                found = False
-                if exact:
-                    if elem_text == text or desc == text:
-                        found = True
-                else:
-                    if text in elem_text or text in desc:
-                        found = True
-                
-                if found:
-                    bounds_str = node.get('bounds', '')
-                    if bounds_str:
-                        match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds_str)
-                        if match:
-                            x1, y1, x2, y2 = map(int, match.groups())
-                            elements.append({
-                                'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
-                                'text': elem_text,
-                                'desc': desc
-                            })
-                
-                # 递归搜索子节点
-                for child in node:
-                    search_node(child)
-            
-            search_node(root)
-        except Exception:
-            pass
+        for node in tree.find(tree.index.find_text(text, exact=exact)):
+            if not node.has_bounds:
+                continue
+            x1, y1, x2, y2 = node.bounds
+            elements.append({
+                'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                'text': node.text,
+                'desc': node.content_desc
+            })
         
         return elements
     
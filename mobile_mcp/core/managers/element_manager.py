@@ -32,12 +32,14 @@ class ElementManager:
             return self.client.wda
         return None
     
-    def list_elements(self, max_elements: int = 100, filter_interactive: bool = True) -> List[Dict]:
+    def list_elements(self, max_elements: int = 100, filter_interactive: bool = True,
+                      pruned: bool = False) -> List[Dict]:
         """统一元素列表接口
         
         Args:
             max_elements: 最大返回元素数量
             filter_interactive: 是否只返回可交互元素
+            pruned: 是否使用精简层级（仅 Android：压缩 dump，去掉不可见节点、折叠布局链）
         
         Returns:
             元素列表
@@ -46,80 +48,30 @@ class ElementManager:
             if self._is_ios():
                 return self._list_elements_ios(max_elements, filter_interactive)
             else:
-                return self._list_elements_android(max_elements, filter_interactive)
+                return self._list_elements_android(max_elements, filter_interactive, pruned)
         except Exception as e:
             return [{"error": f"❌ 获取元素列表失败: {e}"}]
     
-    def _list_elements_android(self, max_elements: int, filter_interactive: bool) -> List[Dict]:
+    def _list_elements_android(self, max_elements: int, filter_interactive: bool,
+                               pruned: bool = False) -> List[Dict]:
         """Android元素列表实现"""
         try:
-            # 获取XML
-            xml_string = self.client.u2.dump_hierarchy(compressed=False)
-            if not xml_string:
-                return []
-            
-            root = ET.fromstring(xml_string)
+            # 获取UI树（共享层级缓存，同一版本只 dump 并解析一次）
+            tree = self.client.hierarchy_cache.get_tree(pruned=pruned)
             elements = []
             
-            def parse_node(node, depth=0):
-                if depth > 20 or len(elements) >= max_elements:  # 限制深度和数量
-                    return
-                
-                # 提取属性
-                text = node.get('text', '').strip()
-                resource_id = node.get('resource-id', '')
-                class_name = node.get('class', '')
-                content_desc = node.get('content-desc', '').strip()
-                bounds_str = node.get('bounds', '')
-                clickable = node.get('clickable', 'false') == 'true'
-                focusable = node.get('focusable', 'false') == 'true'
-                enabled = node.get('enabled', 'true') == 'true'
+            # 先序遍历，深度超过 20 的子树整体跳过
+            for node in tree.nodes(max_depth=20):
+                if len(elements) >= max_elements:  # 限制数量
+                    break
                 
-                # 过滤条件
+                # 过滤条件：只保留可交互或有意义的元素
                 if filter_interactive:
-                    # 只保留可交互或有意义的元素
-                    if not (clickable or focusable or text or resource_id or content_desc):
-                        # 递归处理子节点
-                        for child in node:
-                            parse_node(child, depth + 1)
-                        return
-                
-                # 解析bounds
-                x, y, width, height = 0, 0, 0, 0
-                if bounds_str:
-                    match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds_str)
-                    if match:
-                        x1, y1, x2, y2 = map(int, match.groups())
-                        x, y = x1, y1
-                        width, height = x2 - x1, y2 - y1
-                
-                # 简化类名
-                class_name_simple = class_name.split('.')[-1] if class_name else ''
-                
-                # 构建元素信息
-                element = {
-                    'text': text,
-                    'resource-id': resource_id,
-                    'class': class_name_simple,
-                    'content-desc': content_desc,
-                    'bounds': bounds_str,
-                    'x': x,
-                    'y': y,
-                    'width': width,
-                    'height': height,
-                    'clickable': clickable,
-                    'focusable': focusable,
-                    'enabled': enabled,
-                    'depth': depth
-                }
+                    if not (node.clickable or node.focusable or node.text.strip()
+                            or node.resource_id or node.content_desc.strip()):
+                        continue
                 
-                elements.append(element)
-                
-                # 递归处理子节点
-                for child in node:
-                    parse_node(child, depth + 1)
-            
-            parse_node(root)
+                elements.append(self._node_to_element(node))
             
             # 智能排序：可交互元素优先，然后是有文本的元素
             elements.sort(key=lambda e: (
@@ -134,6 +86,43 @@ class ElementManager:
         except Exception as e:
             return [{"error": f"❌ Android元素解析失败: {e}"}]
     
+    def _node_to_element(self, node) -> Dict:
+        """UI树节点 -> 元素信息字典（list_elements 的输出格式）"""
+        x, y, width, height = 0, 0, 0, 0
+        if node.has_bounds:
+            x1, y1, x2, y2 = node.bounds
+            x, y = x1, y1
+            width, height = x2 - x1, y2 - y1
+        
+        return {
+            'text': node.text.strip(),
+            'resource-id': node.resource_id,
+            'class': node.short_class,
+            'content-desc': node.content_desc.strip(),
+            'bounds': node.bounds_str,
+            'x': x,
+            'y': y,
+            'width': width,
+            'height': height,
+            'clickable': node.clickable,
+            'focusable': node.focusable,
+            'enabled': node.enabled,
+            'depth': node.depth
+        }
+    
+    def _find_indexed_android(self, tree, node_indexes: List[int]) -> Optional[Dict]:
+        """从索引命中的节点中按 list_elements 的排序规则取第一个"""
+        candidates = [self._node_to_element(node) for node in tree.find(node_indexes)
+                      if node.depth <= 20]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda e: (
+            not e.get('clickable', False),
+            not e.get('focusable', False),
+            not bool(e.get('text', '')),
+            e.get('depth', 0)
+        ))
+    
     def _list_elements_ios(self, max_elements: int, filter_interactive: bool) -> List[Dict]:
         """iOS元素列表实现"""
         try:
@@ -145,8 +134,8 @@ class ElementManager:
             elements = []
             
             try:
-                # 方法1：使用WDA的source
-                source = ios_client.wda.source()
+                # 方法1：使用WDA的source（共享 get_page_source 的 1 秒缓存）
+                source = ios_client.get_page_source()
                 if source:
                     root = ET.fromstring(source)
                     elements = self._parse_ios_elements(root, max_elements, filter_interactive)
@@ -290,8 +279,13 @@ class ElementManager:
                 'type': elem_type
             }
     
-    def find_element_by_text(self, text: str, exact: bool = False) -> Optional[Dict]:
-        """根据文本查找元素"""
+    def find_element_by_text(self, text: str, exact: bool = False, pruned: bool = False) -> Optional[Dict]:
+        """根据文本查找元素（pruned 仅对 Android 生效）"""
+        if not self._is_ios():
+            # Android 走共享UI树的倒排索引
+            tree = self.client.hierarchy_cache.get_tree(pruned=pruned)
+            return self._find_indexed_android(tree, tree.index.find_text_lower(text, exact=exact))
+        
         elements = self.list_elements(filter_interactive=False)
         
         for elem in elements:
@@ -310,8 +304,13 @@ class ElementManager:
         
         return None
     
-    def find_element_by_id(self, resource_id: str) -> Optional[Dict]:
-        """根据resource-id查找元素"""
+    def find_element_by_id(self, resource_id: str, pruned: bool = False) -> Optional[Dict]:
+        """根据resource-id查找元素（pruned 仅对 Android 生效）"""
+        if not self._is_ios():
+            # Android 走共享UI树的倒排索引
+            tree = self.client.hierarchy_cache.get_tree(pruned=pruned)
+            return self._find_indexed_android(tree, tree.index.find_id(resource_id))
+        
         elements = self.list_elements(filter_interactive=False)
         
         for elem in elements:
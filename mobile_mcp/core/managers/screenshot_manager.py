@@ -7,13 +7,25 @@
 1. 统一截图接口
 2. 自动平台检测
 3. 支持压缩、网格、SoM等所有截图模式
+4. 截图以内存帧（ScreenFrame）流转，只有最终产物写盘（可选后台写入）
 """
 
+import os
+import sys
 import time
 import re
 from pathlib import Path
 from typing import Dict, Optional
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from mobile_mcp.core.screen_frame import ScreenFrame
+from mobile_mcp.core.screenshot_dedup import ScreenshotDedupCache
+from mobile_mcp.core.screenshot_store import ScreenshotStore
+from mobile_mcp.core.image_resize import resize_image
+from mobile_mcp.core.overlay_cache import GRID_RGB, get_font, grid_overlay
+from mobile_mcp.core.som_renderer import render_som
+from mobile_mcp.core.jpeg_budget import JPEGBudgetEncoder
+from mobile_mcp.core.image_formats import lossless_spec, lossy_spec, resolve_format
 
 
 class ScreenshotManager:
@@ -26,6 +38,16 @@ class ScreenshotManager:
         project_root = Path(__file__).parent.parent.parent
         self.screenshot_dir = project_root / "screenshots"
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+        # 内容寻址存储（容量 / 时长预算，后台 LRU 淘汰）
+        self.store = ScreenshotStore.for_directory(self.screenshot_dir)
+        
+        # 最终产物是否在后台线程写盘（返回时文件可能尚未写完，默认关闭）
+        self.background_save = os.environ.get('SCREENSHOT_BACKGROUND_SAVE', 'false').lower() in ['true', '1', 'yes']
+        
+        # 截图去重：画面未变化时复用上次的文件（DynamicConfig.screenshot_dedup 控制）
+        self.dedup_cache = ScreenshotDedupCache()
+        # 按字节预算编码（记住上一屏的质量 / 缩放作为起点）
+        self.jpeg_budget = JPEGBudgetEncoder()
     
     def _is_ios(self) -> bool:
         """判断当前是否为 iOS 平台"""
@@ -39,53 +61,155 @@ class ScreenshotManager:
             return self.client.wda
         return None
     
-    def _take_raw_screenshot(self, filepath: str) -> tuple:
-        """获取原始截图（统一接口）"""
+    def _grab_screen(self) -> ScreenFrame:
+        """从设备抓取一帧截图（解码一次）和屏幕尺寸"""
+        if not self._is_ios():
+            # Android 由 ScreenCapture 按配置选择后端（u2 / raw）
+            return self.client.screen_capture.capture()
+        
+        ios_client = self._get_ios_client()
+        if not (ios_client and hasattr(ios_client, 'wda')):
+            raise RuntimeError("iOS客户端未初始化")
+        captured_at = time.time()
+        image = ios_client.wda.screenshot()
+        size = ios_client.wda.window_size()
+        return ScreenFrame.from_image(image, size[0], size[1], captured_at)
+    
+    def capture_frame(self, use_stream: bool = True) -> ScreenFrame:
+        """获取一帧内存截图（统一接口）
+        
+        同一页面版本的并发截图请求（如 SoM + 弹窗检测）合并为一次设备调用，
+        各调用方共享同一帧（帧只读，绘制时自动复制）
+        
+        屏幕流开启时直接取最近一次操作之后到达的最新帧，等不到再单次抓取
+        
+        Args:
+            use_stream: 是否允许使用屏幕流帧（局部裁剪需要原始分辨率，不走屏幕流）
+        """
+        frame = self._frame_from_stream() if use_stream else None
+        if frame is not None:
+            return frame
         try:
-            screen_width, screen_height = 0, 0
-            
-            if self._is_ios():
-                ios_client = self._get_ios_client()
-                if ios_client and hasattr(ios_client, 'wda'):
-                    ios_client.wda.screenshot(filepath)
-                    size = ios_client.wda.window_size()
-                    screen_width, screen_height = size[0], size[1]
-                else:
-                    raise RuntimeError("iOS客户端未初始化")
-            else:
-                self.client.u2.screenshot(filepath)
-                info = self.client.u2.info
-                screen_width = info.get('displayWidth', 0)
-                screen_height = info.get('displayHeight', 0)
-            
-            return screen_width, screen_height
+            key = ('screenshot', self.client.hierarchy_cache.version)
+            return self.client.single_flight.do(key, self._grab_screen)
         except Exception as e:
             raise RuntimeError(f"截图失败: {e}")
     
+    def _frame_from_stream(self) -> Optional[ScreenFrame]:
+        """从屏幕流取帧（未开启 / 启动失败 / 超时返回 None）"""
+        stream = getattr(self.client, 'screen_stream', None)
+        if stream is None:
+            return None
+        if not stream.active:
+            # 启动失败过（如缺少 ffmpeg）不再重试
+            if stream.error or not stream.start():
+                return None
+        frame = stream.wait_for_frame(after=self.client.hierarchy_cache.last_action_time)
+        if frame is not None and not self._is_ios() and frame.size != (frame.screen_width, frame.screen_height):
+            # Android 的 SoM / 网格 / 裁剪直接使用屏幕坐标，尺寸不一致的帧（MJPEG 缩放、旋转）不能用
+            if not getattr(self, '_stream_size_warned', False):
+                self._stream_size_warned = True
+                print(f"  ⚠️  屏幕流帧尺寸 {frame.size} 与屏幕 {frame.screen_width}x{frame.screen_height} 不一致，"
+                      f"改用单次截图", file=sys.stderr)
+            return None
+        return frame
+    
+    def _capture_region(self, center_x: int, center_y: int, size: int):
+        """设备端区域抓取（仅 Android）；不可用时返回 None，由调用方整帧抓取后裁剪"""
+        if self._is_ios():
+            return None
+        capture = self.client.screen_capture
+        if not capture.region_available:
+            return None
+        try:
+            return capture.capture_region(center_x, center_y, size)
+        except Exception as e:
+            print(f"  ⚠️  区域截图失败，改为整帧裁剪: {e}", file=sys.stderr)
+            return None
+    
+    def _take_raw_screenshot(self, filepath: str) -> tuple:
+        """获取原始截图并保存到 filepath（兼容接口），返回屏幕尺寸"""
+        frame = self.capture_frame()
+        frame.save(filepath)
+        return frame.screen_width, frame.screen_height
+    
+    def _save_final(self, img: Image.Image, prefix: str, format: str, **params) -> Path:
+        """写入最终产物（内容寻址命名；background_save 开启时在后台线程写盘）"""
+        work_pool = getattr(self.client, 'work_pool', None)
+        return self.store.put(img, prefix, format, background=self.background_save,
+                              run_cpu=work_pool.run_cpu if work_pool else None, **params)
+    
+    @staticmethod
+    def _file_prefix(base: str, description: str = "") -> str:
+        """文件名前缀（描述只保留字母数字，内容摘要由存储追加）"""
+        if not description:
+            return base
+        safe_desc = re.sub(r'[^\w\s-]', '', description).strip().replace(' ', '_')
+        return f"{base}_{safe_desc}" if safe_desc else base
+    
+    def _dedup_enabled(self) -> bool:
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            return DynamicConfig.screenshot_dedup
+        except ImportError:
+            return True
+    
+    def _resize_mode(self) -> str:
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            return DynamicConfig.screenshot_resize
+        except ImportError:
+            return 'lanczos'
+    
+    def _output_format(self) -> str:
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            return resolve_format(DynamicConfig.screenshot_format)
+        except ImportError:
+            return 'jpeg'
+    
+    def _dedup_store(self, key, frame_hash: Optional[int], action_count: int, result: Dict) -> Dict:
+        """记录新产物并标记未命中"""
+        if frame_hash is not None:
+            self.dedup_cache.store(key, frame_hash, result, action_count)
+        result["cache_hit"] = False
+        return result
+    
     def take_screenshot(self, description: str = "", compress: bool = True, 
                         max_width: int = 720, quality: int = 75,
-                        crop_x: int = 0, crop_y: int = 0, crop_size: int = 0) -> Dict:
-        """统一截图接口（支持压缩和局部裁剪）"""
+                        crop_x: int = 0, crop_y: int = 0, crop_size: int = 0,
+                        max_bytes: int = 0) -> Dict:
+        """统一截图接口（支持压缩和局部裁剪）
+        
+        输出格式由 DynamicConfig.screenshot_format 决定（jpeg: JPEG / PNG，webp: 有损 / 无损 WebP）
+        
+        Args:
+            max_bytes: 压缩截图的字节预算，> 0 时自动选择 JPEG 质量和缩放（忽略 quality，始终输出 JPEG）
+        """
         try:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
             platform = "ios" if self._is_ios() else "android"
+            output_format = self._output_format()
+            # 截图开始前的界面操作计数：之后发生过界面操作则不复用去重结果
+            # （不用 hierarchy_cache.version：每次层级 dump 都会递增）
+            action_count = self.client.hierarchy_cache.invalidations
             
-            # 第1步：截图保存为临时 PNG
-            temp_filename = f"temp_{timestamp}.png"
-            temp_path = self.screenshot_dir / temp_filename
-            
-            # 获取屏幕尺寸并截图
-            screen_width, screen_height = self._take_raw_screenshot(str(temp_path))
-            original_size = temp_path.stat().st_size
-            
-            # 第2步：打开图片
-            img = Image.open(temp_path)
-            
-            # 第2.5步：局部裁剪（如果指定了裁剪参数）
             crop_offset_x, crop_offset_y = 0, 0
             is_cropped = False
+            crop_requested = crop_x > 0 and crop_y > 0 and crop_size > 0
             
-            if crop_x > 0 and crop_y > 0 and crop_size > 0:
+            # 第1步：截图（内存帧，不落临时文件）；局部截图优先只传输区域所在的行
+            region = self._capture_region(crop_x, crop_y, crop_size) if crop_requested else None
+            if region is not None:
+                frame, crop_offset_x, crop_offset_y = region
+                img = frame.pil
+                is_cropped = True
+            else:
+                # 局部裁剪按屏幕坐标取原始分辨率像素，不使用屏幕流帧
+                frame = self.capture_frame(use_stream=not crop_requested)
+                img = frame.pil
+            
+            # 第2步：局部裁剪（如果指定了裁剪参数）
+            if crop_requested and not is_cropped:
                 # 计算裁剪区域（以 crop_x, crop_y 为中心）
                 half_size = crop_size // 2
                 left = max(0, crop_x - half_size)
@@ -97,35 +221,41 @@ class ScreenshotManager:
                 crop_offset_x = left
                 crop_offset_y = top
                 
-                # 裁剪
-                img = img.crop((left, top, right, bottom))
+                # 裁剪（numpy 切片）
+                frame = frame.crop((left, top, right, bottom))
+                img = frame.pil
                 is_cropped = True
             
+            # 第3步：去重（同参数、无界面操作且画面未变化时直接返回上次的文件，跳过编码写盘）
+            dedup_key = (platform, description, frame.screen_width, frame.screen_height, compress, max_width, quality,
+                         max_bytes, crop_offset_x, crop_offset_y, img.width, img.height, self._resize_mode(),
+                         output_format)
+            frame_hash = None
+            if self._dedup_enabled():
+                frame_hash = self.dedup_cache.hash(frame.gray)
+                cached = self.dedup_cache.lookup(dedup_key, frame_hash, action_count)
+                if cached is not None:
+                    self.store.touch(cached["screenshot_path"])
+                    cached["cache_hit"] = True
+                    return cached
+            
             # ========== 情况1：局部裁剪截图（不压缩，保持清晰度）==========
             if is_cropped:
                 # 生成文件名
-                if description:
-                    safe_desc = re.sub(r'[^\w\s-]', '', description).strip().replace(' ', '_')
-                    filename = f"screenshot_{platform}_crop_{safe_desc}_{timestamp}.png"
-                else:
-                    filename = f"screenshot_{platform}_crop_{timestamp}.png"
-                
-                final_path = self.screenshot_dir / filename
+                prefix = self._file_prefix(f"screenshot_{platform}_crop", description)
                 
-                # 保存为 PNG（保持清晰度）
-                img.save(str(final_path), "PNG")
+                # 无损保存（PNG / 无损 WebP，保持清晰度）
+                image_format, params = lossless_spec(output_format)
+                final_path = self._save_final(img, prefix, image_format, **params)
                 
-                # 删除临时文件
-                temp_path.unlink()
-                
-                return {
+                return self._dedup_store(dedup_key, frame_hash, action_count, {
                     "success": True,
                     "screenshot_path": str(final_path),
                     "image_width": img.width,
                     "image_height": img.height,
                     "crop_offset_x": crop_offset_x,
                     "crop_offset_y": crop_offset_y
-                }
+                })
             
             # ========== 情况2：全屏压缩截图 ==========
             elif compress:
@@ -133,77 +263,65 @@ class ScreenshotManager:
                 original_img_width = img.width
                 original_img_height = img.height
                 
-                # 第3步：缩小尺寸（保持宽高比）
+                # 第4步：缩小尺寸（保持宽高比）
                 image_width, image_height = img.width, img.height
                 
                 if img.width > max_width:
                     ratio = max_width / img.width
                     new_w = max_width
                     new_h = int(img.height * ratio)
-                    # 兼容不同版本的 Pillow
-                    try:
-                        resample = Image.Resampling.LANCZOS
-                    except AttributeError:
-                        try:
-                            resample = Image.LANCZOS
-                        except AttributeError:
-                            resample = Image.ANTIALIAS
-                    img = img.resize((new_w, new_h), resample)
+                    img = resize_image(img, (new_w, new_h), self._resize_mode())
                     image_width, image_height = new_w, new_h
                 
-                # 生成文件名（JPEG 格式）
-                if description:
-                    safe_desc = re.sub(r'[^\w\s-]', '', description).strip().replace(' ', '_')
-                    filename = f"screenshot_{platform}_{safe_desc}_{timestamp}.jpg"
-                else:
-                    filename = f"screenshot_{platform}_{timestamp}.jpg"
-                
-                final_path = self.screenshot_dir / filename
-                
-                # 保存为 JPEG（处理透明通道）
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert("RGB")
-                
-                img.save(str(final_path), "JPEG", quality=quality)
-                temp_path.unlink()
-                
-                compressed_size = final_path.stat().st_size
-                saved_percent = (1 - compressed_size / original_size) * 100
+                # 生成文件名
+                prefix = self._file_prefix(f"screenshot_{platform}", description)
+                
+                if max_bytes > 0:
+                    # 按字节预算搜索质量和缩放，直接保存搜索得到的编码结果
+                    budget = self.jpeg_budget.encode(img, max_bytes, resize_mode=self._resize_mode())
+                    final_path = self.store.put_bytes(budget.data, prefix, "JPEG", background=self.background_save)
+                    image_width, image_height = budget.size
+                    return self._dedup_store(dedup_key, frame_hash, action_count, {
+                        "success": True,
+                        "screenshot_path": str(final_path),
+                        "image_width": image_width,
+                        "image_height": image_height,
+                        "original_img_width": original_img_width,
+                        "original_img_height": original_img_height,
+                        "jpeg_quality": budget.quality,
+                        "scale": budget.scale,
+                        "encoded_bytes": len(budget.data),
+                        "byte_budget": max_bytes,
+                        "budget_met": budget.budget_met
+                    })
+                
+                # 有损保存（JPEG / WebP；帧始终是 RGB，无需处理透明通道）
+                image_format, params = lossy_spec(output_format, quality)
+                final_path = self._save_final(img, prefix, image_format, **params)
                 
                 # 返回结果
-                return {
+                return self._dedup_store(dedup_key, frame_hash, action_count, {
                     "success": True,
                     "screenshot_path": str(final_path),
                     "image_width": image_width,
                     "image_height": image_height,
                     "original_img_width": original_img_width,
                     "original_img_height": original_img_height
-                }
+                })
             
             # ========== 情况3：全屏不压缩截图 ==========
             else:
-                if description:
-                    safe_desc = re.sub(r'[^\w\s-]', '', description).strip().replace(' ', '_')
-                    filename = f"screenshot_{platform}_{safe_desc}_{timestamp}.png"
-                else:
-                    filename = f"screenshot_{platform}_{timestamp}.png"
-                
-                final_path = self.screenshot_dir / filename
-                temp_path.rename(final_path)
+                prefix = self._file_prefix(f"screenshot_{platform}", description)
+                image_format, params = lossless_spec(output_format)
+                final_path = self._save_final(img, prefix, image_format, **params)
                 
                 # 返回结果（不压缩时尺寸相同）
-                return {
+                return self._dedup_store(dedup_key, frame_hash, action_count, {
                     "success": True,
                     "screenshot_path": str(final_path),
                     "image_width": img.width,
                     "image_height": img.height
-                }
+                })
                 
         except ImportError:
             return {"success": False, "message": "❌ 需要安装 Pillow: pip install Pillow"}
@@ -213,43 +331,22 @@ class ScreenshotManager:
     def take_screenshot_with_grid(self, grid_size: int = 100, show_popup_hints: bool = False) -> Dict:
         """统一网格截图接口"""
         try:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
             platform = "ios" if self._is_ios() else "android"
             
-            # 第1步：截图
-            temp_filename = f"temp_grid_{timestamp}.png"
-            temp_path = self.screenshot_dir / temp_filename
-            
-            screen_width, screen_height = self._take_raw_screenshot(str(temp_path))
-            
-            img = Image.open(temp_path)
-            draw = ImageDraw.Draw(img, 'RGBA')
-            
-            # 尝试加载字体
-            try:
-                font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-                font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 11)
-            except:
-                font = ImageFont.load_default()
-                font_small = font
+            # 第1步：截图（内存帧，绘制在副本上）
+            frame = self.capture_frame()
+            screen_width, screen_height = frame.screen_width, frame.screen_height
             
+            img = frame.pil.copy()
             img_width, img_height = img.size
             
-            # 第2步：绘制网格线和坐标
-            grid_color = (255, 0, 0, 80)  # 半透明红色
-            text_color = (255, 0, 0, 200)  # 红色文字
-            
-            # 绘制垂直网格线
-            for x in range(0, img_width, grid_size):
-                draw.line([(x, 0), (x, img_height)], fill=grid_color, width=1)
-                # 顶部标注 X 坐标
-                draw.text((x + 2, 2), str(x), fill=text_color, font=font_small)
+            # 字体（进程级缓存）
+            font = get_font(14)
+            font_small = get_font(11)
             
-            # 绘制水平网格线
-            for y in range(0, img_height, grid_size):
-                draw.line([(0, y), (img_width, y)], fill=grid_color, width=1)
-                # 左侧标注 Y 坐标
-                draw.text((2, y + 2), str(y), fill=text_color, font=font_small)
+            # 第2步：合成网格线和坐标（预渲染蒙版按尺寸缓存，纯色一次 paste）
+            img.paste(GRID_RGB, (0, 0), grid_overlay(img_width, img_height, grid_size))
+            draw = ImageDraw.Draw(img, 'RGBA')
             
             # 第3步：检测弹窗并标注（仅Android）
             popup_info = None
@@ -257,13 +354,11 @@ class ScreenshotManager:
             
             if show_popup_hints and not self._is_ios():
                 try:
-                    import xml.etree.ElementTree as ET
-                    xml_string = self.client.u2.dump_hierarchy(compressed=False)
-                    root = ET.fromstring(xml_string)
+                    tree = self.client.hierarchy_cache.get_tree()
                     
                     # 使用严格的弹窗检测
                     popup_bounds, popup_confidence = self._detect_popup_with_confidence(
-                        root, screen_width, screen_height
+                        tree, screen_width, screen_height
                     )
                     
                     if popup_bounds and popup_confidence >= 0.6:
@@ -307,21 +402,8 @@ class ScreenshotManager:
                     pass  # 弹窗检测失败不影响主功能
             
             # 第4步：保存标注后的截图
-            filename = f"screenshot_{platform}_grid_{timestamp}.jpg"
-            final_path = self.screenshot_dir / filename
-            
-            # 转换为 RGB 并保存
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert("RGB")
-            
-            img.save(str(final_path), "JPEG", quality=85)
-            temp_path.unlink()
+            image_format, params = lossy_spec(self._output_format(), 85)
+            final_path = self._save_final(img, f"screenshot_{platform}_grid", image_format, **params)
             
             result = {
                 "success": True,
@@ -343,40 +425,29 @@ class ScreenshotManager:
         except Exception as e:
             return {"success": False, "message": f"❌ 网格截图失败: {e}"}
     
-    def take_screenshot_with_som(self) -> Dict:
-        """统一SoM截图接口"""
+    def take_screenshot_with_som(self, pruned: bool = False) -> Dict:
+        """统一SoM截图接口
+        
+        Args:
+            pruned: Android 是否使用精简层级（压缩 dump，去掉不可见节点、折叠布局链）
+        """
         try:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
             platform = "ios" if self._is_ios() else "android"
             
-            # 第1步：截图
-            temp_filename = f"temp_som_{timestamp}.png"
-            temp_path = self.screenshot_dir / temp_filename
-            
-            screen_width, screen_height = self._take_raw_screenshot(str(temp_path))
-            
-            img = Image.open(temp_path)
-            draw = ImageDraw.Draw(img, 'RGBA')
-            img_width, img_height = img.size
+            # 第1步：截图与 UI 层级并行抓取（Android 层级交给客户端工作池）
+            tree_future = None
+            if not self._is_ios():
+                tree_future = self.client.work_pool.submit(self.client.hierarchy_cache.get_tree, pruned=pruned)
+            frame = self.capture_frame()
+            screen_width, screen_height = frame.screen_width, frame.screen_height
+            img_width, img_height = frame.size
             
             # 计算坐标缩放比例
             scale_x = img_width / screen_width if screen_width > 0 else 1.0
             scale_y = img_height / screen_height if screen_height > 0 else 1.0
             
-            # 尝试加载字体
-            if self._is_ios():
-                font_size = int(16 * scale_x)
-                font_size_small = int(12 * scale_x)
-            else:
-                font_size = 16
-                font_size_small = 12
-            
-            try:
-                font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", font_size)
-                font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", font_size_small)
-            except:
-                font = ImageFont.load_default()
-                font_small = font
+            # 编号字号（iOS 按物理像素缩放）
+            font_size = int(16 * scale_x) if self._is_ios() else 16
             
             # 第2步：获取所有可点击元素
             elements = []
@@ -418,88 +489,40 @@ class ScreenshotManager:
                             'clickable': clickable
                         })
             else:
-                # Android 使用 XML 解析
-                import xml.etree.ElementTree as ET
-                xml_string = self.client.u2.dump_hierarchy(compressed=False)
-                root = ET.fromstring(xml_string)
-                
-                def parse_android_elements(node, depth=0):
-                    if depth > 20:  # 限制深度
-                        return
+                # Android 使用共享缓存中的 UI 树（深度超过 20 的子树整体跳过）
+                # 工作池线程都被占满时层级任务还在排队：撤销后在当前线程抓取
+                if tree_future.cancel():
+                    tree = self.client.hierarchy_cache.get_tree(pruned=pruned)
+                else:
+                    tree = tree_future.result()
+                for node in tree.nodes(max_depth=20):
+                    if not node.has_bounds:
+                        continue
                     
-                    # 提取属性
-                    bounds_str = node.get('bounds', '')
-                    text = node.get('text', '')
-                    resource_id = node.get('resource-id', '')
-                    class_name = node.get('class', '')
-                    clickable = node.get('clickable', 'false') == 'true'
+                    text = node.text
+                    resource_id = node.resource_id
+                    clickable = node.clickable
                     
-                    if bounds_str:
-                        match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds_str)
-                        if match:
-                            x1, y1, x2, y2 = map(int, match.groups())
-                            
-                            # 只添加可点击或有意义的元素
-                            if clickable or text or resource_id:
-                                elements.append({
-                                    'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
-                                    'text': text,
-                                    'resource_id': resource_id,
-                                    'type': class_name.split('.')[-1] if class_name else '',
-                                    'clickable': clickable
-                                })
-                    
-                    # 递归处理子节点
-                    for child in node:
-                        parse_android_elements(child, depth + 1)
-                
-                parse_android_elements(root)
+                    # 只添加可点击或有意义的元素
+                    if clickable or text or resource_id:
+                        x1, y1, x2, y2 = node.bounds
+                        elements.append({
+                            'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                            'text': text,
+                            'resource_id': resource_id,
+                            'type': node.short_class,
+                            'clickable': clickable
+                        })
             
-            # 第3步：绘制标注
+            # 第3步：绘制标注（边框 / 圆圈一次蒙版混合，编号取自标签图集）
             clickable_elements = [elem for elem in elements if elem.get('clickable', False)]
-            
-            # 绘制可点击元素
-            for i, elem in enumerate(clickable_elements[:50]):  # 限制数量
-                x1, y1, x2, y2 = elem['x1'], elem['y1'], elem['x2'], elem['y2']
-                
-                # 确保坐标在图片范围内
-                x1 = max(0, min(x1, img_width - 1))
-                y1 = max(0, min(y1, img_height - 1))
-                x2 = max(x1 + 1, min(x2, img_width))
-                y2 = max(y1 + 1, min(y2, img_height))
-                
-                # 绘制边框
-                draw.rectangle([x1, y1, x2, y2], outline=(255, 0, 0, 200), width=2)
-                
-                # 绘制编号
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
-                
-                # 绘制背景圆圈
-                circle_size = min(20, (x2 - x1) // 2, (y2 - y1) // 2)
-                if circle_size > 5:
-                    draw.ellipse([center_x - circle_size, center_y - circle_size, 
-                                center_x + circle_size, center_y + circle_size],
-                               fill=(255, 0, 0, 180))
-                    draw.text((center_x - 5, center_y - 8), str(i + 1), 
-                             fill=(255, 255, 255), font=font)
+            boxes = [(elem['x1'], elem['y1'], elem['x2'], elem['y2'])
+                     for elem in clickable_elements[:50]]  # 限制数量
+            img = render_som(frame, boxes, font_size)
             
             # 第4步：保存图片
-            filename = f"screenshot_{platform}_som_{timestamp}.jpg"
-            final_path = self.screenshot_dir / filename
-            
-            # 转换为 RGB 并保存
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert("RGB")
-            
-            img.save(str(final_path), "JPEG", quality=85)
-            temp_path.unlink()
+            image_format, params = lossy_spec(self._output_format(), 85)
+            final_path = self._save_final(img, f"screenshot_{platform}_som", image_format, **params)
             
             return {
                 "success": True,
@@ -515,25 +538,18 @@ class ScreenshotManager:
         except Exception as e:
             return {"success": False, "message": f"❌ SoM截图失败: {e}"}
     
-    def _detect_popup_with_confidence(self, root, screen_width: int, screen_height: int) -> tuple:
+    def _detect_popup_with_confidence(self, tree, screen_width: int, screen_height: int) -> tuple:
         """检测弹窗（Android专用）"""
         try:
             # 弹窗特征检测
             popup_candidates = []
             
-            for node in root.iter():
-                class_name = node.get('class', '')
-                text = node.get('text', '')
-                bounds_str = node.get('bounds', '')
-                
-                if not bounds_str:
-                    continue
-                
-                match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds_str)
-                if not match:
+            for node in tree.nodes():
+                if not node.has_bounds:
                     continue
                 
-                x1, y1, x2, y2 = map(int, match.groups())
+                class_name = node.class_name
+                x1, y1, x2, y2 = node.bounds
                 width = x2 - x1
                 height = y2 - y1
                 
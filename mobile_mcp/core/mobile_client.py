@@ -15,14 +15,23 @@
     await client.click("登录按钮")
 """
 import asyncio
+import os
 import sys
 import time
 from typing import Dict, Optional, List
 
 from mobile_mcp.core.device_manager import DeviceManager
+from mobile_mcp.core.hierarchy_capture import HierarchyCapture
+from mobile_mcp.core.hierarchy_cache import HierarchyCache
+from mobile_mcp.core.hierarchy_watcher import HierarchyWatcher
+from mobile_mcp.core.screen_capture import ScreenCapture
+from mobile_mcp.core.accessibility_events import AccessibilityEventSource
+from mobile_mcp.core.screen_stream import ScreenStream
 from mobile_mcp.utils.xml_parser import XMLParser
 from mobile_mcp.utils.xml_formatter import XMLFormatter
 from mobile_mcp.core.utils.smart_wait import SmartWait
+from mobile_mcp.core.utils.single_flight import SingleFlight
+from mobile_mcp.core.utils.work_pool import WorkPool
 from mobile_mcp.core.dynamic_config import DynamicConfig
 
 
@@ -75,8 +84,44 @@ class MobileClient:
         self.xml_parser = XMLParser()
         self.xml_formatter = XMLFormatter()
         
+        # 设备 RPC 单飞合并：并发的 dump / 截图请求共享同一次调用
+        self.single_flight = SingleFlight()
+        # 截图 / 图像处理工作池（有界线程池，不占用事件循环）
+        self.work_pool = WorkPool()
+        
+        # UI层级抓取（exec-out 单次往返，失败回退 u2）
+        self.hierarchy_capture = HierarchyCapture(self)
+        if platform == "android" and not lazy_connect:
+            # 连接时在后台测速选择层级后端，不占用第一次工具调用
+            self.hierarchy_capture.start_selection()
+        
+        # 屏幕抓取（u2 / exec-out screencap 原始帧，由 DynamicConfig.screenshot_backend 选择）
+        self.screen_capture = ScreenCapture(self)
+        
+        # 共享UI层级缓存（所有管理器共用，界面操作后失效）
+        self.hierarchy_cache = HierarchyCache(self, ttl=1)
+        # 后台层级监视器：所有页面变化/稳定等待共享一个自适应轮询任务
+        self.hierarchy_watcher = HierarchyWatcher(self)
+        
+        # 无障碍事件源（可选）：界面变化由事件推送，轮询只作兜底
+        # uiautomator events 在部分系统上与 uiautomator2 服务冲突，默认关闭
+        self.accessibility_events = None
+        if platform == "android" and os.environ.get('ACCESSIBILITY_EVENTS', 'false').lower() in ['true', '1', 'yes']:
+            self.accessibility_events = AccessibilityEventSource(self)
+            self.hierarchy_watcher.attach_events(self.accessibility_events)
+            if not lazy_connect:
+                # 连接时即开始接收事件，第一次操作的界面响应不会漏掉
+                self.accessibility_events.start()
+        
+        # 持续屏幕流（可选）：截图直接取操作之后的最新帧，首次截图时启动
+        # Android 走 screenrecord H.264（需要 ffmpeg），iOS 需设置 SCREEN_STREAM_URL（WDA MJPEG）
+        self.screen_stream = None
+        if os.environ.get('SCREEN_STREAM', 'false').lower() in ['true', '1', 'yes']:
+            self.screen_stream = ScreenStream(self)
+        
         # 缓存
         self._snapshot_cache = None
+        self._snapshot_version = -1
         self._cache_timestamp = 0
         self._cache_ttl = 1  # 缓存1秒
         
@@ -157,6 +202,23 @@ class MobileClient:
         except Exception as e:
             print(f"  ⚠️  解锁屏幕方向失败: {e}", file=sys.stderr)
     
+    def invalidate_hierarchy(self, reason: str = '') -> int:
+        """
+        界面操作后使共享层级缓存失效
+        
+        Args:
+            reason: 操作名称（click / swipe / input / key / launch ...）
+            
+        Returns:
+            新的缓存版本号
+        """
+        version = self.hierarchy_cache.invalidate(reason)
+        self.hierarchy_watcher.notify_action()
+        ios_client = getattr(self, '_ios_client', None)
+        if ios_client is not None:
+            ios_client.invalidate_page_source()
+        return version
+    
     async def snapshot(self, use_cache: bool = True) -> str:
         """
         获取页面XML结构（类似Web的snapshot）
@@ -169,14 +231,14 @@ class MobileClient:
         """
         import time
         
-        # 检查缓存
-        if use_cache and self._snapshot_cache:
-            current_time = time.time()
-            if current_time - self._cache_timestamp < self._cache_ttl:
-                return self._snapshot_cache
-        
         # iOS平台使用不同的实现
         if self.platform == "ios":
+            # 检查缓存
+            if use_cache and self._snapshot_cache:
+                current_time = time.time()
+                if current_time - self._cache_timestamp < self._cache_ttl:
+                    return self._snapshot_cache
+            
             if not self.driver:
                 raise RuntimeError("iOS设备未连接")
             # 获取iOS页面源码
@@ -189,36 +251,16 @@ class MobileClient:
             return xml_string
         
         # Android平台
-        # 获取XML - 优先使用 ADB 直接 dump（更完整，包含 NAF 元素）
-        xml_string = None
-        try:
-            # 方法1: 使用 ADB 直接 dump（获取最完整的 UI 树，包括 NAF 元素）
-            import subprocess
-            import tempfile
-            import os
-            
-            # 在设备上执行 dump
-            self.u2.shell('uiautomator dump /sdcard/ui_dump.xml')
-            
-            # 读取文件内容
-            result = self.u2.shell('cat /sdcard/ui_dump.xml')
-            if result and isinstance(result, str) and result.strip().startswith('<?xml'):
-                xml_string = result.strip()
-                # 清理临时文件
-                self.u2.shell('rm /sdcard/ui_dump.xml')
-        except Exception as e:
-            print(f"  ⚠️  ADB dump 失败，使用 uiautomator2: {e}", file=sys.stderr)
+        # 获取XML - 走共享层级缓存（操作后自动失效），未命中时优先 exec-out 单次往返 dump
+        # （更完整，包含 NAF 元素，且设备上不落临时文件），失败自动回退 uiautomator2
+        tree = await self.hierarchy_cache.get_tree_async(fresh=not use_cache)
         
-        # 方法2: 回退到 uiautomator2 的 dump_hierarchy
-        if not xml_string:
-            xml_string = self.u2.dump_hierarchy(compressed=False)
+        # 同一版本的页面已经格式化过，直接复用
+        if use_cache and self._snapshot_cache and self._snapshot_version == self.hierarchy_cache.version:
+            return self._snapshot_cache
         
-        # 确保xml_string是字符串类型
-        if not isinstance(xml_string, str):
-            xml_string = str(xml_string)
-        
-        # 解析XML
-        elements = self.xml_parser.parse(xml_string)
+        # 解析XML（UI树与其他管理器共享，同一版本只解析一次）
+        elements = self.xml_parser.parse_tree(tree)
         
         # 确保elements是列表类型
         if not isinstance(elements, list):
@@ -229,6 +271,7 @@ class MobileClient:
         
         # 更新缓存
         self._snapshot_cache = formatted
+        self._snapshot_version = self.hierarchy_cache.version
         self._cache_timestamp = time.time()
         
         return formatted
@@ -266,6 +309,14 @@ class MobileClient:
         }
         self.operation_history.append(operation_record)
         
+        # 获取点击前页面状态（必须在点击之前，否则拿到的是点击后的页面）
+        initial_tree = None
+        if verify:
+            try:
+                initial_tree = self.hierarchy_cache.get_tree()
+            except Exception as e:
+                print(f"  ⚠️  获取点击前页面状态失败: {e}", file=sys.stderr)
+        
         # 根据ref类型执行点击
         try:
             if ref.startswith('cursor_vision_'):
@@ -340,32 +391,28 @@ class MobileClient:
                             raise ValueError(f"descriptionContains点击失败: {ref}, 错误: {e}")
                     else:
                         # 🎯 改进：尝试模糊匹配（忽略空格、括号）
-                        ref_normalized = ref.replace(' ', '').replace('(', '').replace(')', '').replace('（', '').replace('）', '')
-                        # 获取所有元素，手动匹配
-                        xml_string = self.u2.dump_hierarchy(compressed=False)
-                        elements = self.xml_parser.parse(xml_string)
-                        for elem in elements:
-                            elem_desc = elem.get('content_desc', '')
-                            elem_text = elem.get('text', '')
-                            elem_desc_normalized = elem_desc.replace(' ', '').replace('(', '').replace(')', '').replace('（', '').replace('）', '')
-                            elem_text_normalized = elem_text.replace(' ', '').replace('(', '').replace(')', '').replace('（', '').replace('）', '')
+                        # 归一化后的子串索引随UI树构建一次（走共享缓存，避免重复 dump 和逐元素归一化）
+                        tree = self.hierarchy_cache.get_tree()
+                        for node in tree.find(tree.index.find_normalized(ref)):
+                            # 与 XMLParser 的元素过滤一致：有文本、resource-id或可交互
+                            if not (node.text or node.resource_id or node.clickable or node.focusable):
+                                continue
                             
-                            if (elem_desc_normalized and ref_normalized in elem_desc_normalized) or \
-                               (elem_text_normalized and ref_normalized in elem_text_normalized):
-                                # 找到匹配，使用bounds坐标点击
-                                bounds = elem.get('bounds', '')
-                                if bounds:
-                                    x, y = self._parse_bounds_coords(bounds)
-                                    self.u2.click(x, y)
-                                    print(f"  ✅ 模糊匹配成功，点击坐标: ({x}, {y})", file=sys.stderr)
-                                    # 🎯 修复：找到匹配后直接返回，避免继续执行后面的代码
-                                    return {"success": True, "ref": ref}
+                            # 找到匹配，使用bounds坐标点击
+                            if node.has_bounds:
+                                x, y = node.center
+                                self.u2.click(x, y)
+                                self.invalidate_hierarchy('click')
+                                print(f"  ✅ 模糊匹配成功，点击坐标: ({x}, {y})", file=sys.stderr)
+                                # 🎯 修复：找到匹配后直接返回，避免继续执行后面的代码
+                                return {"success": True, "ref": ref}
                         else:
                             # 最后尝试text包含匹配
                             text_contains_elem = self.u2(textContains=ref)
                             if text_contains_elem.exists(timeout=0.5):
                                 try:
                                     text_contains_elem.click()
+                                    self.invalidate_hierarchy('click')
                                     print(f"  ✅ textContains点击成功: {ref}", file=sys.stderr)
                                     return {"success": True, "ref": ref}
                                 except Exception as e:
@@ -417,6 +464,7 @@ class MobileClient:
                                             if coord and 'x' in coord and 'y' in coord:
                                                 x, y = coord['x'], coord['y']
                                                 self.u2.click(x, y)
+                                                self.invalidate_hierarchy('click')
                                                 print(f"  ✅ Cursor AI视觉识别成功，点击坐标: ({x}, {y})", file=sys.stderr)
                                                 
                                                 # 🎯 更新操作历史：记录视觉识别坐标
@@ -450,16 +498,15 @@ class MobileClient:
                                     
                                     raise ValueError(f"无法找到元素: {ref}（建议使用 MCP 方式，Cursor AI 会自动进行视觉识别）")
             
+            # 点击已执行，旧页面结构作废
+            self.invalidate_hierarchy('click')
+            
             # 验证点击（可选）
             page_changed = False
-            if verify:
-                # 获取点击前页面状态
+            if verify and initial_tree is not None:
                 try:
-                    initial_xml = self.u2.dump_hierarchy(compressed=False)
-                    initial_length = len(initial_xml)
-                    
                     # 等待页面变化
-                    page_changed = await self._verify_page_change(initial_length, timeout=2.0)
+                    page_changed = await self._verify_page_change(initial_tree, timeout=2.0)
                     
                     if not page_changed:
                         print(f"  ⚠️  点击后页面未变化，可能点击未生效", file=sys.stderr)
@@ -621,6 +668,9 @@ class MobileClient:
                     print(f"  ❌ text输入失败: {e}", file=sys.stderr)
                     raise ValueError(f"text输入失败: {ref}, 错误: {e}")
             
+            # 输入已执行，旧页面结构作废
+            self.invalidate_hierarchy('input')
+            
             # 验证输入（可选）
             input_verified = False
             actual_text = None
@@ -678,12 +728,14 @@ class MobileClient:
                 try:
                     # 尝试按搜索键（KEYCODE_SEARCH = 84）
                     self.u2.press_keycode(84)
+                    self.invalidate_hierarchy('key')
                     print(f"  ✅ 已按搜索键", file=sys.stderr)
                     await asyncio.sleep(0.5)
                 except Exception as e:
                     # 如果KEYCODE_SEARCH不支持，尝试按Enter键
                     try:
                         self.u2.press("enter")
+                        self.invalidate_hierarchy('key')
                         print(f"  ✅ 已按Enter键（搜索键不可用）", file=sys.stderr)
                         await asyncio.sleep(0.5)
                     except Exception as e2:
@@ -774,23 +826,22 @@ class MobileClient:
         
         try:
             # 验证滑动（可选）
-            initial_xml = None
-            initial_length = 0
+            initial_tree = None
             if verify:
                 try:
-                    initial_xml = self.u2.dump_hierarchy(compressed=False)
-                    initial_length = len(initial_xml)
+                    initial_tree = self.hierarchy_cache.get_tree()
                 except Exception as e:
                     print(f"  ⚠️  获取初始页面状态失败: {e}", file=sys.stderr)
             
             print(f"  📍 滑动方向: {direction}, 坐标: ({x1}, {y1}) -> ({x2}, {y2})", file=sys.stderr)
             self.u2.swipe(x1, y1, x2, y2, duration=0.5)
+            self.invalidate_hierarchy('swipe')
             
             # 验证滑动效果
             page_changed = False
-            if verify and initial_xml is not None:
+            if verify and initial_tree is not None:
                 # 等待页面内容变化
-                page_changed = await self._verify_page_change(initial_length, timeout=1.5, change_threshold=0.03)
+                page_changed = await self._verify_page_change(initial_tree, timeout=1.5, change_threshold=0.03)
                 
                 if page_changed:
                     print(f"  ✅ 滑动成功，页面内容已变化: {direction}", file=sys.stderr)
@@ -862,6 +913,7 @@ class MobileClient:
                     max_wait=smart_wait_time,
                     auto_close_ads=auto_close_ads
                 )
+                self.invalidate_hierarchy('launch')
                 
                 # 打印截图路径（供Cursor AI查看验证）
                 if result.get('screenshot_path'):
@@ -873,6 +925,7 @@ class MobileClient:
             # 传统方式（快速启动，不等待加载）
             print(f"  📱 启动App: {package_name}", file=sys.stderr)
             self.u2.app_start(package_name)
+            self.invalidate_hierarchy('launch')
             
             # 等待App启动，并验证是否成功
             for i in range(wait_time):
@@ -930,6 +983,7 @@ class MobileClient:
             
             # Android平台
             self.u2.app_stop(package_name)
+            self.invalidate_hierarchy('stop')
             print(f"  ✅ App已停止: {package_name}", file=sys.stderr)
             return {"success": True}
         except Exception as e:
@@ -1029,15 +1083,15 @@ class MobileClient:
                 try:
                     if verify:
                         # 获取操作前页面状态
-                        initial_xml = self.u2.dump_hierarchy(compressed=False)
-                        initial_length = len(initial_xml)
+                        initial_tree = self.hierarchy_cache.get_tree()
                     
                     self.u2.press(key.lower())
+                    self.invalidate_hierarchy('key')
                     print(f"  ✅ 按键成功: {key}", file=sys.stderr)
                     
                     if verify:
                         # 检测页面变化
-                        page_changed = await self._verify_page_change(initial_length, timeout=2.0)
+                        page_changed = await self._verify_page_change(initial_tree, timeout=2.0)
                         return {
                             "success": page_changed,
                             "key": key,
@@ -1058,8 +1112,7 @@ class MobileClient:
             # 标准按键处理
             if verify:
                 # 获取操作前页面状态
-                initial_xml = self.u2.dump_hierarchy(compressed=False)
-                initial_length = len(initial_xml)
+                initial_tree = self.hierarchy_cache.get_tree()
             
             # 使用keycode按键 - uiautomator2使用shell命令
             try:
@@ -1071,10 +1124,11 @@ class MobileClient:
                 subprocess.run([self.device_manager.adb_path, '-s', self.device_manager.current_device_id, 
                                'shell', 'input', 'keyevent', str(keycode)], 
                                check=True, timeout=5)
+            self.invalidate_hierarchy('key')
             
             if verify:
                 # 等待并检测页面变化
-                page_changed = await self._verify_page_change(initial_length, timeout=2.0)
+                page_changed = await self._verify_page_change(initial_tree, timeout=2.0)
                 
                 if page_changed:
                     print(f"  ✅ 按键成功且页面已变化: {key} (keycode={keycode})", file=sys.stderr)
@@ -1120,16 +1174,16 @@ class MobileClient:
         print(f"  🔍 智能搜索键：先尝试SEARCH键...", file=sys.stderr)
         
         # 获取初始页面状态
-        initial_xml = self.u2.dump_hierarchy(compressed=False)
-        initial_length = len(initial_xml)
+        initial_tree = self.hierarchy_cache.get_tree()
         
         # 方案1: 尝试 SEARCH 键 (keycode=84)
         try:
             self.u2.shell('input keyevent 84')
+            self.invalidate_hierarchy('key')
             print(f"  ⏳ 已发送SEARCH键，等待页面变化...", file=sys.stderr)
             
             # 检测页面变化
-            page_changed = await self._verify_page_change(initial_length, timeout=2.0)
+            page_changed = await self._verify_page_change(initial_tree, timeout=2.0)
             
             if page_changed:
                 print(f"  ✅ SEARCH键生效，页面已变化", file=sys.stderr)
@@ -1147,14 +1201,14 @@ class MobileClient:
                 
                 # 方案2: 尝试 ENTER 键 (keycode=66)
                 # 重新获取当前页面状态（因为可能有轻微变化）
-                current_xml = self.u2.dump_hierarchy(compressed=False)
-                current_length = len(current_xml)
+                current_tree = self.hierarchy_cache.get_tree(fresh=True)
                 
                 self.u2.shell('input keyevent 66')
+                self.invalidate_hierarchy('key')
                 print(f"  ⏳ 已发送ENTER键，等待页面变化...", file=sys.stderr)
                 
                 # 再次检测页面变化
-                page_changed_enter = await self._verify_page_change(current_length, timeout=2.0)
+                page_changed_enter = await self._verify_page_change(current_tree, timeout=2.0)
                 
                 if page_changed_enter:
                     print(f"  ✅ ENTER键生效，页面已变化", file=sys.stderr)
@@ -1181,14 +1235,18 @@ class MobileClient:
             print(f"  ❌ 搜索键执行失败: {e}", file=sys.stderr)
             return {"success": False, "reason": str(e)}
     
-    async def _verify_page_change(self, initial_length: int, timeout: float = None, change_threshold: float = None) -> bool:
+    async def _verify_page_change(self, initial_tree, timeout: float = None, change_threshold: float = None) -> bool:
         """
         验证页面是否发生变化
         
+        比较UI树的结构哈希：根哈希相同即未变化；不同时按 diff 得到的变化节点比例判断，
+        同长度的内容变化也能检测到，阈值反映的是界面实际变化的比例。
+        新页面由后台 HierarchyWatcher 发布，这里只 await 下一个版本，不自行轮询
+        
         Args:
-            initial_length: 初始页面XML长度
+            initial_tree: 初始页面的UI树（hierarchy_cache.get_tree()）
             timeout: 最大等待时间（秒），None则使用动态配置
-            change_threshold: 变化阈值（百分比），None则使用动态配置
+            change_threshold: 变化阈值（变化节点比例），None则使用动态配置
         
         Returns:
             页面是否发生了明显变化
@@ -1200,26 +1258,39 @@ class MobileClient:
             change_threshold = DynamicConfig.page_change_threshold
         
         start_time = time.time()
+        deadline = start_time + timeout
+        after = start_time
         
-        while time.time() - start_time < timeout:
-            await asyncio.sleep(0.1)  # 每100ms检查一次
-            
+        while time.time() < deadline:
             try:
-                current_xml = self.u2.dump_hierarchy(compressed=False)
-                current_length = len(current_xml)
+                # 等待后台监视器发布的下一棵树（自适应轮询，多个等待者共享一次抓取）
+                current_tree = await self.hierarchy_watcher.wait_for_tree(after, deadline - time.time())
+                if current_tree is None:
+                    break
+                after = current_tree.captured_at
+                
+                # 根哈希相同：页面结构完全没变
+                if current_tree.root_hash == initial_tree.root_hash:
+                    continue
                 
-                # 计算变化百分比
-                change_percent = abs(current_length - initial_length) / max(1, initial_length)
+                diff = initial_tree.diff(current_tree)
+                change_percent = diff['change_ratio']
                 
                 if change_percent > change_threshold:
-                    print(f"  📊 页面变化检测: {change_percent*100:.1f}% (阈值: {change_threshold*100}%)", file=sys.stderr)
-                    # 等待页面稳定（使用动态配置）
-                    await asyncio.sleep(DynamicConfig.wait_page_stable)
-                    print(f"  ⏳ 已等待页面稳定 {DynamicConfig.wait_page_stable}秒", file=sys.stderr)
+                    print(f"  📊 页面变化检测: {change_percent*100:.1f}% (阈值: {change_threshold*100}%)，"
+                          f"{diff['changed_nodes']}个节点变化", file=sys.stderr)
+                    for subtree in diff['changed_subtrees'][:3]:
+                        print(f"     - {subtree['class']} {subtree['text']!r} {subtree['bounds']} ({subtree['size']}个节点)", file=sys.stderr)
+                    # 等待页面稳定（使用动态配置）：事件驱动时等事件安静即可，不必等满
+                    stable = await self.hierarchy_watcher.wait_for_quiet(
+                        DynamicConfig.page_stable_threshold, DynamicConfig.wait_page_stable)
+                    if stable is None:
+                        await asyncio.sleep(DynamicConfig.wait_page_stable)
+                        print(f"  ⏳ 已等待页面稳定 {DynamicConfig.wait_page_stable}秒", file=sys.stderr)
                     return True
             except Exception as e:
                 print(f"  ⚠️  页面变化检测异常: {e}", file=sys.stderr)
-                pass
+                await asyncio.sleep(0.1)
         
         print(f"  📊 页面变化检测: 未检测到明显变化（超时{timeout}秒）", file=sys.stderr)
         return False
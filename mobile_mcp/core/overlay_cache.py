@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图标注缓存 - 字体与网格图层只生成一次
+
+功能：
+1. get_font(size): 进程级字体缓存，按候选路径查找一次
+   （macOS Helvetica → 常见 Linux / Windows 字体 → Pillow 自带字体 → 位图字体）
+2. grid_overlay(width, height, grid_size): 预渲染的网格透明度蒙版（网格线和坐标同为 GRID_RGB），
+   按 (宽, 高, 网格大小) 缓存，截图时用纯色一次 paste 合成，不再逐条绘制线和坐标
+
+用法:
+    font = get_font(14)
+    mask = grid_overlay(1080, 2400, 100)
+    img.paste(GRID_RGB, (0, 0), mask)
+"""
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+# 字体候选（按顺序尝试，找到即止）
+FONT_CANDIDATES = (
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+# 网格样式（与原逐条绘制一致）
+GRID_COLOR = (255, 0, 0, 80)     # 半透明红色
+GRID_TEXT_COLOR = (255, 0, 0, 200)  # 红色文字
+GRID_FONT_SIZE = 11
+# 网格线和坐标文字颜色相同，只有透明度不同：合成时用纯色 + 蒙版即可
+GRID_RGB = GRID_COLOR[:3]
+
+
+@lru_cache(maxsize=1)
+def _font_path() -> str:
+    """第一个存在的候选字体路径（空字符串表示没有）"""
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    return ''
+
+
+@lru_cache(maxsize=32)
+def get_font(size: int) -> ImageFont.ImageFont:
+    """
+    获取指定字号的字体（进程级缓存）
+
+    Args:
+        size: 字号（像素）
+    """
+    size = max(1, int(size))
+    path = _font_path()
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    try:
+        # Pillow >= 10.1 自带可缩放字体
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=3)
+def grid_overlay(width: int, height: int, grid_size: int) -> Image.Image:
+    """
+    预渲染网格蒙版（只缓存 L 通道，1440x3200 约 4.6MB，缓存少量尺寸即可）
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        grid_size: 网格间距（像素）
+
+    Returns:
+        L 透明度蒙版，只读共享，用 img.paste(GRID_RGB, (0, 0), mask) 合成
+    """
+    layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    font = get_font(GRID_FONT_SIZE)
+
+    # 垂直网格线 + 顶部 X 坐标
+    for x in range(0, width, grid_size):
+        draw.line([(x, 0), (x, height)], fill=GRID_COLOR, width=1)
+        draw.text((x + 2, 2), str(x), fill=GRID_TEXT_COLOR, font=font)
+
+    # 水平网格线 + 左侧 Y 坐标
+    for y in range(0, height, grid_size):
+        draw.line([(0, y), (width, y)], fill=GRID_COLOR, width=1)
+        draw.text((2, y + 2), str(y), fill=GRID_TEXT_COLOR, font=font)
+
+    return layer.getchannel('A')
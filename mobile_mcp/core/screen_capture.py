@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕抓取 - 统一的 Android 截图后端
+
+功能：
+1. u2:  u2.screenshot()（设备端 PNG/JPEG 编码，本地解码）
+2. raw: adb exec-out screencap（不带 -p，原始帧缓冲），本地直接包装为 numpy，
+        两端都没有 PNG 编解码；屏幕尺寸取自帧头，省一次 u2.info RPC
+3. 后端由 DynamicConfig.screenshot_backend 选择，raw 失败自动回退 u2
+4. 区域抓取：设备端只截出裁剪区域所在的行再传输（局部确认截图）
+
+screencap 原始输出格式：
+    头部 width(u32) height(u32) format(u32) [colorspace(u32)，Android 9+]，
+    随后是 width * height * bpp 字节像素数据（小端）
+
+用法:
+    capture = ScreenCapture(client)
+    frame = capture.capture()          # 按配置的后端抓取
+    frame = capture.capture('raw')     # 指定后端
+    region, left, top = capture.capture_region(540, 1200, 300)
+"""
+import subprocess
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from mobile_mcp.core.screen_frame import ScreenFrame
+
+
+# screencap 像素格式（android.graphics.PixelFormat）-> (每像素字节数, 转 RGB 的 cv2 颜色转换码)
+_PIXEL_FORMATS: Dict[int, Tuple[int, int]] = {
+    1: (4, cv2.COLOR_RGBA2RGB),      # RGBA_8888
+    2: (4, cv2.COLOR_RGBA2RGB),      # RGBX_8888
+    3: (3, -1),                      # RGB_888（无需转换）
+    4: (2, cv2.COLOR_BGR5652RGB),    # RGB_565（R 在高位，对应 OpenCV 的 BGR565）
+    5: (4, cv2.COLOR_BGRA2RGB),      # BGRA_8888
+}
+
+# 区域抓取时的设备端临时文件（不带扩展名，screencap 写原始格式）
+_REGION_FILE = '/data/local/tmp/mobile_mcp_region.raw'
+
+
+def screencap_geometry_header(data: bytes) -> Tuple[int, int, int]:
+    """帧头中的 (宽, 高, 像素格式)"""
+    width, height, pixel_format = np.frombuffer(data, dtype='<u4', count=3)
+    return int(width), int(height), int(pixel_format)
+
+
+def screencap_geometry(data: bytes) -> Tuple[int, int, int, int]:
+    """
+    解析 screencap 原始输出的帧头
+
+    头部长度（12 或 16 字节）由数据总长度推断，兼容 Android 9 前后的格式
+
+    Args:
+        data: exec-out screencap 的完整 stdout
+
+    Returns:
+        (宽, 高, 像素格式, 头部长度)
+    """
+    if len(data) < 12:
+        raise ValueError(f"screencap 输出过短: {len(data)} 字节")
+    width, height, pixel_format = screencap_geometry_header(data)
+    if pixel_format not in _PIXEL_FORMATS:
+        raise ValueError(f"不支持的 screencap 像素格式: {pixel_format}")
+    bpp = _PIXEL_FORMATS[pixel_format][0]
+
+    header = len(data) - width * height * bpp
+    if header not in (12, 16):
+        raise ValueError(f"screencap 数据长度不匹配: {len(data)} 字节, {width}x{height} 格式{pixel_format}")
+    return width, height, pixel_format, header
+
+
+def _to_rgb(pixels: np.ndarray, pixel_format: int) -> np.ndarray:
+    conversion = _PIXEL_FORMATS[pixel_format][1]
+    if conversion < 0:
+        return pixels
+    return cv2.cvtColor(np.ascontiguousarray(pixels), conversion)
+
+
+def parse_screencap_raw(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """
+    解析 screencap 原始输出
+
+    Args:
+        data: exec-out screencap 的 stdout
+
+    Returns:
+        (RGB 数组, 宽, 高)
+    """
+    width, height, pixel_format, header = screencap_geometry(data)
+    bpp = _PIXEL_FORMATS[pixel_format][0]
+    pixels = np.frombuffer(data, dtype=np.uint8, offset=header).reshape(height, width, bpp)
+    return _to_rgb(pixels, pixel_format), width, height
+
+
+class ScreenCapture:
+    """
+    Android 屏幕抓取器
+
+    后端：
+    - u2:  u2.screenshot()（默认）
+    - raw: adb exec-out screencap 原始帧（无 PNG 编解码，传输量更大，适合 USB 3 / 模拟器）
+    """
+
+    BACKENDS = ('u2', 'raw')
+
+    def __init__(self, mobile_client, timeout: float = 10.0):
+        """
+        初始化抓取器
+
+        Args:
+            mobile_client: MobileClient实例
+            timeout: 单次 adb 调用超时（秒）
+        """
+        self.client = mobile_client
+        self.timeout = timeout
+        # 某个后端在当前设备上失败过就不再尝试
+        self._disabled: Dict[str, str] = {}
+        # 原始帧几何信息 (宽, 高, 像素格式, 头部长度)，区域抓取按它计算字节偏移
+        self._geometry: Optional[Tuple[int, int, int, int]] = None
+
+    def _configured_backend(self) -> str:
+        try:
+            from mobile_mcp.core.dynamic_config import DynamicConfig
+            backend = DynamicConfig.screenshot_backend
+        except ImportError:
+            backend = 'u2'
+        return backend if backend in self.BACKENDS else 'u2'
+
+    def capture(self, backend: Optional[str] = None) -> ScreenFrame:
+        """
+        抓取一帧
+
+        Args:
+            backend: 指定后端，None 使用 DynamicConfig.screenshot_backend
+
+        Returns:
+            ScreenFrame实例
+        """
+        if backend:
+            return self._run(backend)
+
+        backend = self._configured_backend()
+        if backend == 'raw' and 'raw' not in self._disabled:
+            try:
+                return self._run('raw')
+            except Exception as e:
+                self._disabled['raw'] = str(e)
+                print(f"  ⚠️  raw 截图失败，切换 u2: {e}", file=sys.stderr)
+        return self._run('u2')
+
+    def _run(self, backend: str) -> ScreenFrame:
+        """执行指定后端"""
+        if backend == 'u2':
+            return self.capture_u2()
+        elif backend == 'raw':
+            return self.capture_raw()
+        raise ValueError(f"不支持的截图后端: {backend}")
+
+    def capture_u2(self) -> ScreenFrame:
+        """u2.screenshot()：设备端编码，本地解码一次"""
+        captured_at = time.time()
+        image = self.client.u2.screenshot()
+        info = self.client.u2.info
+        return ScreenFrame.from_image(image, info.get('displayWidth', 0), info.get('displayHeight', 0),
+                                      captured_at)
+
+    def _exec_out(self, command: str) -> bytes:
+        device_manager = self.client.device_manager
+        cmd = [device_manager.adb_path]
+        if device_manager.current_device_id:
+            cmd += ['-s', device_manager.current_device_id]
+        result = subprocess.run(cmd + ['exec-out', command], capture_output=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"screencap 失败: {result.stderr.decode('utf-8', errors='replace')[:100]}")
+        return result.stdout
+
+    def capture_raw(self) -> ScreenFrame:
+        """exec-out screencap：原始帧缓冲直接包装为 numpy"""
+        captured_at = time.time()
+        data = self._exec_out('screencap')
+        self._geometry = screencap_geometry(data)
+        array, width, height = parse_screencap_raw(data)
+        return ScreenFrame(array, width, height, captured_at)
+
+    @property
+    def region_available(self) -> bool:
+        """区域抓取是否可用（adb 调用失败过则不再尝试）"""
+        return 'region' not in self._disabled
+
+    def capture_region(self, center_x: int, center_y: int, size: int) -> Tuple[ScreenFrame, int, int]:
+        """
+        区域抓取：只传输包含区域的整行像素
+
+        原始帧按行连续存放，设备端把帧写入临时文件后用 head / tail 截出帧头和
+        [top, bottom) 行的字节，本地校验帧头后再按列切片；传输量约为整帧的 size / 屏幕高度。
+        帧几何信息（宽高、像素格式、头部长度）来自最近一次整帧 raw 抓取，没有时先抓一次整帧。
+
+        Args:
+            center_x: 区域中心 X（像素）
+            center_y: 区域中心 Y（像素）
+            size: 区域边长（以中心向两侧各取 size // 2，超出屏幕的部分截断）
+
+        Returns:
+            (区域帧, 左上角 X, 左上角 Y)
+        """
+        if not self.region_available:
+            raise RuntimeError(f"区域抓取不可用: {self._disabled['region']}")
+        if self._geometry is None:
+            try:
+                frame = self.capture_raw()
+            except Exception as e:
+                # raw 抓取不可用，区域抓取也无从学习帧信息，不再重试
+                self._disabled['region'] = str(e)
+                raise
+            return self._crop(frame, center_x, center_y, size)
+
+        width, height, pixel_format, header = self._geometry
+        half = size // 2
+        left, top = max(0, center_x - half), max(0, center_y - half)
+        right, bottom = min(width, center_x + half), min(height, center_y + half)
+        if right <= left or bottom <= top:
+            raise ValueError(f"裁剪区域超出屏幕: ({center_x}, {center_y}) size={size}")
+
+        bpp = _PIXEL_FORMATS[pixel_format][0]
+        row_bytes = width * bpp
+        offset = header + top * row_bytes
+        length = (bottom - top) * row_bytes
+
+        # 帧先写到设备临时文件，帧头和区域行都从文件精确截取（管道读取无法保证按字节切分）；
+        # 读完即删除临时文件（整帧约 10MB），保留截取命令的退出码
+        captured_at = time.time()
+        try:
+            data = self._exec_out(f"screencap {_REGION_FILE} && head -c {header} {_REGION_FILE} && "
+                                  f"tail -c +{offset + 1} {_REGION_FILE} | head -c {length}; "
+                                  f"status=$?; rm -f {_REGION_FILE}; exit $status")
+        except Exception as e:
+            self._disabled['region'] = str(e)
+            raise
+        if len(data) != header + length or screencap_geometry_header(data) != (width, height, pixel_format):
+            # 屏幕旋转 / 分辨率变化：几何信息失效，下次重新学习
+            self._geometry = None
+            raise RuntimeError("屏幕尺寸已变化，区域抓取需要重新获取帧信息")
+
+        band = np.frombuffer(data, dtype=np.uint8, offset=header).reshape(bottom - top, width, bpp)
+        array = _to_rgb(band[:, left:right], pixel_format)
+        return ScreenFrame(array, width, height, captured_at), left, top
+
+    @staticmethod
+    def _crop(frame: ScreenFrame, center_x: int, center_y: int, size: int) -> Tuple[ScreenFrame, int, int]:
+        half = size // 2
+        left, top = max(0, center_x - half), max(0, center_y - half)
+        right, bottom = min(frame.width, center_x + half), min(frame.height, center_y + half)
+        return frame.crop((left, top, right, bottom)), left, top
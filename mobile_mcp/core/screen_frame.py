@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存截图帧 - 截图只解码一次，PIL 与 numpy 共享同一块内存
+
+功能：
+1. 帧数据以 RGB uint8 数组 (H, W, 3) 保存，只在抓取时解码一次
+2. .pil 是零拷贝的 PIL 视图（只读，ImageDraw 绘制时 PIL 会自动复制，不会改动原帧）
+3. .array 是 numpy 数组本身；.gray / .bgr 供 OpenCV 使用，按需计算并缓存
+4. 只有最终产物才写盘，可选后台线程写入
+
+用法:
+    frame = ScreenFrame.from_image(u2.screenshot(), screen_width, screen_height)
+    frame.pil                      # PIL.Image（零拷贝）
+    frame.array                    # numpy (H, W, 3) RGB
+    frame.gray                     # numpy (H, W) 灰度，TemplateMatcher 直接使用
+    frame.crop((l, t, r, b))       # 裁剪（numpy 切片）
+    frame.save(path, 'JPEG', quality=85, background=True)
+"""
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+# 后台写盘线程（单线程，保证同一调用方的写入顺序）
+_writer: Optional[ThreadPoolExecutor] = None
+
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frame-writer')
+    return _writer
+
+
+class ScreenFrame:
+    """内存中的一帧截图"""
+
+    def __init__(self, array: np.ndarray, screen_width: int = 0, screen_height: int = 0,
+                 captured_at: Optional[float] = None):
+        """
+        Args:
+            array: RGB uint8 数组 (H, W, 3)
+            screen_width: 设备屏幕宽度（坐标系，iOS 为逻辑宽度）
+            screen_height: 设备屏幕高度
+            captured_at: 抓取时间，None 表示当前时间
+        """
+        self.array = array
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.captured_at = captured_at if captured_at is not None else time.time()
+
+        self._pil: Optional[Image.Image] = None
+        self._gray: Optional[np.ndarray] = None
+        self._bgr: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_image(cls, image: Image.Image, screen_width: int = 0, screen_height: int = 0,
+                   captured_at: Optional[float] = None) -> 'ScreenFrame':
+        """从已解码的 PIL 图片构建（u2 / wda 的 screenshot() 返回值）"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return cls(np.asarray(image), screen_width, screen_height, captured_at)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, screen_width: int = 0, screen_height: int = 0,
+                   captured_at: Optional[float] = None) -> 'ScreenFrame':
+        """从 PNG / JPEG 编码数据解码"""
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        bgr = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("截图数据解码失败")
+        frame = cls(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB), screen_width, screen_height, captured_at)
+        frame._bgr = bgr
+        return frame
+
+    # ==================== 视图 ====================
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def pil(self) -> Image.Image:
+        """零拷贝 PIL 视图（只读；在其上绘制时 PIL 会先复制）"""
+        if self._pil is None:
+            array = np.ascontiguousarray(self.array)
+            self._pil = Image.frombuffer('RGB', (array.shape[1], array.shape[0]), array, 'raw', 'RGB', 0, 1)
+        return self._pil
+
+    @property
+    def gray(self) -> np.ndarray:
+        """灰度图（模板匹配用）"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.array, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """BGR 数组（OpenCV 习惯格式）"""
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self.array, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    def crop(self, box: Tuple[int, int, int, int]) -> 'ScreenFrame':
+        """
+        裁剪（numpy 切片，不复制像素）
+
+        Args:
+            box: (left, top, right, bottom)，超出范围会被截断
+        """
+        left, top, right, bottom = box
+        left, top = max(0, left), max(0, top)
+        right, bottom = min(self.width, right), min(self.height, bottom)
+        return ScreenFrame(self.array[top:bottom, left:right], self.screen_width,
+                           self.screen_height, self.captured_at)
+
+    # ==================== 写盘 ====================
+
+    def save(self, path: str, format: Optional[str] = None, background: bool = False,
+             **params) -> Optional[Future]:
+        """
+        保存为图片文件（只在需要最终产物时调用）
+
+        Args:
+            path: 文件路径
+            format: 'PNG' / 'JPEG' 等，None 按扩展名推断
+            background: 是否在后台线程写入
+            **params: 传给 PIL Image.save 的参数（quality 等）
+
+        Returns:
+            后台写入时返回 Future，否则返回 None
+        """
+        return save_image(self.pil, path, format, background, **params)
+
+
+def save_image(image: Image.Image, path: str, format: Optional[str] = None,
+               background: bool = False, **params) -> Optional[Future]:
+    """
+    保存 PIL 图片，可选后台线程写入（标注后的图片也走这里）
+
+    Returns:
+        后台写入时返回 Future，否则返回 None
+    """
+    if not background:
+        image.save(path, format, **params)
+        return None
+
+    def write():
+        try:
+            image.save(path, format, **params)
+        except Exception as e:
+            print(f"  ⚠️  截图后台写入失败: {path}: {e}", file=sys.stderr)
+            raise
+
+    return _get_writer().submit(write)
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持续屏幕流 - 后台读取设备视频流，截图工具直接取最新帧
+
+功能：
+1. 后台线程从连续流读取帧，放入固定长度的环形缓冲（deque(maxlen)，内存有上限）
+2. 流来源：
+   - MJPEG：HTTP multipart（如 WDA 的 9100 端口）或任意输出 JPEG 序列的命令
+   - H.264：adb exec-out screenrecord，经可选的 ffmpeg 管道解码为 RGB 原始帧
+     （未安装 ffmpeg 时流不可用，截图自动回退到单次抓取）
+3. 帧按到达时间标记，wait_for_frame(after=操作时间) 返回操作之后的最新帧；
+   超过 max_age 的旧帧一律不用，操作后已空闲一段时间（画面静止）时不再等待新帧
+4. JPEG 帧只在被取用时才解码
+5. LocalStreamProducer：本地替身流，测试时不需要真机
+
+注意：
+    screenrecord 只在画面变化时输出帧，且单次最长 3 分钟（结束后自动重连）；
+    画面静止时等不到新帧，wait_for_frame 直接返回 None，由调用方回退到单次截图。默认关闭
+    （环境变量 SCREEN_STREAM=true 开启，SCREEN_STREAM_URL 指定 MJPEG 地址）。
+
+用法:
+    stream = ScreenStream(client)
+    stream.start()
+    frame = stream.wait_for_frame(after=client.hierarchy_cache.last_action_time, timeout=0.5)
+
+    # 测试
+    producer = LocalStreamProducer(stream)
+    producer.emit(pil_image)
+"""
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from mobile_mcp.core.screen_frame import ScreenFrame
+
+
+_JPEG_SOI = b'\xff\xd8'
+_JPEG_EOI = b'\xff\xd9'
+
+
+class MJPEGParser:
+    """
+    MJPEG 字节流切帧：按 JPEG 的 SOI / EOI 标记切分，
+    兼容 HTTP multipart 边界和无边界的裸 JPEG 序列
+    """
+
+    def __init__(self, max_buffer: int = 8 * 1024 * 1024):
+        """
+        Args:
+            max_buffer: 缓冲上限（字节），超过仍未找到完整帧则丢弃，防止异常流占满内存
+        """
+        self.max_buffer = max_buffer
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        写入一段数据
+
+        Returns:
+            本次凑齐的完整 JPEG 帧列表
+        """
+        self._buffer += chunk
+        frames = []
+        while True:
+            start = self._buffer.find(_JPEG_SOI)
+            if start < 0:
+                self._buffer.clear()
+                break
+            end = self._buffer.find(_JPEG_EOI, start + 2)
+            if end < 0:
+                del self._buffer[:start]
+                if len(self._buffer) > self.max_buffer:
+                    self._buffer.clear()
+                break
+            frames.append(bytes(self._buffer[start:end + 2]))
+            del self._buffer[:end + 2]
+        return frames
+
+
+class MJPEGSource:
+    """MJPEG 流来源（HTTP 地址或命令输出）"""
+
+    def __init__(self, opener: Callable, name: str = 'mjpeg', chunk_size: int = 64 * 1024):
+        """
+        Args:
+            opener: 无参函数，返回 (二进制可读对象, 关闭函数)
+            name: 来源名称（日志 / 统计）
+            chunk_size: 每次读取的字节数
+        """
+        self.opener = opener
+        self.name = name
+        self.chunk_size = chunk_size
+        self._close: Optional[Callable] = None
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 10.0) -> 'MJPEGSource':
+        """HTTP MJPEG 地址（例如 WDA 的 http://localhost:9100）"""
+        def opener():
+            response = urllib.request.urlopen(url, timeout=timeout)
+            return response, response.close
+        return cls(opener, name=f'mjpeg:{url}')
+
+    @classmethod
+    def from_command(cls, command: List[str]) -> 'MJPEGSource':
+        """输出 JPEG 序列的命令"""
+        def opener():
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                       stdin=subprocess.DEVNULL)
+            return process.stdout, lambda: _terminate(process)
+        return cls(opener, name=f'mjpeg:{command[0]}')
+
+    def frames(self) -> Iterator[bytes]:
+        """逐帧产出 JPEG 数据（流结束时返回）"""
+        reader, self._close = self.opener()
+        parser = MJPEGParser()
+        try:
+            while True:
+                chunk = reader.read1(self.chunk_size) if hasattr(reader, 'read1') else reader.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield from parser.feed(chunk)
+        finally:
+            self.close()
+
+    def close(self):
+        close, self._close = self._close, None
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+class H264Source:
+    """
+    screenrecord H.264 流来源（需要 ffmpeg）
+
+    adb exec-out screenrecord --output-format=h264 - | ffmpeg -> rgb24 原始帧
+    """
+
+    def __init__(self, mobile_client, width: int, height: int, bit_rate: int = 4000000):
+        """
+        Args:
+            mobile_client: MobileClient实例（用于拼 adb 命令）
+            width: 输出宽度（屏幕原始宽度）
+            height: 输出高度（屏幕原始高度）
+            bit_rate: screenrecord 码率
+        """
+        self.client = mobile_client
+        self.width = width
+        self.height = height
+        self.bit_rate = bit_rate
+        self.name = 'h264'
+        self._processes: List[subprocess.Popen] = []
+
+    def frames(self) -> Iterator[np.ndarray]:
+        """逐帧产出 RGB 数组（screenrecord 结束时返回）"""
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            raise RuntimeError("H.264 屏幕流需要 ffmpeg（未找到），可改用 SCREEN_STREAM_URL 指定 MJPEG 来源")
+
+        device_manager = self.client.device_manager
+        adb = [device_manager.adb_path]
+        if device_manager.current_device_id:
+            adb += ['-s', device_manager.current_device_id]
+        record = subprocess.Popen(
+            adb + ['exec-out', 'screenrecord', '--output-format=h264',
+                   f'--size={self.width}x{self.height}', f'--bit-rate={self.bit_rate}', '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+        decoder = subprocess.Popen(
+            [ffmpeg, '-loglevel', 'error', '-f', 'h264', '-i', 'pipe:0',
+             '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'],
+            stdin=record.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        record.stdout.close()
+        self._processes = [decoder, record]
+
+        frame_bytes = self.width * self.height * 3
+        try:
+            while True:
+                data = decoder.stdout.read(frame_bytes)
+                if len(data) < frame_bytes:
+                    return
+                yield np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+        finally:
+            self.close()
+
+    def close(self):
+        processes, self._processes = self._processes, []
+        for process in processes:
+            _terminate(process)
+
+
+def _terminate(process: subprocess.Popen):
+    try:
+        process.terminate()
+        process.wait(timeout=2)
+    except Exception:
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+class _StreamEntry:
+    """环形缓冲中的一帧（JPEG 在取用时才解码，同一帧只解码一次）"""
+
+    __slots__ = ('sequence', 'received_at', 'payload', '_frame')
+
+    def __init__(self, sequence: int, received_at: float, payload):
+        self.sequence = sequence
+        self.received_at = received_at
+        self.payload = payload
+        self._frame: Optional[ScreenFrame] = None
+
+    def frame(self, screen_size: Tuple[int, int]) -> ScreenFrame:
+        if self._frame is None:
+            payload = self.payload
+            width, height = screen_size
+            if isinstance(payload, ScreenFrame):
+                frame = payload
+            elif isinstance(payload, (bytes, bytearray)):
+                frame = ScreenFrame.from_bytes(payload, width, height, self.received_at)
+            elif isinstance(payload, Image.Image):
+                frame = ScreenFrame.from_image(payload, width, height, self.received_at)
+            else:
+                frame = ScreenFrame(payload, width, height, self.received_at)
+            if not frame.screen_width:
+                frame.screen_width, frame.screen_height = frame.width, frame.height
+            self._frame = frame
+            self.payload = None
+        return self._frame
+
+
+class ScreenStream:
+    """
+    持续屏幕流
+
+    reader 线程 / LocalStreamProducer 通过 push() 写入帧，
+    截图方通过 wait_for_frame() 取「某时刻之后到达」的最新帧。
+    """
+
+    def __init__(self, mobile_client=None, source=None, maxlen: int = 3,
+                 latency: float = 0.15, wait_timeout: float = 0.5, max_restarts: int = 5,
+                 max_age: float = 1.0, idle_after: float = 1.0):
+        """
+        初始化屏幕流
+
+        Args:
+            mobile_client: MobileClient实例，只用本地替身时可为 None
+            source: 流来源（MJPEGSource / H264Source），None 时 start() 按平台和环境变量选择
+            maxlen: 环形缓冲帧数（内存上限 = maxlen × 单帧大小）
+            latency: 编码 / 传输延迟（秒），帧到达时间需晚于 操作时间 + latency 才算操作之后的画面
+            wait_timeout: 截图时等待新帧的默认超时（秒），超时后回退单次抓取
+            max_restarts: 流中断后的最大连续重连次数
+            max_age: 帧的最大可用年龄（秒），更旧的帧不能代表当前画面
+            idle_after: 操作之后超过此时长（秒）仍没有可用帧视为画面静止，不再等待
+        """
+        self.client = mobile_client
+        self.source = source
+        self.latency = latency
+        self.wait_timeout = wait_timeout
+        self.max_restarts = max_restarts
+        self.max_age = max_age
+        self.idle_after = idle_after
+
+        self._frames: deque = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.error = ''
+
+        # 帧对应的屏幕坐标尺寸（流可能被缩小，坐标仍按屏幕尺寸换算）
+        self.screen_size: Tuple[int, int] = (0, 0)
+
+        # 统计
+        self.sequence = 0
+        self.served = 0
+        self.misses = 0
+        self.restarts = 0
+
+    # ==================== 生命周期 ====================
+
+    @property
+    def active(self) -> bool:
+        """流是否可用（不可用时截图回退单次抓取）"""
+        return self._running
+
+    def _default_source(self):
+        import os
+        url = os.environ.get('SCREEN_STREAM_URL')
+        if url:
+            return MJPEGSource.from_url(url)
+        if self.client is None or getattr(self.client, 'platform', 'android') != 'android':
+            raise RuntimeError("未指定屏幕流来源（iOS 请设置 SCREEN_STREAM_URL，例如 WDA 的 MJPEG 端口）")
+        width, height = self.screen_size
+        if not (width and height):
+            raise RuntimeError("无法获取屏幕尺寸，屏幕流不可用")
+        # 按屏幕原始分辨率录制：SoM / 网格 / 裁剪都直接使用屏幕坐标，帧必须与屏幕同尺寸
+        return H264Source(self.client, width // 2 * 2, height // 2 * 2)
+
+    def _detect_screen_size(self):
+        if self.screen_size[0] or self.client is None:
+            return
+        try:
+            if getattr(self.client, 'platform', 'android') == 'ios':
+                size = self.client._ios_client.wda.window_size()
+                self.screen_size = (size[0], size[1])
+            else:
+                info = self.client.u2.info
+                self.screen_size = (info.get('displayWidth', 0), info.get('displayHeight', 0))
+        except Exception:
+            pass
+
+    def start(self) -> bool:
+        """
+        启动后台读取线程
+
+        Returns:
+            是否启动成功
+        """
+        with self._cond:
+            if self._running:
+                return True
+        try:
+            self._detect_screen_size()
+            if self.source is None:
+                self.source = self._default_source()
+        except Exception as e:
+            self.error = str(e)
+            print(f"  ⚠️  屏幕流启动失败，使用单次截图: {e}", file=sys.stderr)
+            return False
+        with self._cond:
+            self._running = True
+            self.error = ''
+            self._thread = threading.Thread(target=self._read_loop, name='screen-stream', daemon=True)
+            self._thread.start()
+        print(f"  📺 屏幕流已启动: {self.source.name}", file=sys.stderr)
+        return True
+
+    def start_local(self):
+        """本地替身模式：不启动读取线程，帧全部由 LocalStreamProducer 写入"""
+        with self._cond:
+            self._running = True
+            self.error = ''
+
+    def stop(self):
+        """停止屏幕流"""
+        with self._cond:
+            self._running = False
+            self._frames.clear()
+            self._cond.notify_all()
+        if self.source is not None:
+            self.source.close()
+
+    def _read_loop(self):
+        """reader 线程：读取流，流结束（如 screenrecord 3 分钟上限）后重连"""
+        failures = 0
+        while self._running:
+            received = self.sequence
+            try:
+                for payload in self.source.frames():
+                    if not self._running:
+                        return
+                    self.push(payload)
+            except Exception as e:
+                self.error = str(e)
+            if not self._running:
+                return
+            failures = 0 if self.sequence > received else failures + 1
+            if failures > self.max_restarts or (failures and self.error and self.sequence == 0):
+                break
+            self.restarts += 1
+            time.sleep(0.5)
+
+        with self._cond:
+            if self._running:
+                self._running = False
+                self.error = self.error or "屏幕流已结束"
+                print(f"  ⚠️  屏幕流中断，回退单次截图: {self.error}", file=sys.stderr)
+            self._cond.notify_all()
+
+    # ==================== 帧写入 ====================
+
+    def push(self, payload: Union[bytes, np.ndarray, Image.Image, ScreenFrame],
+             received_at: Optional[float] = None):
+        """
+        写入一帧（超出 maxlen 时最旧的帧被丢弃）
+
+        Args:
+            payload: JPEG 数据 / RGB 数组 / PIL 图片 / ScreenFrame
+            received_at: 到达时间，None 表示当前时间
+        """
+        with self._cond:
+            self.sequence += 1
+            self._frames.append(_StreamEntry(self.sequence, received_at or time.time(), payload))
+            self._cond.notify_all()
+
+    # ==================== 读取 API ====================
+
+    def latest(self) -> Optional[ScreenFrame]:
+        """最新一帧（没有帧时返回 None）"""
+        with self._cond:
+            entry = self._frames[-1] if self._frames else None
+        return entry.frame(self.screen_size) if entry else None
+
+    def wait_for_frame(self, after: float = 0.0, timeout: Optional[float] = None) -> Optional[ScreenFrame]:
+        """
+        等待「after + latency 之后到达」且不超过 max_age 的最新帧
+
+        操作之后已超过 idle_after（或从未操作）且没有可用帧时，画面大概率静止
+        （screenrecord 不会再出帧），直接返回 None，不等待
+
+        Args:
+            after: 时间戳（通常是最近一次界面操作的时间，0 表示尚无操作）
+            timeout: 最大等待时间（秒），None 使用 wait_timeout
+
+        Returns:
+            ScreenFrame实例；超时、画面静止或流不可用返回 None（调用方应回退单次截图）
+        """
+        now = time.time()
+        threshold = max(after + self.latency, now - self.max_age)
+        idle = now - after > self.idle_after
+        deadline = now + (self.wait_timeout if timeout is None else timeout)
+        with self._cond:
+            while True:
+                if self._frames and self._frames[-1].received_at > threshold:
+                    entry = self._frames[-1]
+                    break
+                remaining = deadline - time.time()
+                if not self._running or idle or remaining <= 0:
+                    self.misses += 1
+                    return None
+                self._cond.wait(remaining)
+            self.served += 1
+        return entry.frame(self.screen_size)
+
+    def stats(self) -> Dict:
+        """获取屏幕流统计"""
+        with self._cond:
+            latest = self._frames[-1] if self._frames else None
+            return {
+                'active': self._running,
+                'source': getattr(self.source, 'name', None),
+                'frames': self.sequence,
+                'buffered': len(self._frames),
+                'served': self.served,
+                'misses': self.misses,
+                'restarts': self.restarts,
+                'latest_age': round(time.time() - latest.received_at, 3) if latest else None,
+                'error': self.error,
+            }
+
+
+class LocalStreamProducer:
+    """
+    本地替身屏幕流（测试用）
+
+    用法:
+        stream = ScreenStream()
+        producer = LocalStreamProducer(stream, screen_size=(1080, 2400))
+        producer.emit(Image.new('RGB', (1080, 2400)))
+        producer.feed(mjpeg_bytes)                      # 走 MJPEG 切帧
+        producer.play([(0.1, image1), (0.2, image2)])
+    """
+
+    def __init__(self, stream: ScreenStream, screen_size: Tuple[int, int] = (0, 0)):
+        self.stream = stream
+        self.parser = MJPEGParser()
+        if screen_size[0]:
+            stream.screen_size = screen_size
+        stream.start_local()
+
+    def emit(self, image: Union[bytes, np.ndarray, Image.Image]):
+        """立即写入一帧"""
+        self.stream.push(image)
+
+    def feed(self, data: bytes):
+        """按 MJPEG 字节流格式写入（可以是不完整的片段）"""
+        for jpeg in self.parser.feed(data):
+            self.stream.push(jpeg)
+
+    def play(self, frames: List[Tuple[float, Union[bytes, np.ndarray, Image.Image]]]) -> threading.Thread:
+        """
+        在后台线程中按时间间隔依次写入帧
+
+        Args:
+            frames: [(距上一帧的秒数, 帧), ...]
+
+        Returns:
+            后台线程
+        """
+        def run():
+            for delay, image in frames:
+                time.sleep(delay)
+                self.stream.push(image)
+
+        thread = threading.Thread(target=run, name='screen-stream-local-producer', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图去重缓存 - 画面未变化时复用上次的截图文件
+
+功能：
+1. 对降采样灰度图计算差值哈希（dHash），单次计算约 1ms，不需要编码
+2. 相同截图参数、且上次截图之后没有界面操作（操作计数未变）时，
+   哈希差异不超过容差即认为画面未变化，直接返回上次的文件路径和元数据（跳过缩放 / 编码 / 写盘）
+3. 文件被删除后自动失效；每组参数只保留最近一次结果，内存占用固定
+
+说明：
+    description 决定文件名，参与缓存键（命中时文件名与本次调用一致）。
+    操作计数取 HierarchyCache.invalidations，只有界面操作才会变化；
+    层级 dump（轮询、SoM、TTL 刷新）不影响去重。
+    哈希取 32x32（1024 位），默认容差 4 位：状态栏时钟、光标闪烁约改变 2~3 位，
+    弹窗、页面切换改变上百位；操作后的第一张截图一定重新编码。
+
+用法:
+    cache = ScreenshotDedupCache()
+    key = ('compress', 720, 75)
+    frame_hash = cache.hash(frame.gray)
+    cached = cache.lookup(key, frame_hash, actions)
+    if cached is None:
+        result = ...  # 正常编码写盘
+        cache.store(key, frame_hash, result, actions)
+"""
+import os
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(gray: np.ndarray, hash_size: int = 16) -> int:
+    """
+    差值哈希：缩放到 (hash_size+1) x hash_size，比较水平相邻像素
+
+    Args:
+        gray: 灰度图 (H, W)
+        hash_size: 哈希边长，结果为 hash_size² 位
+
+    Returns:
+        哈希值（int）
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    """两个哈希的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+class ScreenshotDedupCache:
+    """截图去重缓存（按截图参数分组，每组保留最近一次结果）"""
+
+    def __init__(self, tolerance: int = 4, hash_size: int = 32):
+        """
+        Args:
+            tolerance: 允许的汉明距离（位）
+            hash_size: dHash 边长
+        """
+        self.tolerance = tolerance
+        self.hash_size = hash_size
+        self._entries: Dict[Hashable, Tuple[int, int, Dict]] = {}
+        self._lock = threading.Lock()
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+
+    def hash(self, gray: np.ndarray) -> int:
+        """计算帧哈希"""
+        return dhash(gray, self.hash_size)
+
+    def lookup(self, key: Hashable, frame_hash: int, version: int) -> Optional[Dict]:
+        """
+        查找画面未变化时可复用的结果
+
+        Args:
+            key: 截图参数（模式、尺寸、质量、裁剪区域等）
+            frame_hash: 当前帧哈希
+            version: 界面操作计数（只在操作后递增），与上次不同时不复用
+
+        Returns:
+            上次结果的副本；未命中返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_hash, cached_version, result = entry
+                if (cached_version == version and hamming(cached_hash, frame_hash) <= self.tolerance
+                        and os.path.exists(result['screenshot_path'])):
+                    self.hits += 1
+                    return dict(result)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def store(self, key: Hashable, frame_hash: int, result: Dict, version: int):
+        """记录本次结果（version 为截图开始前的界面操作计数）"""
+        with self._lock:
+            self._entries[key] = (frame_hash, version, dict(result))
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'tolerance': self.tolerance,
+            }
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图存储 - 内容寻址命名 + 磁盘预算 + LRU 淘汰
+
+功能：
+1. 文件名 = 前缀 + 编码后内容的 blake2b 摘要，同一秒内多次截图不会互相覆盖，
+   内容相同的截图只存一份（再次写入只刷新访问时间）
+2. 容量 / 时长预算：超过 max_bytes 时按最近访问时间淘汰到 90%，
+   超过 max_age 未访问的文件直接删除
+3. index.json 记录 {文件名: [字节数, 最近访问时间]}，启动时加载，
+   按摘要查找不需要扫描目录；目录中不在索引里的旧文件首次维护时补录，同样受预算约束
+4. 写盘（可选）和淘汰 / 索引落盘都在单个后台线程执行，不阻塞截图
+
+配置（环境变量）：
+    SCREENSHOT_STORE_MAX_MB         容量上限，默认 1024
+    SCREENSHOT_STORE_MAX_AGE_HOURS  最长保留时间，默认 168（7 天）
+
+用法:
+    store = ScreenshotStore.for_directory(screenshot_dir)
+    path = store.put(img, "screenshot_android_som", "JPEG", quality=85)
+    store.touch(path)            # 复用已有文件时刷新 LRU
+    store.find(digest)           # 按摘要查找
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+
+_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+INDEX_FILE = 'index.json'
+
+# 每个目录一个实例（多个管理器共用同一份索引）
+_stores: Dict[str, 'ScreenshotStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def encode_image(image: Image.Image, format: str, params: Dict) -> bytes:
+    """编码图片（模块级函数，可在进程池中执行）"""
+    buffer = io.BytesIO()
+    image.save(buffer, format, **params)
+    return buffer.getvalue()
+
+
+def _digest_of(name: str) -> str:
+    """文件名中的内容摘要（前缀_摘要.扩展名）"""
+    return name.rsplit('.', 1)[0].rsplit('_', 1)[-1]
+
+
+class ScreenshotStore:
+    """内容寻址的截图存储"""
+
+    def __init__(self, root: Path, max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        """
+        Args:
+            root: 存储目录
+            max_bytes: 容量上限（字节），None 读取 SCREENSHOT_STORE_MAX_MB
+            max_age: 最长保留时间（秒），None 读取 SCREENSHOT_STORE_MAX_AGE_HOURS
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('SCREENSHOT_STORE_MAX_MB', '1024')) * 1024 * 1024)
+        if max_age is None:
+            max_age = float(os.environ.get('SCREENSHOT_STORE_MAX_AGE_HOURS', '168')) * 3600
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        # {文件名: [字节数, 最近访问时间]}，{摘要: 文件名}
+        self._index: Dict[str, List[float]] = {}
+        self._by_digest: Dict[str, str] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='screenshot-store')
+        self._maintenance_pending = False
+        self._scanned = False
+
+        # 统计
+        self.writes = 0
+        self.reused = 0
+        self.evicted = 0
+
+        self._load_index()
+
+    @classmethod
+    def for_directory(cls, root: Path) -> 'ScreenshotStore':
+        """获取目录对应的共享实例"""
+        key = str(Path(root).resolve())
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = cls(root)
+            return store
+
+    # ==================== 索引 ====================
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / INDEX_FILE
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._index = {name: [int(size), float(accessed)] for name, (size, accessed) in data.items()}
+        except (OSError, ValueError, TypeError):
+            # 索引缺失或损坏：首次维护时扫描目录重建
+            self._index = {}
+        self._total = sum(entry[0] for entry in self._index.values())
+        self._by_digest = {_digest_of(name): name for name in self._index}
+
+    def _save_index(self):
+        with self._lock:
+            data = dict(self._index)
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    def _scan(self):
+        """补录目录中不在索引里的文件（旧版按时间戳命名的截图等），并移除已不存在的条目"""
+        present = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name != INDEX_FILE and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    present[entry.name] = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            for name in list(self._index):
+                if name not in present:
+                    self._remove_entry(name)
+            for name, (size, mtime) in present.items():
+                if name not in self._index:
+                    self._add_entry(name, size, mtime)
+
+    def _add_entry(self, name: str, size: int, accessed: float):
+        self._index[name] = [size, accessed]
+        self._total += size
+        self._by_digest[_digest_of(name)] = name
+
+    def _remove_entry(self, name: str):
+        self._total -= self._index.pop(name)[0]
+        digest = _digest_of(name)
+        if self._by_digest.get(digest) == name:
+            del self._by_digest[digest]
+
+    # ==================== 写入 / 查找 ====================
+
+    def put(self, image: Image.Image, prefix: str, format: str, background: bool = False,
+            run_cpu: Optional[Callable] = None, **params) -> Path:
+        """
+        编码并保存截图
+
+        编码在调用线程完成（文件名依赖编码结果的摘要），background=True 时只把写盘放到后台
+
+        Args:
+            image: PIL 图片
+            prefix: 文件名前缀（如 screenshot_android_som）
+            format: 'JPEG' / 'PNG' / 'WEBP'
+            background: 是否后台写盘（返回时文件可能尚未写完）
+            run_cpu: 执行编码的函数（如 WorkPool.run_cpu，可把编码放到进程池），None 在当前线程编码
+            **params: 传给 PIL Image.save 的参数
+
+        Returns:
+            文件路径
+        """
+        if run_cpu is not None:
+            data = run_cpu(encode_image, image, format, params)
+        else:
+            data = encode_image(image, format, params)
+        return self.put_bytes(data, prefix, format, background)
+
+    def put_bytes(self, data: bytes, prefix: str, format: str, background: bool = False) -> Path:
+        """
+        保存已编码的截图数据
+
+        Args:
+            data: 编码后的数据
+            prefix: 文件名前缀
+            format: 'JPEG' / 'PNG' / 'WEBP'（决定扩展名）
+            background: 是否后台写盘
+
+        Returns:
+            文件路径
+        """
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        name = f"{prefix}_{digest}.{_EXTENSIONS.get(format.upper(), format.lower())}"
+        path = self.root / name
+
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(name)
+            if entry is not None and path.exists():
+                entry[1] = now
+                self.reused += 1
+                self._schedule_maintenance()
+                return path
+            if entry is None:
+                self._add_entry(name, len(data), now)
+            self.writes += 1
+
+        if background:
+            self._executor.submit(self._write, path, data)
+        else:
+            self._write(path, data)
+        self._schedule_maintenance()
+        return path
+
+    def _write(self, path: Path, data: bytes):
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"  ⚠️  截图写入失败: {path}: {e}", file=sys.stderr)
+            raise
+
+    def touch(self, path) -> bool:
+        """刷新文件的最近访问时间（复用已有截图时调用），文件不在存储中返回 False"""
+        name = Path(path).name
+        with self._lock:
+            entry = self._index.get(name)
+            if entry is None:
+                return False
+            entry[1] = time.time()
+        return True
+
+    def find(self, digest: str) -> Optional[Path]:
+        """按内容摘要查找文件"""
+        with self._lock:
+            name = self._by_digest.get(digest)
+        return self.root / name if name else None
+
+    # ==================== 淘汰 ====================
+
+    def _schedule_maintenance(self):
+        """合并维护请求：后台只保留一个待执行的维护任务"""
+        if self._maintenance_pending:
+            return
+        self._maintenance_pending = True
+        self._executor.submit(self._maintain)
+
+    def _maintain(self):
+        self._maintenance_pending = False
+        try:
+            if not self._scanned:
+                self._scan()
+                self._scanned = True
+            self.evict()
+            self._save_index()
+        except Exception as e:
+            print(f"  ⚠️  截图存储维护失败: {e}", file=sys.stderr)
+
+    def evict(self) -> int:
+        """
+        按预算淘汰（超龄文件全部删除；超容量时按最近访问时间删到 90%）
+
+        Returns:
+            删除的文件数
+        """
+        now = time.time()
+        with self._lock:
+            ordered = sorted(self._index.items(), key=lambda item: item[1][1])
+            victims = []
+            total = self._total
+            for name, (size, accessed) in ordered:
+                if now - accessed > self.max_age or total > self.max_bytes * 0.9 and self._total > self.max_bytes:
+                    victims.append(name)
+                    total -= size
+                else:
+                    break
+            for name in victims:
+                self._remove_entry(name)
+
+        for name in victims:
+            try:
+                os.remove(self.root / name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"  ⚠️  截图删除失败: {name}: {e}", file=sys.stderr)
+        self.evicted += len(victims)
+        return len(victims)
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待已提交的后台写盘和维护完成"""
+        future: Future = self._executor.submit(lambda: None)
+        future.result(timeout)
+
+    def stats(self) -> Dict:
+        """获取存储统计"""
+        with self._lock:
+            return {
+                'files': len(self._index),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'max_age': self.max_age,
+                'writes': self.writes,
+                'reused': self.reused,
+                'evicted': self.evicted,
+            }
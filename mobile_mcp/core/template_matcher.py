@@ -4,14 +4,146 @@ OpenCV 模板匹配器 - 用于精确识别广告弹窗X号
 1. 收集常见X号样式建立模板库
 2. 多尺度匹配解决分辨率差异
 3. 返回精确坐标，点击准确率高
+4. 截图可以是文件路径、numpy 数组（BGR / 灰度）或内存帧 ScreenFrame，内存帧不经过磁盘
+5. 模板加载时预计算灰度多尺度金字塔并缓存（按文件修改时间逐个失效），匹配时不再处理模板
+6. 一次匹配运行中所有模板共享 MatchSession：截图只转一次灰度（可选整体缩小），
+   积分图按需计算并缓存，用于 O(1) 排除落在纯色区域上的候选框
 """
 
 import os
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union, TYPE_CHECKING
 from pathlib import Path
 
+if TYPE_CHECKING:
+    from mobile_mcp.core.screen_frame import ScreenFrame
+
+
+# 截图输入：文件路径 / numpy 数组（BGR 或灰度）/ ScreenFrame（取其灰度图）
+ScreenshotInput = Union[str, Path, np.ndarray, 'ScreenFrame']
+
+# 支持的模板图片格式
+TEMPLATE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp']
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    """BGR / BGRA / 灰度 → 灰度（透明通道直接丢弃）"""
+    if len(image.shape) == 3:
+        if image.shape[2] == 4:  # BGRA
+            return cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+class MatchSession:
+    """
+    一次匹配运行共享的截图预处理结果
+    
+    - gray: 全分辨率灰度图（只转换一次）
+    - image: 实际参与匹配的灰度图（downscale < 1 时为 INTER_AREA 缩小后的图）
+    - integral: image 的积分图 / 平方积分图（首次使用时计算）
+    """
+    
+    # 候选框内像素标准差低于此值视为纯色区域（不可能是按钮）
+    MIN_WINDOW_STD = 2.0
+    
+    def __init__(self, screenshot: np.ndarray, downscale: float = 1.0):
+        """
+        Args:
+            screenshot: 截图（BGR / BGRA / 灰度）
+            downscale: 匹配用图的缩放比例（0~1，1 表示原分辨率）
+        """
+        self.gray = _to_gray(screenshot)
+        self.height, self.width = self.gray.shape[:2]
+        self.downscale = min(1.0, max(0.1, float(downscale)))
+        if self.downscale < 1.0:
+            size = (max(1, int(self.width * self.downscale)), max(1, int(self.height * self.downscale)))
+            self.image = cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA)
+        else:
+            self.image = self.gray
+        self._integral: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """原始截图的形状（坐标换算用）"""
+        return self.gray.shape
+    
+    @property
+    def integral(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(积分图, 平方积分图)，float64，形状比 image 各多 1"""
+        if self._integral is None:
+            self._integral = cv2.integral2(self.image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        return self._integral
+    
+    def window_std(self, x: int, y: int, w: int, h: int) -> float:
+        """image 上窗口 (x, y, w, h) 内像素的标准差（积分图 O(1) 计算）"""
+        sums, sq_sums = self.integral
+        n = w * h
+        total = sums[y + h, x + w] - sums[y, x + w] - sums[y + h, x] + sums[y, x]
+        sq_total = sq_sums[y + h, x + w] - sq_sums[y, x + w] - sq_sums[y + h, x] + sq_sums[y, x]
+        return float(np.sqrt(max(0.0, sq_total / n - (total / n) ** 2)))
+
+
+class TemplatePyramid:
+    """
+    模板的灰度多尺度金字塔（加载时计算一次，匹配时只读共享）
+    
+    levels 为 [(缩放比例, 缩放后的灰度模板), ...]，已跳过边长 < 10 的尺度
+    """
+    
+    __slots__ = ('image', 'scales', 'levels', 'mtime', '_downscaled')
+    
+    def __init__(self, image: np.ndarray, scales: List[float], mtime: float = 0.0):
+        """
+        Args:
+            image: 原始模板（BGR / BGRA / 灰度）
+            scales: 缩放比例列表
+            mtime: 模板文件修改时间（用于判断缓存是否过期）
+        """
+        self.image = image
+        self.scales = tuple(scales)
+        self.mtime = mtime
+        
+        # 注意：不使用 mask，因为 TM_CCOEFF_NORMED + mask 可能返回 INF
+        gray = _to_gray(image)
+        template_h, template_w = gray.shape[:2]
+        self.levels: List[Tuple[float, np.ndarray]] = []
+        for scale in self.scales:
+            new_w = int(template_w * scale)
+            new_h = int(template_h * scale)
+            # 跳过太小的模板
+            if new_w < 10 or new_h < 10:
+                continue
+            self.levels.append((float(scale), cv2.resize(gray, (new_w, new_h))))
+        self._downscaled: Dict[float, List[Tuple[float, np.ndarray, int, int]]] = {}
+    
+    def levels_at(self, downscale: float) -> List[Tuple[float, np.ndarray, int, int]]:
+        """
+        匹配用图缩放为 downscale 时的各尺度模板（按 downscale 缓存）
+        
+        Returns:
+            [(缩放比例, 模板, 原分辨率宽, 原分辨率高), ...]，缩小后边长 < 10 的尺度跳过
+        """
+        levels = self._downscaled.get(downscale)
+        if levels is None:
+            levels = []
+            for scale, template in self.levels:
+                full_h, full_w = template.shape[:2]
+                if downscale < 1.0:
+                    new_w, new_h = int(full_w * downscale), int(full_h * downscale)
+                    if new_w < 10 or new_h < 10:
+                        continue
+                    template = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_AREA)
+                levels.append((scale, template, full_w, full_h))
+            self._downscaled[downscale] = levels
+        return levels
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """原始模板的形状"""
+        return self.image.shape
+
 
 class TemplateMatcher:
     """OpenCV 模板匹配器"""
@@ -50,8 +182,20 @@ class TemplateMatcher:
         # 匹配阈值（越高越严格）
         self.match_threshold = 0.75
         
-        # 缓存加载的模板
-        self._template_cache: Dict[str, np.ndarray] = {}
+        # 匹配用图的缩放比例（1.0 为原分辨率；0.5 约快 4 倍，坐标误差约 ±2px）
+        self.match_downscale = 1.0
+        
+        # 缓存加载的模板（含预计算的多尺度灰度金字塔）
+        self._template_cache: Dict[str, TemplatePyramid] = {}
+    
+    def _template_key(self, path: Path) -> str:
+        """模板名称包含相对路径以避免重名，例如 "close_buttons/x_circle" → "close_buttons_x_circle" """
+        rel_path = Path(path).relative_to(self.template_dir)
+        return str(rel_path.with_suffix('')).replace(os.path.sep, '_')
+    
+    def invalidate_template(self, template_name: str):
+        """使单个模板的缓存失效（下次加载时重新读取并计算金字塔）"""
+        self._template_cache.pop(template_name, None)
     
     def load_templates(self, category: Optional[str] = None) -> List[Tuple[str, np.ndarray]]:
         """
@@ -63,6 +207,20 @@ class TemplateMatcher:
         Returns:
             List of (template_name, template_image) tuples
         """
+        return [(name, pyramid.image) for name, pyramid in self.load_template_pyramids(category)]
+    
+    def load_template_pyramids(self, category: Optional[str] = None) -> List[Tuple[str, TemplatePyramid]]:
+        """
+        加载模板及其多尺度灰度金字塔
+        
+        缓存按模板逐个校验：文件修改时间或 self.scales 变化时只重建该模板
+        
+        Args:
+            category: 模板分类子目录，如果不传则加载所有
+        
+        Returns:
+            List of (template_name, TemplatePyramid) tuples
+        """
         templates = []
         
         if not self.template_dir.exists():
@@ -76,9 +234,6 @@ class TemplateMatcher:
         else:
             search_dir = self.template_dir
         
-        # 支持的图片格式
-        extensions = ['.png', '.jpg', '.jpeg', '.bmp']
-        
         # 递归搜索 (如果是根目录) 或 仅搜索指定目录
         if category:
             iterator = search_dir.iterdir()
@@ -89,36 +244,40 @@ class TemplateMatcher:
             if not file.is_file():
                 continue
                 
-            if file.suffix.lower() in extensions:
-                # 模板名称包含相对路径以避免重名，例如 "close_buttons/x_circle"
-                rel_path = file.relative_to(self.template_dir)
-                template_name = str(rel_path.with_suffix('')).replace(os.path.sep, '_')
+            if file.suffix.lower() in TEMPLATE_EXTENSIONS:
+                template_name = self._template_key(file)
+                try:
+                    mtime = file.stat().st_mtime
+                except OSError:
+                    continue
                 
-                # 使用缓存
-                if template_name in self._template_cache:
-                    templates.append((template_name, self._template_cache[template_name]))
+                # 使用缓存（文件未修改且尺度列表未变）
+                cached = self._template_cache.get(template_name)
+                if cached is not None and cached.mtime == mtime and cached.scales == tuple(self.scales):
+                    templates.append((template_name, cached))
                     continue
                 
-                # 读取模板（支持透明通道）
+                # 读取模板（支持透明通道）并预计算金字塔
                 template = cv2.imread(str(file), cv2.IMREAD_UNCHANGED)
                 if template is not None:
-                    self._template_cache[template_name] = template
-                    templates.append((template_name, template))
+                    pyramid = TemplatePyramid(template, self.scales, mtime)
+                    self._template_cache[template_name] = pyramid
+                    templates.append((template_name, pyramid))
         
         return templates
     
     def match_single_template(
         self, 
-        screenshot: np.ndarray, 
-        template: np.ndarray,
+        screenshot: Union[np.ndarray, MatchSession], 
+        template: Union[np.ndarray, TemplatePyramid],
         threshold: Optional[float] = None
     ) -> List[Dict]:
         """
         单模板多尺度匹配
         
         Args:
-            screenshot: 截图 (BGR格式)
-            template: 模板图片
+            screenshot: 匹配会话（多个模板共享预处理结果），或截图 (BGR格式，临时创建会话)
+            template: 预计算的模板金字塔（load_template_pyramids），或原始模板图片（临时计算）
             threshold: 匹配阈值
             
         Returns:
@@ -129,38 +288,24 @@ class TemplateMatcher:
         
         results = []
         
-        # 转灰度图
-        if len(screenshot.shape) == 3:
-            gray_screen = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_screen = screenshot
-        
-        # 处理模板（可能有透明通道）
-        # 注意：不使用 mask，因为 TM_CCOEFF_NORMED + mask 可能返回 INF
-        if len(template.shape) == 3:
-            if template.shape[2] == 4:  # BGRA
-                template_gray = cv2.cvtColor(template[:, :, :3], cv2.COLOR_BGR2GRAY)
-            else:  # BGR
-                template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        else:
-            template_gray = template
+        # 截图预处理（灰度 / 缩小），传入会话时直接复用
+        session = screenshot if isinstance(screenshot, MatchSession) else MatchSession(screenshot, self.match_downscale)
+        gray_screen = session.image
+        downscale = session.downscale
         
-        template_h, template_w = template_gray.shape[:2]
+        # 模板金字塔（原始图片或尺度列表已变化时临时计算）
+        if not isinstance(template, TemplatePyramid) or template.scales != tuple(self.scales):
+            image = template.image if isinstance(template, TemplatePyramid) else template
+            template = TemplatePyramid(image, self.scales)
         
         # 多尺度匹配
-        for scale in self.scales:
-            # 缩放模板
-            new_w = int(template_w * scale)
-            new_h = int(template_h * scale)
+        for scale, resized_template, full_w, full_h in template.levels_at(downscale):
+            new_h, new_w = resized_template.shape[:2]
             
-            # 跳过太小或太大的模板
-            if new_w < 10 or new_h < 10:
-                continue
+            # 跳过比截图大的模板
             if new_w > gray_screen.shape[1] or new_h > gray_screen.shape[0]:
                 continue
             
-            resized_template = cv2.resize(template_gray, (new_w, new_h))
-            
             # 模板匹配
             try:
                 result = cv2.matchTemplate(
@@ -178,19 +323,26 @@ class TemplateMatcher:
             locations = np.where(result >= threshold)
             
             for pt in zip(*locations[::-1]):  # (x, y)
+                # 纯色区域上的相关系数只是噪声，跳过
+                if session.window_std(int(pt[0]), int(pt[1]), new_w, new_h) < session.MIN_WINDOW_STD:
+                    continue
+                
                 confidence = float(result[pt[1], pt[0]])
-                center_x = int(pt[0] + new_w // 2)
-                center_y = int(pt[1] + new_h // 2)
+                # 换算回原分辨率坐标
+                left = int(round(pt[0] / downscale))
+                top = int(round(pt[1] / downscale))
+                center_x = int(left + full_w // 2)
+                center_y = int(top + full_h // 2)
                 
                 results.append({
                     'x': center_x,
                     'y': center_y,
-                    'width': int(new_w),
-                    'height': int(new_h),
+                    'width': int(full_w),
+                    'height': int(full_h),
                     'scale': float(scale),
                     'confidence': confidence,
-                    'top_left': (int(pt[0]), int(pt[1])),
-                    'bottom_right': (int(pt[0] + new_w), int(pt[1] + new_h))
+                    'top_left': (left, top),
+                    'bottom_right': (int(left + full_w), int(top + full_h))
                 })
         
         # 非极大值抑制（去除重叠的检测框）
@@ -229,9 +381,22 @@ class TemplateMatcher:
         
         return kept
     
+    def _load_screenshot(self, screenshot: ScreenshotInput) -> Optional[np.ndarray]:
+        """
+        把各种截图输入转成可匹配的数组（ScreenFrame 直接用灰度图，不读盘）
+        
+        Returns:
+            BGR 或灰度数组，读取失败返回 None
+        """
+        if isinstance(screenshot, np.ndarray):
+            return screenshot
+        if hasattr(screenshot, 'gray'):
+            return screenshot.gray
+        return cv2.imread(str(screenshot))
+    
     def match_all_templates(
         self, 
-        screenshot_path: str,
+        screenshot_path: ScreenshotInput,
         category: Optional[str] = None,
         threshold: Optional[float] = None
     ) -> Dict:
@@ -239,7 +404,7 @@ class TemplateMatcher:
         在截图中匹配所有模板
         
         Args:
-            screenshot_path: 截图路径
+            screenshot_path: 截图路径，或 numpy 数组 / ScreenFrame
             category: 模板分类 (可选)
             threshold: 匹配阈值 (0-1)
             
@@ -247,7 +412,7 @@ class TemplateMatcher:
             匹配结果
         """
         # 读取截图
-        screenshot = cv2.imread(screenshot_path)
+        screenshot = self._load_screenshot(screenshot_path)
         if screenshot is None:
             return {
                 "success": False,
@@ -257,7 +422,7 @@ class TemplateMatcher:
         img_height, img_width = screenshot.shape[:2]
         
         # 加载模板
-        templates = self.load_templates(category=category)
+        templates = self.load_template_pyramids(category=category)
         if not templates:
             return {
                 "success": False,
@@ -265,10 +430,12 @@ class TemplateMatcher:
                 "template_dir": str(self.template_dir),
             }
         
+        # 所有模板共享同一份截图预处理结果
+        session = MatchSession(screenshot, self.match_downscale)
         all_matches = []
         
         for template_name, template in templates:
-            matches = self.match_single_template(screenshot, template, threshold)
+            matches = self.match_single_template(session, template, threshold)
             for match in matches:
                 match['template'] = template_name
                 all_matches.append(match)
@@ -317,21 +484,21 @@ class TemplateMatcher:
     
     def find_close_buttons(
         self, 
-        screenshot_path: str,
+        screenshot_path: ScreenshotInput,
         threshold: Optional[float] = None
     ) -> Dict:
         """
         在截图中查找所有关闭按钮
         
         Args:
-            screenshot_path: 截图路径
+            screenshot_path: 截图路径，或 numpy 数组 / ScreenFrame
             threshold: 匹配阈值 (0-1)
             
         Returns:
             匹配结果
         """
         # 读取截图
-        screenshot = cv2.imread(screenshot_path)
+        screenshot = self._load_screenshot(screenshot_path)
         if screenshot is None:
             return {
                 "success": False,
@@ -341,7 +508,7 @@ class TemplateMatcher:
         img_height, img_width = screenshot.shape[:2]
         
         # 加载模板
-        templates = self.load_templates(category="close_buttons")
+        templates = self.load_template_pyramids(category="close_buttons")
         if not templates:
             return {
                 "success": False,
@@ -350,10 +517,12 @@ class TemplateMatcher:
                 "tip": "添加常见X号截图到 templates/close_buttons/ 目录，命名如 x_circle.png, x_white.png 等"
             }
         
+        # 所有模板共享同一份截图预处理结果
+        session = MatchSession(screenshot, self.match_downscale)
         all_matches = []
         
         for template_name, template in templates:
-            matches = self.match_single_template(screenshot, template, threshold)
+            matches = self.match_single_template(session, template, threshold)
             for match in matches:
                 match['template'] = template_name
                 all_matches.append(match)
@@ -427,8 +596,8 @@ class TemplateMatcher:
         output_path = save_dir / f"{template_name}.png"
         cv2.imwrite(str(output_path), img)
         
-        # 清除缓存
-        self._template_cache.clear()
+        # 只使该模板的缓存失效
+        self.invalidate_template(self._template_key(output_path))
         
         return {
             "success": True,
@@ -476,8 +645,8 @@ class TemplateMatcher:
         output_path = save_dir / f"{template_name}.png"
         cv2.imwrite(str(output_path), cropped)
         
-        # 清除缓存
-        self._template_cache.clear()
+        # 只使该模板的缓存失效
+        self.invalidate_template(self._template_key(output_path))
         
         return {
             "success": True,
@@ -517,11 +686,11 @@ class TemplateMatcher:
     def delete_template(self, template_name: str) -> Dict:
         """删除模板"""
         # 查找模板文件
-        for ext in ['.png', '.jpg', '.jpeg', '.bmp']:
+        for ext in TEMPLATE_EXTENSIONS:
             path = self.template_dir / f"{template_name}{ext}"
             if path.exists():
                 path.unlink()
-                self._template_cache.pop(template_name, None)
+                self.invalidate_template(template_name)
                 return {
                     "success": True,
                     "message": f"✅ 已删除模板: {template_name}"
@@ -534,7 +703,7 @@ class TemplateMatcher:
 
 
 # 便捷函数
-def match_close_button(screenshot_path: str, threshold: float = 0.75) -> Dict:
+def match_close_button(screenshot_path: ScreenshotInput, threshold: float = 0.75) -> Dict:
     """
     快速匹配关闭按钮
     
@@ -2,10 +2,12 @@
 Core Utils Package
 """
 from mobile_mcp.core.utils.operation_history_manager import OperationHistoryManager
+from mobile_mcp.core.utils.single_flight import SingleFlight
+from mobile_mcp.core.utils.work_pool import WorkPool
 
 try:
     from mobile_mcp.core.utils.logger import get_logger, configure_logging, info, debug, warning, error, critical
-    __all__ = ['OperationHistoryManager', 'get_logger', 'configure_logging', 'info', 'debug', 'warning', 'error', 'critical']
+    __all__ = ['OperationHistoryManager', 'SingleFlight', 'WorkPool', 'get_logger', 'configure_logging', 'info', 'debug', 'warning', 'error', 'critical']
 except ImportError:
-    __all__ = ['OperationHistoryManager']
+    __all__ = ['OperationHistoryManager', 'SingleFlight', 'WorkPool']
 
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单飞（single-flight）合并 - 同一时刻对同一资源的并发请求只执行一次
+
+功能：
+1. 同一个 key 同时只有一个请求真正执行（leader），其余请求（follower）等待并共享结果
+2. 异常同样共享：leader 失败时所有等待者收到同一个异常
+3. 线程安全；do_async 供协程使用，leader 在线程池中执行，不阻塞事件循环
+4. 统计 leader / 合并次数
+
+用于设备 RPC（hierarchy dump、截图）：SoM + 弹窗检测、验证循环 + 工具调用
+等场景并发请求屏幕时只访问一次设备。
+
+用法:
+    flight = SingleFlight()
+    xml = flight.do(('hierarchy', version), capture)
+    image = await flight.do_async(('screenshot', version), grab)
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """按 key 合并并发调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+        # 统计
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        加入 key 对应的调用
+
+        Returns:
+            (Future, 是否为 leader)
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]):
+        """leader 执行调用并发布结果"""
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行 fn，若同 key 的调用正在进行则等待并共享其结果
+
+        Args:
+            key: 资源标识（应包含会影响结果的状态，例如层级缓存版本号）
+            fn: 无参可调用对象
+
+        Returns:
+            fn 的返回值（follower 拿到的是 leader 的同一个对象）
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        协程版 do：leader 在默认线程池中执行 fn，follower 异步等待
+
+        与 do 共享同一组进行中的调用，线程和协程之间也会合并
+        """
+        future, leader = self._join(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self._run, key, future, fn)
+        return await asyncio.wrap_future(future)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """key 对应的调用是否正在进行"""
+        with self._lock:
+            return key in self._inflight
+
+    def stats(self) -> Dict:
+        """获取合并统计"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'in_flight': len(self._inflight),
+            }
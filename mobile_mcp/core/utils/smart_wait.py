@@ -6,7 +6,8 @@
 功能：
 1. 页面稳定检测（避免固定等待时间）
 2. 元素出现等待
-3. 页面变化检测
+3. 页面变化检测（比较UI树结构哈希，而不是XML长度）
+   开启无障碍事件源时由事件驱动，抓取只作兜底
 4. 操作后自动等待
 """
 import asyncio
@@ -21,7 +22,7 @@ class SmartWait:
     
     策略：
     1. 不使用固定等待时间，而是检测页面状态
-    2. 快速轮询（100ms一次），减少不必要的等待
+    2. 页面状态来自 MobileClient 的后台监视器（自适应轮询），这里只 await 下一个版本
     3. 最大等待时间保护
     """
     
@@ -36,7 +37,7 @@ class SmartWait:
         
         # 默认配置
         self.default_timeout = 5.0  # 默认最大等待5秒
-        self.poll_interval = 0.1  # 轮询间隔100ms
+        self.poll_interval = 0.1  # 条件轮询间隔100ms（页面状态由后台监视器推送）
         self.page_stable_threshold = 0.3  # 页面稳定阈值（连续300ms无变化认为稳定）
     
     async def wait_for_page_stable(self, timeout: float = None, element_threshold: int = 10) -> bool:
@@ -45,38 +46,58 @@ class SmartWait:
         
         Args:
             timeout: 最大等待时间（秒），None使用默认值
-            element_threshold: 元素变化阈值，元素数量变化小于此值认为稳定
+            element_threshold: 元素变化阈值，两次抓取之间变化的节点数不超过此值认为稳定
             
         Returns:
             是否稳定
         """
         timeout = timeout or self.default_timeout
         start_time = time.time()
-        last_snapshot = None
-        stable_count = 0
-        required_stable_count = int(self.page_stable_threshold / self.poll_interval)
+        deadline = start_time + timeout
+        watcher = self.client.hierarchy_watcher
+        after = start_time
+        last_tree = None
+        stable_since = None
         
         print(f"  ⏳ 等待页面稳定（最多{timeout}秒）...", file=sys.stderr)
         
-        while time.time() - start_time < timeout:
+        # 事件驱动：最近一次操作之后连续 page_stable_threshold 秒没有界面变化事件即稳定，不抓取页面
+        stable = await watcher.wait_for_quiet(self.page_stable_threshold, timeout,
+                                              after=self.client.hierarchy_cache.last_action_time)
+        if stable is not None:
+            elapsed = time.time() - start_time
+            if stable:
+                print(f"  ✅ 页面已稳定（耗时{elapsed:.2f}秒，事件驱动）", file=sys.stderr)
+            else:
+                print(f"  ⏰ 等待超时（{timeout}秒），但继续执行", file=sys.stderr)
+            return stable
+        
+        while time.time() < deadline:
             try:
-                # 获取当前页面快照（只获取元素数量，不解析详细内容）
-                xml = self.client.u2.dump_hierarchy(compressed=False)
-                current_snapshot = len(xml)  # 使用XML长度作为简单的页面状态标识
+                # 等待监视器发布的下一棵UI树（结构哈希在解析时已算好）
+                current_tree = await watcher.wait_for_tree(after, deadline - time.time())
+                if current_tree is None:
+                    break
+                after = current_tree.captured_at
                 
-                if last_snapshot is not None:
-                    change = abs(current_snapshot - last_snapshot)
+                if last_tree is not None:
+                    # 根哈希相同即完全没变，否则统计变化的节点数
+                    if current_tree.root_hash == last_tree.root_hash:
+                        change = 0
+                    else:
+                        change = last_tree.diff(current_tree)['changed_nodes']
                     if change <= element_threshold:
-                        stable_count += 1
-                        if stable_count >= required_stable_count:
+                        # 连续 page_stable_threshold 秒无明显变化认为稳定
+                        if stable_since is None:
+                            stable_since = last_tree.captured_at
+                        if current_tree.captured_at - stable_since >= self.page_stable_threshold:
                             elapsed = time.time() - start_time
                             print(f"  ✅ 页面已稳定（耗时{elapsed:.2f}秒）", file=sys.stderr)
                             return True
                     else:
-                        stable_count = 0  # 页面仍在变化，重置计数
+                        stable_since = None  # 页面仍在变化，重新计时
                 
-                last_snapshot = current_snapshot
-                await asyncio.sleep(self.poll_interval)
+                last_tree = current_tree
                 
             except Exception as e:
                 print(f"  ⚠️  页面稳定检测失败: {e}", file=sys.stderr)
@@ -137,18 +158,21 @@ class SmartWait:
         
         try:
             # 获取初始页面状态
-            initial_xml = self.client.u2.dump_hierarchy(compressed=False)
-            initial_length = len(initial_xml)
+            initial_tree = await self.client.hierarchy_cache.get_tree_async()
+            deadline = start_time + timeout
+            after = start_time
             
-            while time.time() - start_time < timeout:
-                await asyncio.sleep(self.poll_interval)
-                
+            while time.time() < deadline:
                 try:
-                    current_xml = self.client.u2.dump_hierarchy(compressed=False)
-                    current_length = len(current_xml)
+                    current_tree = await self.client.hierarchy_watcher.wait_for_tree(after, deadline - time.time())
+                    if current_tree is None:
+                        break
+                    after = current_tree.captured_at
+                    if current_tree.root_hash == initial_tree.root_hash:
+                        continue
                     
-                    # 页面变化超过5%认为有变化
-                    change_percent = abs(current_length - initial_length) / max(1, initial_length)
+                    # 变化节点超过5%认为有变化
+                    change_percent = initial_tree.diff(current_tree)['change_ratio']
                     if change_percent > 0.05:
                         elapsed = time.time() - start_time
                         print(f"  ✅ 页面已变化（耗时{elapsed:.2f}秒，变化{change_percent*100:.1f}%）", file=sys.stderr)
@@ -156,7 +180,7 @@ class SmartWait:
                         await self.wait_for_page_stable(timeout=1.0)
                         return True
                 except Exception:
-                    pass
+                    await asyncio.sleep(self.poll_interval)
             
             print(f"  ⚠️  页面未明显变化（可能是快速操作）", file=sys.stderr)
             return False
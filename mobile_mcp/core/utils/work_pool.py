@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+有界工作池 - 截图 / 图像处理不在事件循环上执行
+
+功能：
+1. 固定大小的线程池执行设备抓取和 PIL / OpenCV 处理（这些库在 C 层释放 GIL），
+   事件循环在截图编码期间仍能处理 list_tools、取消等请求
+2. 有界：同时排队 + 执行的任务数不超过 max_pending，超出的调用在协程中等待（背压），
+   不会在线程池队列里无限堆积
+3. 可选进程池（IMAGE_PROCESS_POOL=true）：JPEG / PNG 编码等纯 CPU 步骤放到子进程，
+   绕开 GIL；参数需要可 pickle，默认关闭
+4. 调用方协程被取消时立即返回；已在线程中运行的任务会执行完，结果丢弃
+
+配置（环境变量）：
+    SCREENSHOT_WORKERS   线程数，默认 4
+    IMAGE_PROCESS_POOL   是否启用进程池，默认 false
+
+用法:
+    pool = WorkPool()
+    result = await pool.run(manager.take_screenshot, compress=True)
+    data = pool.run_cpu(encode_image, image, 'JPEG', {'quality': 75})   # 在工作线程中调用
+    future = pool.submit(cache.get_tree)                                  # 工作线程内并行子任务
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class WorkPool:
+    """有界线程池（+ 可选进程池）"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 use_processes: Optional[bool] = None):
+        """
+        Args:
+            max_workers: 线程数，None 读取 SCREENSHOT_WORKERS
+            max_pending: 排队 + 执行的任务上限，None 为线程数的 2 倍
+            use_processes: 是否启用进程池，None 读取 IMAGE_PROCESS_POOL
+        """
+        if max_workers is None:
+            max_workers = int(os.environ.get('SCREENSHOT_WORKERS', '4'))
+        if use_processes is None:
+            use_processes = os.environ.get('IMAGE_PROCESS_POOL', 'false').lower() in ['true', '1', 'yes']
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 2
+        self.use_processes = use_processes
+
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='work-pool')
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._process_lock = threading.Lock()
+        # 信号量按事件循环创建（asyncio.Semaphore 绑定到首次使用的循环）
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+
+        # 统计
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.cancelled = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(id(loop))
+        if semaphore is None:
+            semaphore = self._semaphores[id(loop)] = asyncio.Semaphore(self.max_pending)
+        return semaphore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        在线程池中执行 fn，协程等待结果（不阻塞事件循环）
+
+        Returns:
+            fn 的返回值（异常原样抛出）
+        """
+        async with self._semaphore():
+            self.submitted += 1
+            future = self._threads.submit(self._call, functools.partial(fn, *args, **kwargs))
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # 尚未开始的任务直接撤销；已开始的在线程中跑完
+                future.cancel()
+                self.cancelled += 1
+                raise
+
+    def _call(self, fn: Callable) -> Any:
+        with self._stats_lock:
+            self.running += 1
+        try:
+            return fn()
+        finally:
+            with self._stats_lock:
+                self.running -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交并行子任务（同步接口，供工作线程内部使用，不经过背压信号量）
+
+        调用方本身可能占着工作线程：取结果前先 future.cancel()，
+        成功说明任务还在排队，应改为在当前线程执行，避免所有线程互相等待
+        """
+        self.submitted += 1
+        return self._threads.submit(self._call, functools.partial(fn, *args, **kwargs))
+
+    def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        执行纯 CPU 步骤（同步调用，供工作线程内部使用）
+
+        启用进程池时在子进程执行（fn 必须是模块级函数，参数可 pickle），否则在当前线程执行
+        """
+        if not self.use_processes:
+            return fn(*args, **kwargs)
+        return self._get_processes().submit(fn, *args, **kwargs).result()
+
+    def _get_processes(self) -> ProcessPoolExecutor:
+        with self._process_lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=min(self.max_workers, os.cpu_count() or 1))
+            return self._processes
+
+    def shutdown(self):
+        """关闭线程池和进程池"""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        """获取工作池统计"""
+        return {
+            'workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'processes': self.use_processes,
+            'submitted': self.submitted,
+            'running': self.running,
+            'cancelled': self.cancelled,
+        }
@@ -4,6 +4,9 @@
 
 from .xml_parser import XMLParser
 from .xml_formatter import XMLFormatter
+from .ui_tree import UITree, UINode
+from .ui_index import UITreeIndex
+from .ios_tree import IOSPageIndex, IOSElement
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core', 'utils'))
@@ -12,6 +15,11 @@ from logger import logger
 __all__ = [
     'XMLParser',
     'XMLFormatter',
+    'UITree',
+    'UINode',
+    'UITreeIndex',
+    'IOSPageIndex',
+    'IOSElement',
     'logger',
 ]
 
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+iOS 页面索引 - 一次 wda.source() 解析出所有元素，定位器在本地解析
+
+功能：
+1. 解析 WDA source XML（元素标签即类型，带 name/label/value/x/y/width/height）
+2. 倒排索引：accessibility id（name）、name/label、类型（class name）、文本子串
+3. 与 WDA 查找顺序一致：accessibility id -> name -> class name
+4. 返回的元素带逻辑坐标，可直接 wda.tap(x, y)，不再需要 element.click() 的额外往返
+5. tappable(): 只保留中心点在窗口内的元素，visible 的优先（滚动视图折叠线以下的行不点）
+
+用法:
+    page = IOSPageIndex.from_source(ios_client.get_page_source())
+    elements = page.resolve('登录')            # accessibility id -> name -> class name
+    elements = page.tappable(page.find_text('登录', exact=False))
+    x, y = elements[0].center
+"""
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from .ui_index import SubstringIndex, _add
+
+
+class IOSElement:
+    """iOS 元素（来自 source XML，坐标为逻辑坐标 / point）"""
+
+    __slots__ = ('index', 'type', 'name', 'label', 'value', 'enabled', 'visible',
+                 'x', 'y', 'width', 'height', 'depth')
+
+    def __init__(self, index: int, node, depth: int):
+        self.index = index
+        self.type = node.get('type') or node.tag
+        self.name = node.get('name') or ''
+        self.label = node.get('label') or ''
+        self.value = node.get('value') or ''
+        self.enabled = node.get('enabled', 'true') == 'true'
+        self.visible = node.get('visible', 'false') == 'true'
+        self.x = _to_int(node.get('x'))
+        self.y = _to_int(node.get('y'))
+        self.width = _to_int(node.get('width'))
+        self.height = _to_int(node.get('height'))
+        self.depth = depth
+
+    @property
+    def has_area(self) -> bool:
+        return self.width > 0 and self.height > 0
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    @property
+    def bounds_str(self) -> str:
+        return f"[{self.x},{self.y}][{self.x + self.width},{self.y + self.height}]"
+
+    @property
+    def text(self) -> str:
+        """显示文本（name > label > value）"""
+        return self.name or self.label or self.value
+
+    def to_dict(self) -> Dict:
+        return {
+            'type': self.type,
+            'name': self.name,
+            'label': self.label,
+            'value': self.value,
+            'enabled': self.enabled,
+            'visible': self.visible,
+            'bounds': self.bounds_str,
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+        }
+
+    def __repr__(self) -> str:
+        return f"IOSElement({self.index}, {self.type}, {self.text!r}, {self.bounds_str})"
+
+
+def _to_int(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    try:
+        return int(float(value))
+    except ValueError:
+        return 0
+
+
+class IOSPageIndex:
+    """
+    iOS 页面元素索引
+
+    所有查找返回 IOSElement 列表（文档先序）。
+    """
+
+    def __init__(self, elements: List[IOSElement]):
+        self.elements = elements
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_label: Dict[str, List[int]] = {}
+        self.by_value: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self.text_substring = SubstringIndex()
+
+        for element in elements:
+            i = element.index
+            if element.name:
+                _add(self.by_name, element.name, i)
+                self.text_substring.add(element.name, i)
+            if element.label:
+                _add(self.by_label, element.label, i)
+                self.text_substring.add(element.label, i)
+            if element.value:
+                _add(self.by_value, element.value, i)
+                self.text_substring.add(element.value, i)
+            _add(self.by_type, element.type, i)
+
+    @classmethod
+    def from_source(cls, source: str) -> 'IOSPageIndex':
+        """
+        解析 WDA source XML
+
+        Args:
+            source: wda.source() 返回的 XML 字符串
+
+        Returns:
+            IOSPageIndex实例
+        """
+        try:
+            root = ET.fromstring(source)
+        except ET.ParseError as e:
+            raise ValueError(f"iOS页面源码解析失败: {e}")
+
+        elements: List[IOSElement] = []
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            elements.append(IOSElement(len(elements), node, depth))
+            for child in reversed(list(node)):
+                stack.append((child, depth + 1))
+        return cls(elements)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    @property
+    def window(self) -> Optional[IOSElement]:
+        """应用窗口（先序中第一个有面积的元素，即 XCUIElementTypeApplication）"""
+        for element in self.elements:
+            if element.has_area:
+                return element
+        return None
+
+    def on_screen(self, element: IOSElement) -> bool:
+        """元素有面积且中心点在窗口内（窗口未知时只判断面积）"""
+        if not element.has_area:
+            return False
+        window = self.window
+        if window is None:
+            return True
+        x, y = element.center
+        return (window.x <= x < window.x + window.width) and (window.y <= y < window.y + window.height)
+
+    def tappable(self, elements: List[IOSElement]) -> List[IOSElement]:
+        """
+        可按坐标点击的元素
+
+        中心点不在窗口内的元素（滚动视图折叠线以下的行等）不返回；
+        有 visible="true" 的元素时只返回这些，否则返回其余在窗口内的元素
+        （部分 WDA 版本的 visible 属性不可靠，全为 false）
+        """
+        on_screen = [element for element in elements if self.on_screen(element)]
+        visible = [element for element in on_screen if element.visible]
+        return visible or on_screen
+
+    def _take(self, indexes) -> List[IOSElement]:
+        return [self.elements[i] for i in sorted(set(indexes))]
+
+    # ==================== 定位策略 ====================
+
+    def find_accessibility_id(self, locator: str) -> List[IOSElement]:
+        """accessibility id：WDA 中对应 name 属性"""
+        return self._take(self.by_name.get(locator, ()))
+
+    def find_name(self, locator: str) -> List[IOSElement]:
+        """name 定位：name 或 label 精确匹配"""
+        return self._take(self.by_name.get(locator, []) + self.by_label.get(locator, []))
+
+    def find_class_name(self, locator: str) -> List[IOSElement]:
+        """class name 定位：元素类型（XCUIElementTypeButton 等）"""
+        return self._take(self.by_type.get(locator, ()))
+
+    def resolve(self, locator: str) -> List[IOSElement]:
+        """
+        按 accessibility id -> name -> class name 的顺序解析定位器
+        （与 IOSClientWDA.find_elements 的顺序一致，只是全部在本地完成）
+        """
+        for strategy in (self.find_accessibility_id, self.find_name, self.find_class_name):
+            elements = strategy(locator)
+            if elements:
+                return elements
+        return []
+
+    def find_text(self, text: str, exact: bool = True) -> List[IOSElement]:
+        """
+        文本查找：name / label / value
+
+        Args:
+            text: 文本
+            exact: True 精确匹配，False 子串匹配
+        """
+        if exact:
+            return self._take(self.by_name.get(text, []) + self.by_label.get(text, [])
+                              + self.by_value.get(text, []))
+        return self._take(self.text_substring.search(text))
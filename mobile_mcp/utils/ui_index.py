@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI树倒排索引 - 定位器（文本 / content-desc / resource-id）常数级查找
+
+功能：
+1. 精确映射：text、content-desc、resource-id（含 ":id/" 后缀简写）
+2. 归一化映射：与 MobileClient.click 模糊匹配相同的规则（去空格、中英文括号）
+3. 子串索引：字符 + 二元组(bigram)倒排表，候选集求交后再做一次 in 校验
+4. 随 UITree 懒构建，同一版本的页面只建一次
+
+用法:
+    index = tree.index
+    index.find_text('确定')                 # text 或 content-desc 精确匹配
+    index.find_text('商品', exact=False)     # 子串匹配
+    index.find_id('btn_ok')                 # resource-id（完整 ID 或 :id/ 后缀）
+    index.find_normalized('Item(1)')        # 忽略空格、括号的子串匹配
+"""
+from typing import Dict, Iterable, List, Optional
+
+
+# 与 MobileClient.click 模糊匹配一致：去掉空格和中英文括号
+_NORMALIZE_TABLE = str.maketrans('', '', ' ()（）')
+
+
+def normalize_text(text: str) -> str:
+    """归一化文本（去空格、中英文括号）"""
+    return text.translate(_NORMALIZE_TABLE) if text else ''
+
+
+def _add(mapping: Dict[str, List[int]], key: str, node_index: int):
+    postings = mapping.get(key)
+    if postings is None:
+        mapping[key] = [node_index]
+    elif postings[-1] != node_index:
+        postings.append(node_index)
+
+
+class SubstringIndex:
+    """
+    子串索引
+
+    每个不同的字符串是一个 key，key 拆成单字符和二元组建立倒排表。
+    查询时取查询串各二元组倒排表中最短的几张求交，再对剩下的少量候选做 in 校验。
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.postings: List[List[int]] = []
+        self._key_ids: Dict[str, int] = {}
+        self._grams: Optional[Dict[str, List[int]]] = None
+
+    def add(self, key: str, node_index: int):
+        """添加一个 key -> 节点下标"""
+        if not key:
+            return
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self._key_ids[key] = key_id
+            self.keys.append(key)
+            self.postings.append([node_index])
+            self._grams = None
+        elif self.postings[key_id][-1] != node_index:
+            self.postings[key_id].append(node_index)
+
+    def _build(self) -> Dict[str, List[int]]:
+        grams: Dict[str, List[int]] = {}
+        for key_id, key in enumerate(self.keys):
+            seen = set(key)
+            seen.update(key[i:i + 2] for i in range(len(key) - 1))
+            for gram in seen:
+                _add(grams, gram, key_id)
+        self._grams = grams
+        return grams
+
+    def search(self, sub: str) -> List[int]:
+        """
+        查找包含 sub 的所有节点
+
+        Returns:
+            节点下标列表（文档先序）
+        """
+        if not sub:
+            key_ids: Iterable[int] = range(len(self.keys))
+        else:
+            grams = self._grams if self._grams is not None else self._build()
+            if len(sub) == 1:
+                key_ids = grams.get(sub, ())
+            else:
+                lists = []
+                for gram in {sub[i:i + 2] for i in range(len(sub) - 1)}:
+                    postings = grams.get(gram)
+                    if not postings:
+                        return []
+                    lists.append(postings)
+                lists.sort(key=len)
+                candidates = set(lists[0])
+                for postings in lists[1:4]:
+                    candidates.intersection_update(postings)
+                    if not candidates:
+                        return []
+                keys = self.keys
+                key_ids = [key_id for key_id in candidates if sub in keys[key_id]]
+
+        result = set()
+        for key_id in key_ids:
+            result.update(self.postings[key_id])
+        return sorted(result)
+
+
+class UITreeIndex:
+    """
+    UITree 的定位器索引
+
+    所有查找返回节点下标（文档先序），调用方通过 tree.node(i) 取节点视图。
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.text: Dict[str, List[int]] = {}
+        self.desc: Dict[str, List[int]] = {}
+        self.resource_id: Dict[str, List[int]] = {}
+        self.id_suffix: Dict[str, List[int]] = {}
+        self.normalized: Dict[str, List[int]] = {}
+        self.lower_text: Dict[str, List[int]] = {}
+
+        self.substring = SubstringIndex()
+        self.normalized_substring = SubstringIndex()
+        self.lower_substring = SubstringIndex()
+
+        self._build()
+
+    def _build(self):
+        texts = self.tree.text
+        descs = self.tree.content_desc
+        rids = self.tree.resource_id
+        for i in range(len(texts)):
+            text = texts[i]
+            desc = descs[i]
+            rid = rids[i]
+            if text:
+                _add(self.text, text, i)
+                self.substring.add(text, i)
+                normalized = normalize_text(text)
+                if normalized:
+                    _add(self.normalized, normalized, i)
+                    self.normalized_substring.add(normalized, i)
+            # find_element_by_text 比较的是 strip + lower 后的文本（空文本也参与精确匹配）
+            lower = text.strip().lower()
+            _add(self.lower_text, lower, i)
+            self.lower_substring.add(lower, i)
+            if desc:
+                _add(self.desc, desc, i)
+                self.substring.add(desc, i)
+                normalized = normalize_text(desc)
+                if normalized:
+                    _add(self.normalized, normalized, i)
+                    self.normalized_substring.add(normalized, i)
+            if rid:
+                _add(self.resource_id, rid, i)
+                pos = rid.find(':id/')
+                if pos >= 0:
+                    _add(self.id_suffix, rid[pos + 4:], i)
+
+    @staticmethod
+    def _merge(*postings: Optional[List[int]]) -> List[int]:
+        lists = [p for p in postings if p]
+        if not lists:
+            return []
+        if len(lists) == 1:
+            return list(lists[0])
+        return sorted(set().union(*lists))
+
+    def find_text(self, text: str, exact: bool = True) -> List[int]:
+        """text 或 content-desc 匹配（与 ClickManager 原有规则一致，区分大小写）"""
+        if exact:
+            if not text:
+                return [i for i in range(len(self.tree)) if not self.tree.text[i] or not self.tree.content_desc[i]]
+            return self._merge(self.text.get(text), self.desc.get(text))
+        return self.substring.search(text) if text else list(range(len(self.tree)))
+
+    def find_text_lower(self, text: str, exact: bool = False) -> List[int]:
+        """strip + lower 后的 text 匹配（ElementManager.find_element_by_text 的规则）"""
+        search_text = text.lower()
+        if exact:
+            return list(self.lower_text.get(search_text, ()))
+        if not search_text:
+            return list(range(len(self.tree)))
+        return self.lower_substring.search(search_text)
+
+    def find_normalized(self, ref: str, exact: bool = False) -> List[int]:
+        """归一化后的 text / content-desc 匹配（忽略空格、括号）"""
+        ref_normalized = normalize_text(ref)
+        if exact:
+            return list(self.normalized.get(ref_normalized, ()))
+        return self.normalized_substring.search(ref_normalized)
+
+    def find_id(self, resource_id: str, suffix: bool = True) -> List[int]:
+        """
+        resource-id 匹配：完整 ID 或 ":id/" 后缀简写
+
+        Args:
+            resource_id: 完整 ID 或后缀
+            suffix: 是否匹配后缀简写（后缀不区分包名，会命中其他应用 / 输入法的同名 ID）
+        """
+        if not resource_id:
+            return []
+        if not suffix:
+            return list(self.resource_id.get(resource_id, ()))
+        return self._merge(self.resource_id.get(resource_id), self.id_suffix.get(resource_id))
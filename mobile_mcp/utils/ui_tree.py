@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI树 - 一次解析、数组存储的页面结构模型
+
+功能：
+1. 每份 dump 只解析一次（expat 流式解析，不构建 ElementTree 对象）
+2. 节点按先序存储在并行数组中：bounds / 父节点 / 深度 / 子树结束位置 / 标志位
+3. class 名称驻留到类名表，节点只存表下标
+4. 提供轻量的 UINode 视图和子树遍历，供解析器、管理器复用
+5. 懒构建的定位器倒排索引（tree.index，见 ui_index.py）
+6. 解析时同步计算每棵子树的结构哈希（Merkle），页面变化检测只需比较根哈希，
+   diff() 给出变化的子树和变化比例
+7. pruned()：去掉零面积 / 屏幕外子树，折叠单子节点的纯布局链
+
+用法:
+    tree = UITree.from_xml(xml_string)
+    for node in tree.nodes():
+        if node.clickable and node.text:
+            print(node.text, node.bounds)
+
+    changed = tree.root_hash != new_tree.root_hash
+    diff = tree.diff(new_tree)    # {'change_ratio': 0.12, 'changed_subtrees': [...], ...}
+"""
+import re
+import sys
+from array import array
+from hashlib import blake2b
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.parsers import expat
+
+from .ui_index import UITreeIndex
+
+
+# 标志位
+FLAG_HAS_BOUNDS = 1 << 0
+FLAG_CLICKABLE = 1 << 1
+FLAG_FOCUSABLE = 1 << 2
+FLAG_SCROLLABLE = 1 << 3
+FLAG_ENABLED = 1 << 4
+FLAG_CHECKABLE = 1 << 5
+FLAG_CHECKED = 1 << 6
+FLAG_LONG_CLICKABLE = 1 << 7
+FLAG_SELECTED = 1 << 8
+FLAG_FOCUSED = 1 << 9
+FLAG_PASSWORD = 1 << 10
+
+# 带有任一标志位的节点是可交互的，精简时不会被折叠
+_INTERACTIVE_FLAGS = (FLAG_CLICKABLE | FLAG_FOCUSABLE | FLAG_SCROLLABLE
+                      | FLAG_CHECKABLE | FLAG_LONG_CLICKABLE)
+
+_BOUNDS_RE = re.compile(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]')
+
+
+class UINode:
+    """UI树中单个节点的只读视图（不复制数据）"""
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: 'UITree', index: int):
+        self.tree = tree
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"UINode({self.index}, {self.short_class}, text={self.text!r}, bounds={self.bounds_str})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UINode) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    @property
+    def text(self) -> str:
+        return self.tree.text[self.index]
+
+    @property
+    def content_desc(self) -> str:
+        return self.tree.content_desc[self.index]
+
+    @property
+    def resource_id(self) -> str:
+        return self.tree.resource_id[self.index]
+
+    @property
+    def class_name(self) -> str:
+        return self.tree.class_names[self.tree.class_ids[self.index]]
+
+    @property
+    def short_class(self) -> str:
+        return self.tree.short_class_names[self.tree.class_ids[self.index]]
+
+    @property
+    def depth(self) -> int:
+        return self.tree.depth[self.index]
+
+    @property
+    def flags(self) -> int:
+        return self.tree.flags[self.index]
+
+    @property
+    def has_bounds(self) -> bool:
+        return bool(self.tree.flags[self.index] & FLAG_HAS_BOUNDS)
+
+    @property
+    def clickable(self) -> bool:
+        return bool(self.tree.flags[self.index] & FLAG_CLICKABLE)
+
+    @property
+    def focusable(self) -> bool:
+        return bool(self.tree.flags[self.index] & FLAG_FOCUSABLE)
+
+    @property
+    def scrollable(self) -> bool:
+        return bool(self.tree.flags[self.index] & FLAG_SCROLLABLE)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.tree.flags[self.index] & FLAG_ENABLED)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """(x1, y1, x2, y2)，没有 bounds 时为全 0"""
+        i = self.index
+        tree = self.tree
+        return tree.x1[i], tree.y1[i], tree.x2[i], tree.y2[i]
+
+    @property
+    def bounds_str(self) -> str:
+        """原始格式的 bounds 字符串，如 "[0,0][100,200]" """
+        return self.tree.bounds_str(self.index)
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        x1, y1, x2, y2 = self.bounds
+        return (x1 + x2) // 2, (y1 + y2) // 2
+
+    @property
+    def parent(self) -> Optional['UINode']:
+        parent_index = self.tree.parent[self.index]
+        return UINode(self.tree, parent_index) if parent_index >= 0 else None
+
+    def children(self) -> Iterator['UINode']:
+        return self.tree.children(self.index)
+
+
+class UITree:
+    """
+    数组存储的 UI 树
+
+    节点按文档先序编号，节点 0 是 XML 根元素（Android 为 <hierarchy>）。
+    节点 i 的子树占据 [i, subtree_end[i]) 区间，可以 O(1) 跳过整棵子树。
+    """
+
+    def __init__(self):
+        # bounds
+        self.x1 = array('i')
+        self.y1 = array('i')
+        self.x2 = array('i')
+        self.y2 = array('i')
+        # 结构
+        self.parent = array('i')
+        self.depth = array('i')
+        self.subtree_end = array('i')
+        # 标志位与类名下标
+        self.flags = array('H')
+        self.class_ids = array('H')
+        # 结构哈希：node_hashes 只覆盖节点自身属性，hashes 覆盖整棵子树
+        self.node_hashes = array('Q')
+        self.hashes = array('Q')
+        # 字符串属性
+        self.text: List[str] = []
+        self.content_desc: List[str] = []
+        self.resource_id: List[str] = []
+        # 无法解析的 bounds 原文（如负坐标），节点视为没有 bounds，只保留原文供元素字典输出
+        self.raw_bounds: Dict[int, str] = {}
+        # 类名表（驻留）
+        self.class_names: List[str] = []
+        self.short_class_names: List[str] = []
+        self._class_table: Dict[str, int] = {}
+        # 定位器索引（首次访问时构建）
+        self._index: Optional[UITreeIndex] = None
+        # 对应 dump 的开始时间（由 HierarchyCache 填写）
+        self.captured_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    # ==================== 构建 ====================
+
+    @classmethod
+    def from_xml(cls, xml_string: str) -> 'UITree':
+        """
+        从 uiautomator XML 构建 UI 树
+
+        Args:
+            xml_string: XML格式的字符串
+
+        Returns:
+            UITree实例
+
+        Raises:
+            ValueError: XML 无法解析
+        """
+        tree = cls()
+        if not isinstance(xml_string, str):
+            xml_string = str(xml_string)
+        if not xml_string.strip():
+            return tree
+
+        stack: List[int] = []
+        # 每层正在收集的子节点哈希（子树哈希 = H(自身哈希 + 子节点哈希...)）
+        child_digests: List[List[bytes]] = []
+        intern = sys.intern
+        bounds_match = _BOUNDS_RE.match
+
+        x1, y1, x2, y2 = tree.x1, tree.y1, tree.x2, tree.y2
+        parent, depth, subtree_end = tree.parent, tree.depth, tree.subtree_end
+        flags, class_ids = tree.flags, tree.class_ids
+        node_hashes, hashes = tree.node_hashes, tree.hashes
+        texts, descs, rids = tree.text, tree.content_desc, tree.resource_id
+        class_id = tree._class_id
+        raw_bounds = tree.raw_bounds
+        own_digests: List[bytes] = []
+        from_bytes = int.from_bytes
+
+        def start(tag, attrs):
+            index = len(parent)
+            parent.append(stack[-1] if stack else -1)
+            depth.append(len(stack))
+            subtree_end.append(index + 1)
+
+            get = attrs.get
+            flag = (
+                (FLAG_CLICKABLE if get('clickable') == 'true' else 0)
+                | (FLAG_FOCUSABLE if get('focusable') == 'true' else 0)
+                | (FLAG_SCROLLABLE if get('scrollable') == 'true' else 0)
+                | (0 if get('enabled', 'true') != 'true' else FLAG_ENABLED)
+                | (FLAG_CHECKABLE if get('checkable') == 'true' else 0)
+                | (FLAG_CHECKED if get('checked') == 'true' else 0)
+                | (FLAG_LONG_CLICKABLE if get('long-clickable') == 'true' else 0)
+                | (FLAG_SELECTED if get('selected') == 'true' else 0)
+                | (FLAG_FOCUSED if get('focused') == 'true' else 0)
+                | (FLAG_PASSWORD if get('password') == 'true' else 0)
+            )
+
+            match = bounds_match(get('bounds', ''))
+            if match:
+                flag |= FLAG_HAS_BOUNDS
+                a, b, c, d = match.groups()
+                x1.append(int(a))
+                y1.append(int(b))
+                x2.append(int(c))
+                y2.append(int(d))
+            else:
+                x1.append(0)
+                y1.append(0)
+                x2.append(0)
+                y2.append(0)
+                if get('bounds'):
+                    raw_bounds[index] = get('bounds')
+
+            class_name = get('class', '')
+            text = get('text', '')
+            desc = get('content-desc', '')
+            rid = get('resource-id', '')
+            flags.append(flag)
+            class_ids.append(class_id(class_name))
+            texts.append(text)
+            descs.append(desc)
+            rids.append(intern(rid))
+
+            # 节点自身的结构签名（不含 index 等与内容无关的属性）
+            signature = f"{tag}\x1f{class_name}\x1f{text}\x1f{desc}\x1f{rid}\x1f{get('bounds', '')}\x1f{flag}"
+            digest = blake2b(signature.encode('utf-8'), digest_size=8).digest()
+            own_digests.append(digest)
+            node_hashes.append(from_bytes(digest, 'little'))
+            hashes.append(0)
+            child_digests.append([])
+            stack.append(index)
+
+        def end(tag):
+            index = stack.pop()
+            subtree_end[index] = len(parent)
+            children = child_digests.pop()
+            if children:
+                digest = blake2b(own_digests[index] + b''.join(children), digest_size=8).digest()
+            else:
+                digest = own_digests[index]
+            hashes[index] = from_bytes(digest, 'little')
+            if child_digests:
+                child_digests[-1].append(digest)
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        try:
+            parser.Parse(xml_string, True)
+        except expat.ExpatError as e:
+            raise ValueError(f"XML解析失败: {e}")
+        return tree
+
+    def _class_id(self, class_name: str) -> int:
+        """类名驻留，返回类名表下标"""
+        class_index = self._class_table.get(class_name)
+        if class_index is None:
+            class_index = len(self.class_names)
+            class_name = sys.intern(class_name)
+            self._class_table[class_name] = class_index
+            self.class_names.append(class_name)
+            self.short_class_names.append(class_name.split('.')[-1] if class_name else '')
+        return class_index
+
+    # ==================== 访问 ====================
+
+    @property
+    def index(self) -> UITreeIndex:
+        """定位器倒排索引（text / content-desc / resource-id），首次访问时构建"""
+        if self._index is None:
+            self._index = UITreeIndex(self)
+        return self._index
+
+    def find(self, node_indexes: List[int]) -> List[UINode]:
+        """把索引返回的节点下标转换为节点视图"""
+        return [UINode(self, i) for i in node_indexes]
+
+    def node(self, index: int) -> UINode:
+        return UINode(self, index)
+
+    @property
+    def root(self) -> Optional[UINode]:
+        return UINode(self, 0) if len(self) else None
+
+    def nodes(self, max_depth: Optional[int] = None) -> Iterator[UINode]:
+        """
+        先序遍历所有节点
+
+        Args:
+            max_depth: 深度上限，超过的节点及其子树整体跳过（与旧的递归 depth 限制一致）
+        """
+        total = len(self)
+        index = 0
+        depth = self.depth
+        subtree_end = self.subtree_end
+        while index < total:
+            if max_depth is not None and depth[index] > max_depth:
+                index = subtree_end[index]
+                continue
+            yield UINode(self, index)
+            index += 1
+
+    def children(self, index: int) -> Iterator[UINode]:
+        """直接子节点"""
+        for child in self._child_indexes(index):
+            yield UINode(self, child)
+
+    def bounds_str(self, index: int) -> str:
+        if not self.flags[index] & FLAG_HAS_BOUNDS:
+            return self.raw_bounds.get(index, '')
+        return f"[{self.x1[index]},{self.y1[index]}][{self.x2[index]},{self.y2[index]}]"
+
+    def class_count(self) -> int:
+        return len(self.class_names)
+
+    # ==================== 精简 ====================
+
+    def _is_visible(self, index: int, screen_width: int, screen_height: int) -> bool:
+        """节点是否有面积且与屏幕相交（没有 bounds 的节点，如根节点，视为可见）"""
+        if not self.flags[index] & FLAG_HAS_BOUNDS:
+            return True
+        x1, y1, x2, y2 = self.x1[index], self.y1[index], self.x2[index], self.y2[index]
+        if x2 <= x1 or y2 <= y1:
+            return False
+        if screen_width and screen_height:
+            return x2 > 0 and y2 > 0 and x1 < screen_width and y1 < screen_height
+        return True
+
+    def _is_layout(self, index: int) -> bool:
+        """纯布局节点：没有文本 / 描述 / ID，且不可交互"""
+        return not (self.text[index] or self.content_desc[index] or self.resource_id[index]
+                    or self.flags[index] & _INTERACTIVE_FLAGS)
+
+    def pruned(self, screen_width: int = 0, screen_height: int = 0) -> 'UITree':
+        """
+        生成精简树
+
+        1. 零面积、完全在屏幕外的节点连同子树一起去掉
+        2. 只有一个（可见）子节点的纯布局节点被折叠，由子节点顶替其位置
+        文本 / 描述 / ID / 可交互节点全部保留，结构哈希按新结构重新计算
+
+        Args:
+            screen_width: 屏幕宽度，0 表示不做屏幕外判断
+            screen_height: 屏幕高度
+
+        Returns:
+            新的UITree（不修改当前树）
+        """
+        order: List[int] = []
+        new_parent: List[int] = []
+        new_depth: List[int] = []
+        if not len(self):
+            return self._take(order, new_parent, new_depth)
+
+        # (旧节点下标, 新父节点下标, 新深度)，逆序压栈保证先序
+        stack = [(0, -1, 0)]
+        while stack:
+            index, parent, depth = stack.pop()
+            children = [c for c in self._child_indexes(index)
+                        if self._is_visible(c, screen_width, screen_height)]
+
+            # 折叠单子节点的纯布局链（根节点保留）
+            while index != 0 and len(children) == 1 and self._is_layout(index):
+                index = children[0]
+                children = [c for c in self._child_indexes(index)
+                            if self._is_visible(c, screen_width, screen_height)]
+
+            new_index = len(order)
+            order.append(index)
+            new_parent.append(parent)
+            new_depth.append(depth)
+            for child in reversed(children):
+                stack.append((child, new_index, depth + 1))
+
+        return self._take(order, new_parent, new_depth)
+
+    def _take(self, order: List[int], new_parent: List[int], new_depth: List[int]) -> 'UITree':
+        """按给定的先序节点列表构建新树，并重新计算子树结束位置和结构哈希"""
+        tree = UITree()
+        tree.class_names = self.class_names
+        tree.short_class_names = self.short_class_names
+        tree._class_table = self._class_table
+        tree.captured_at = self.captured_at
+
+        for name in ('x1', 'y1', 'x2', 'y2', 'flags', 'class_ids', 'node_hashes'):
+            source = getattr(self, name)
+            getattr(tree, name).extend(source[i] for i in order)
+        tree.text = [self.text[i] for i in order]
+        tree.content_desc = [self.content_desc[i] for i in order]
+        tree.resource_id = [self.resource_id[i] for i in order]
+        if self.raw_bounds:
+            tree.raw_bounds = {new: self.raw_bounds[old] for new, old in enumerate(order) if old in self.raw_bounds}
+        tree.parent.extend(new_parent)
+        tree.depth.extend(new_depth)
+
+        count = len(order)
+        tree.subtree_end.extend(range(1, count + 1))
+        tree.hashes.extend([0] * count)
+        child_digests: List[List[bytes]] = [[] for _ in range(count)]
+        for index in range(count - 1, -1, -1):
+            own = tree.node_hashes[index].to_bytes(8, 'little')
+            children = child_digests[index]
+            if children:
+                children.reverse()
+                digest = blake2b(own + b''.join(children), digest_size=8).digest()
+            else:
+                digest = own
+            tree.hashes[index] = int.from_bytes(digest, 'little')
+            parent = new_parent[index]
+            if parent >= 0:
+                child_digests[parent].append(digest)
+                if tree.subtree_end[index] > tree.subtree_end[parent]:
+                    tree.subtree_end[parent] = tree.subtree_end[index]
+        return tree
+
+    def subtree_size(self, index: int) -> int:
+        return self.subtree_end[index] - index
+
+    # ==================== 结构哈希 ====================
+
+    @property
+    def root_hash(self) -> int:
+        """整棵树的结构哈希，两次 dump 根哈希相同即页面结构未变化"""
+        return self.hashes[0] if len(self) else 0
+
+    def diff(self, other: 'UITree', max_subtrees: int = 20) -> Dict:
+        """
+        与另一棵树做结构对比（self 为旧页面，other 为新页面）
+
+        自顶向下比较子树哈希：哈希相同的子树整体跳过；子节点先按哈希配对，
+        剩余的按顺序配对后继续下钻，多出来的视为新增/删除。
+
+        Args:
+            other: 新页面的UI树
+            max_subtrees: 返回的变化子树数量上限（统计不受影响）
+
+        Returns:
+            {
+                'changed': 是否有变化,
+                'change_ratio': 变化节点占比（0-1）,
+                'changed_nodes': 变化/新增/删除的节点数,
+                'changed_subtrees': [{'index', 'class', 'text', 'bounds', 'size'}, ...]  # 新页面中的变化子树
+            }
+        """
+        total = max(len(self), len(other), 1)
+        if not len(self) or not len(other):
+            changed_nodes = max(len(self), len(other))
+            return {
+                'changed': changed_nodes > 0,
+                'change_ratio': 1.0 if changed_nodes else 0.0,
+                'changed_nodes': changed_nodes,
+                'changed_subtrees': [],
+            }
+        if self.hashes[0] == other.hashes[0]:
+            return {'changed': False, 'change_ratio': 0.0, 'changed_nodes': 0, 'changed_subtrees': []}
+
+        changed_nodes = 0
+        changed_roots: List[int] = []
+        stack = [(0, 0)]
+        while stack:
+            a, b = stack.pop()
+            if self.hashes[a] == other.hashes[b]:
+                continue
+            if self.node_hashes[a] != other.node_hashes[b]:
+                changed_nodes += 1
+                changed_roots.append(b)
+
+            # 子节点先按子树哈希配对（未变化的子树，允许位置移动）
+            unmatched_old: Dict[int, List[int]] = {}
+            for child in self._child_indexes(a):
+                unmatched_old.setdefault(self.hashes[child], []).append(child)
+            new_children = []
+            for child in other._child_indexes(b):
+                same = unmatched_old.get(other.hashes[child])
+                if same:
+                    same.pop(0)
+                else:
+                    new_children.append(child)
+            old_children = sorted(i for rest in unmatched_old.values() for i in rest)
+
+            # 剩余的按顺序配对继续下钻，多出的视为新增/删除
+            for old_child, new_child in zip(old_children, new_children):
+                stack.append((old_child, new_child))
+            for new_child in new_children[len(old_children):]:
+                changed_nodes += other.subtree_size(new_child)
+                changed_roots.append(new_child)
+            for old_child in old_children[len(new_children):]:
+                changed_nodes += self.subtree_size(old_child)
+
+        # 只报告最外层的变化子树（祖先已报告的不再重复）
+        changed_roots.sort()
+        subtrees = []
+        covered_end = -1
+        for index in changed_roots:
+            if index < covered_end:
+                continue
+            covered_end = other.subtree_end[index]
+            if len(subtrees) < max_subtrees:
+                node = UINode(other, index)
+                subtrees.append({
+                    'index': index,
+                    'class': node.short_class,
+                    'text': node.text or node.content_desc,
+                    'bounds': node.bounds_str,
+                    'size': other.subtree_size(index),
+                })
+
+        return {
+            'changed': True,
+            'change_ratio': round(min(1.0, changed_nodes / total), 4),
+            'changed_nodes': changed_nodes,
+            'changed_subtrees': subtrees,
+        }
+
+    def _child_indexes(self, index: int) -> List[int]:
+        children = []
+        child = index + 1
+        end = self.subtree_end[index]
+        subtree_end = self.subtree_end
+        while child < end:
+            children.append(child)
+            child = subtree_end[child]
+        return children
@@ -6,12 +6,13 @@ XML解析器 - 解析UIAutomator2的XML结构
 功能：
 1. 解析XML格式的页面结构
 2. 提取元素属性（text, resource-id, class, bounds等）
-3. 构建元素树结构
+3. 构建元素树结构（底层使用一次解析的 UITree）
 """
-import xml.etree.ElementTree as ET
 from typing import List, Dict, Optional
 import re
 
+from .ui_tree import UITree
+
 
 class XMLParser:
     """
@@ -41,63 +42,56 @@ class XMLParser:
             if not xml_string or not xml_string.strip():
                 return []
             
-            root = ET.fromstring(xml_string)
-            elements = []
-            self._parse_node(root, elements, depth=0)
-            return elements
-        except ET.ParseError as e:
-            raise ValueError(f"XML解析失败: {e}")
+            tree = UITree.from_xml(xml_string)
+        except ValueError:
+            raise
         except Exception as e:
             raise ValueError(f"XML解析异常: {e}, xml_string类型: {type(xml_string)}, 前100字符: {str(xml_string)[:100]}")
+        return self.parse_tree(tree)
     
-    def _parse_node(self, node: ET.Element, elements: List[Dict], depth: int = 0):
+    def parse_tree(self, tree: UITree) -> List[Dict]:
         """
-        递归解析节点
+        从已解析的UI树提取元素（共享缓存里的树可直接传入，避免重复解析）
         
         Args:
-            node: XML节点
-            elements: 元素列表（输出）
-            depth: 当前深度
+            tree: UITree实例
+            
+        Returns:
+            元素列表，每个元素包含属性信息
         """
-        # 提取节点属性
-        element = {
-            'text': node.get('text', ''),
-            'resource_id': node.get('resource-id', ''),
-            'class': node.get('class', ''),
-            'content_desc': node.get('content-desc', ''),
-            'bounds': node.get('bounds', ''),
-            'clickable': node.get('clickable', 'false') == 'true',
-            'focusable': node.get('focusable', 'false') == 'true',
-            'scrollable': node.get('scrollable', 'false') == 'true',
-            'enabled': node.get('enabled', 'true') == 'true',
-            'depth': depth,
-        }
-        
-        # 解析bounds坐标
-        if element['bounds']:
-            bounds = self._parse_bounds(element['bounds'])
-            element['x'] = bounds.get('x', 0)
-            element['y'] = bounds.get('y', 0)
-            element['width'] = bounds.get('width', 0)
-            element['height'] = bounds.get('height', 0)
-        
-        # 提取类名（简化）
-        if element['class']:
-            class_parts = element['class'].split('.')
-            element['class_name'] = class_parts[-1] if class_parts else ''
-        else:
-            element['class_name'] = ''
-        
-        # 只添加有意义的元素（有文本、resource-id或可交互）
-        if (element['text'] or 
-            element['resource_id'] or 
-            element['clickable'] or 
-            element['focusable']):
+        elements = []
+        for node in tree.nodes():
+            # 只添加有意义的元素（有文本、resource-id或可交互）
+            if not (node.text or node.resource_id or node.clickable or node.focusable):
+                continue
+            
+            element = {
+                'text': node.text,
+                'resource_id': node.resource_id,
+                'class': node.class_name,
+                'content_desc': node.content_desc,
+                'bounds': node.bounds_str,
+                'clickable': node.clickable,
+                'focusable': node.focusable,
+                'scrollable': node.scrollable,
+                'enabled': node.enabled,
+                'depth': node.depth,
+            }
+            
+            # bounds坐标（无法解析的 bounds，如负坐标，与原实现一致记为 0）
+            if node.has_bounds:
+                x1, y1, x2, y2 = node.bounds
+                element['x'] = x1
+                element['y'] = y1
+                element['width'] = x2 - x1
+                element['height'] = y2 - y1
+            elif element['bounds']:
+                element.update(self._parse_bounds(element['bounds']))
+            
+            # 类名（简化）
+            element['class_name'] = node.short_class
             elements.append(element)
-        
-        # 递归处理子节点
-        for child in node:
-            self._parse_node(child, elements, depth + 1)
+        return elements
     
     def _parse_bounds(self, bounds_str: str) -> Dict:
         """
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试公共工具
+
+供 scripts/benchmark_*.py 使用：
+1. 把项目根目录加入 sys.path（从源码直接运行）
+2. 计时与统计（min / median / p90 / mean）
+3. 结果表格输出
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def time_call(func: Callable, repeat: int = 10, warmup: int = 1) -> List[float]:
+    """
+    重复执行并计时
+
+    Args:
+        func: 无参函数
+        repeat: 计时次数
+        warmup: 预热次数（不计入结果）
+
+    Returns:
+        每次耗时（毫秒）
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """统计耗时样本（毫秒）"""
+    if not samples:
+        return {'min': 0.0, 'median': 0.0, 'p90': 0.0, 'mean': 0.0}
+    ordered = sorted(samples)
+    p90_index = min(len(ordered) - 1, int(round(len(ordered) * 0.9)) - 1)
+    return {
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'p90': ordered[max(0, p90_index)],
+        'mean': statistics.fmean(ordered),
+    }
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence]) -> None:
+    """打印对齐的结果表格"""
+    cells = [[str(h) for h in headers]]
+    for row in rows:
+        cells.append([f"{v:.1f}" if isinstance(v, float) else str(v) for v in row])
+    widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+        if index == 0:
+            print('  '.join('-' * w for w in widths))
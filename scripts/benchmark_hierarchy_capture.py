@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI 层级抓取基准测试（需要连接真实设备）
+
+对比：
+- exec_out:   adb exec-out uiautomator dump /dev/tty（一次往返）
+- shell_dump: dump -> cat -> rm（三次往返，旧 snapshot 实现）
+- u2_dump:    u2.dump_hierarchy(compressed=False)
+- u2_compressed: u2.dump_hierarchy(compressed=True)
+
+用法:
+    python scripts/benchmark_hierarchy_capture.py --repeat 20
+    python scripts/benchmark_hierarchy_capture.py --device emulator-5554
+    python scripts/benchmark_hierarchy_capture.py --select   # 重新测速并更新 ~/.mobile_mcp 中的设备后端记录
+"""
+import argparse
+import xml.etree.ElementTree as ET
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.mobile_client import MobileClient
+from mobile_mcp.core.hierarchy_capture import HierarchyCapture
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI 层级抓取后端基准测试")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--repeat', type=int, default=10, help="每个后端的计时次数")
+    parser.add_argument('--backends', nargs='*', default=list(HierarchyCapture.BACKENDS),
+                        help="要测试的后端")
+    parser.add_argument('--select', action='store_true', help="运行自动选择器并持久化结果")
+    args = parser.parse_args()
+
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    capture = client.hierarchy_capture
+
+    if args.select:
+        selected = capture.reselect()
+        print(f"\n✅ 设备 {capture.selector.device_key()} 选择后端: {selected}")
+        print(f"   记录文件: {capture.selector.store_file}")
+        return
+
+    rows = []
+    for backend in args.backends:
+        try:
+            xml_string = capture.capture(backend)
+            node_count = sum(1 for _ in ET.fromstring(xml_string).iter('node'))
+            samples = time_call(lambda: capture.capture(backend), repeat=args.repeat)
+        except Exception as e:
+            print(f"❌ {backend} 失败: {e}")
+            continue
+        stats = summarize(samples)
+        rows.append((backend, stats['min'], stats['median'], stats['p90'], stats['mean'],
+                     len(xml_string.encode('utf-8')), node_count))
+
+    print(f"\n📊 UI 层级抓取（{args.repeat} 次，单位 ms）\n")
+    print_table(('backend', 'min', 'median', 'p90', 'mean', 'bytes', 'nodes'), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精简层级模式基准测试（需要连接真实设备）
+
+对比：
+- full:   u2.dump_hierarchy(compressed=False) + UITree.from_xml（基线）
+- pruned: u2.dump_hierarchy(compressed=True) + UITree.from_xml + pruned()
+
+指标：
+- bytes:     传输的 XML 字节数
+- capture:   抓取耗时（ms，中位数）
+- parse:     解析（+精简）耗时（ms，中位数）
+- nodes:     节点数
+- 定位命中率: 基线树中每个文本 / resource-id 在精简树的索引中能否找到
+
+用法:
+    python scripts/benchmark_hierarchy_pruned.py --repeat 10
+    python scripts/benchmark_hierarchy_pruned.py --device emulator-5554
+"""
+import argparse
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.mobile_client import MobileClient
+from mobile_mcp.utils.ui_tree import UITree
+
+
+def locator_hit_rate(baseline: UITree, candidate: UITree):
+    """
+    基线树中的文本 / resource-id 定位在候选树中的命中率
+
+    Returns:
+        (文本命中数, 文本总数, ID命中数, ID总数, 未命中样例)
+    """
+    texts = {text for text in baseline.text if text.strip()}
+    ids = {rid for rid in baseline.resource_id if rid}
+    index = candidate.index
+
+    text_hits = sum(1 for text in texts if index.find_text(text, exact=True))
+    id_hits = sum(1 for rid in ids if index.find_id(rid))
+    missed = [text for text in texts if not index.find_text(text, exact=True)][:5]
+    missed += [rid for rid in ids if not index.find_id(rid)][:5]
+    return text_hits, len(texts), id_hits, len(ids), missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="精简层级模式基准测试")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--repeat', type=int, default=10, help="计时次数")
+    args = parser.parse_args()
+
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    capture = client.hierarchy_capture
+    info = client.u2.info
+    screen_width, screen_height = info.get('displayWidth', 0), info.get('displayHeight', 0)
+
+    full_xml = capture.capture('u2_dump')
+    pruned_xml = capture.capture('u2_compressed')
+
+    def parse_full():
+        return UITree.from_xml(full_xml)
+
+    def parse_pruned():
+        return UITree.from_xml(pruned_xml).pruned(screen_width, screen_height)
+
+    full_tree = parse_full()
+    pruned_tree = parse_pruned()
+
+    rows = []
+    for mode, backend, xml_string, parse, tree in (
+        ('full', 'u2_dump', full_xml, parse_full, full_tree),
+        ('pruned', 'u2_compressed', pruned_xml, parse_pruned, pruned_tree),
+    ):
+        capture_stats = summarize(time_call(lambda: capture.capture(backend), repeat=args.repeat))
+        parse_stats = summarize(time_call(parse, repeat=args.repeat))
+        rows.append((mode, len(xml_string.encode('utf-8')), capture_stats['median'],
+                     parse_stats['median'], len(tree)))
+
+    print(f"\n📊 精简层级模式（{args.repeat} 次，单位 ms）\n")
+    print_table(('mode', 'bytes', 'capture', 'parse', 'nodes'), rows)
+
+    text_hits, text_total, id_hits, id_total, missed = locator_hit_rate(full_tree, pruned_tree)
+    print(f"\n🎯 定位命中率（以 full 为基线）")
+    print(f"   文本: {text_hits}/{text_total} ({text_hits / text_total * 100 if text_total else 100:.1f}%)")
+    print(f"   ID:   {id_hits}/{id_total} ({id_hits / id_total * 100 if id_total else 100:.1f}%)")
+    if missed:
+        print(f"   未命中样例: {missed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图后端基准测试（需要连接真实设备）
+
+对比：
+- u2:  u2.screenshot()（设备端 PNG 编码 + 本地解码）
+- raw: adb exec-out screencap 原始帧（无 PNG 编解码）
+
+每个后端分别测量：纯抓取、压缩截图、网格截图、SoM 截图的端到端耗时
+另外对比局部截图的两条路径（raw）：
+- region:    设备端只截出区域所在的行再传输（ScreenCapture.capture_region）
+- full+crop: 整帧 raw 抓取后本地裁剪
+
+用法:
+    python scripts/benchmark_screenshot_capture.py --repeat 10
+    python scripts/benchmark_screenshot_capture.py --device emulator-5554 --backends raw
+    python scripts/benchmark_screenshot_capture.py --crop-size 400
+"""
+import argparse
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.dynamic_config import DynamicConfig
+from mobile_mcp.core.mobile_client import MobileClient
+from mobile_mcp.core.managers.screenshot_manager import ScreenshotManager
+from mobile_mcp.core.screen_capture import _PIXEL_FORMATS, ScreenCapture
+
+
+def region_rows(capture: ScreenCapture, crop_size: int, repeat: int):
+    """局部截图：区域抓取 vs 整帧 raw + 裁剪（屏幕中心）"""
+    try:
+        frame = capture.capture('raw')
+    except Exception as e:
+        print(f"❌ raw 失败，跳过区域抓取对比: {e}")
+        return []
+    center_x, center_y = frame.width // 2, frame.height // 2
+    # 传输量：整帧 vs 区域所在的行
+    width, height, pixel_format, header = capture._geometry
+    row_bytes = width * _PIXEL_FORMATS[pixel_format][0]
+    rows_needed = min(height, center_y + crop_size // 2) - max(0, center_y - crop_size // 2)
+    full_bytes = header + height * row_bytes
+    region_bytes = header + rows_needed * row_bytes
+    print(f"📦 传输量 full {full_bytes / 1e6:.1f}MB, region {region_bytes / 1e6:.2f}MB"
+          f"（{region_bytes / full_bytes:.1%}）")
+    cases = (
+        ('region', lambda: capture.capture_region(center_x, center_y, crop_size)),
+        ('full+crop', lambda: ScreenCapture._crop(capture.capture('raw'), center_x, center_y, crop_size)),
+    )
+    rows = []
+    for mode, func in cases:
+        try:
+            region, _, _ = func()
+        except Exception as e:
+            print(f"❌ {mode} 失败: {e}")
+            continue
+        stats = summarize(time_call(func, repeat=repeat))
+        rows.append(('raw', mode, stats['min'], stats['median'], stats['p90'], f"{region.width}x{region.height}"))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图后端基准测试")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--repeat', type=int, default=10, help="每项的计时次数")
+    parser.add_argument('--backends', nargs='*', default=list(ScreenCapture.BACKENDS),
+                        help="要测试的后端")
+    parser.add_argument('--crop-size', type=int, default=300, help="局部截图的区域边长（像素）")
+    args = parser.parse_args()
+
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    manager = ScreenshotManager(client)
+    # SoM 需要的层级先抓好，只比较截图部分
+    client.hierarchy_cache.ttl = float('inf')
+    client.hierarchy_cache.get_tree()
+
+    modes = (
+        ('capture', lambda: client.screen_capture.capture()),
+        ('compressed', lambda: manager.take_screenshot(compress=True)),
+        ('grid', lambda: manager.take_screenshot_with_grid()),
+        ('som', lambda: manager.take_screenshot_with_som()),
+    )
+
+    rows = []
+    original_backend = DynamicConfig.screenshot_backend
+    original_dedup = DynamicConfig.screenshot_dedup
+    # 页面不变时重复截图会命中去重缓存，计时只剩哈希：测速期间关闭
+    DynamicConfig.screenshot_dedup = False
+    try:
+        for backend in args.backends:
+            DynamicConfig.screenshot_backend = backend
+            try:
+                frame = client.screen_capture.capture(backend)
+            except Exception as e:
+                print(f"❌ {backend} 失败: {e}")
+                continue
+            for mode, func in modes:
+                stats = summarize(time_call(func, repeat=args.repeat))
+                rows.append((backend, mode, stats['min'], stats['median'], stats['p90'],
+                             f"{frame.width}x{frame.height}"))
+        rows += region_rows(client.screen_capture, args.crop_size, args.repeat)
+    finally:
+        DynamicConfig.screenshot_backend = original_backend
+        DynamicConfig.screenshot_dedup = original_dedup
+
+    print(f"\n📊 截图后端（{args.repeat} 次，单位 ms）\n")
+    print_table(('backend', 'mode', 'min', 'median', 'p90', 'size'), rows)
+
+
+if __name__ == "__main__":
+    main()
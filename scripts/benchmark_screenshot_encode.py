@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图编码格式基准测试
+
+对比 DynamicConfig.screenshot_format 涉及的各编码方式：
+- 有损（压缩截图）：JPEG / WebP，按 --qualities 逐档
+- 无损（局部裁剪 / 原图）：PNG / 无损 WebP
+
+指标（对语料中每帧分别计时，结果取所有帧的中位数 / 平均值）：
+- 编码耗时、解码耗时（ms，中位数）
+- 体积（KB，平均）及相对 JPEG 同质量 / PNG 的比例
+
+语料来源：
+- --corpus 目录下的截图文件（png / jpg / webp）
+- --image 指定单个文件
+- 都不指定时从设备抓取 --frames 帧（每帧间隔 1 秒，可手动翻页）
+
+缩放：--widths 指定输出宽度（与 take_screenshot 的 max_width 一致），0 表示原尺寸
+
+用法:
+    python scripts/benchmark_screenshot_encode.py --corpus screenshots/ --widths 720 540
+    python scripts/benchmark_screenshot_encode.py --device emulator-5554 --frames 5 --qualities 60 75 90
+"""
+import argparse
+import io
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.image_formats import lossless_spec, lossy_spec, webp_available
+from mobile_mcp.core.image_resize import resize_image
+from mobile_mcp.core.screenshot_store import encode_image
+
+
+CORPUS_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def load_corpus(args) -> List[Image.Image]:
+    if args.corpus:
+        paths = sorted(p for p in Path(args.corpus).iterdir() if p.suffix.lower() in CORPUS_EXTENSIONS)
+        if args.limit:
+            paths = paths[:args.limit]
+        return [Image.open(p).convert('RGB') for p in paths]
+    if args.image:
+        return [Image.open(args.image).convert('RGB')]
+    from mobile_mcp.core.mobile_client import MobileClient
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    frames = []
+    for index in range(args.frames):
+        if index:
+            time.sleep(1.0)
+        frames.append(client.screen_capture.capture().pil.copy())
+    return frames
+
+
+def scaled(image: Image.Image, width: int) -> Image.Image:
+    if not width or image.width <= width:
+        return image
+    return resize_image(image, (width, int(image.height * width / image.width)))
+
+
+def measure(images: List[Image.Image], format: str, params: Dict, repeat: int) -> Dict[str, float]:
+    """对每帧计时编码 / 解码，返回所有帧的中位耗时与平均体积"""
+    encode_times, decode_times, sizes = [], [], []
+    for image in images:
+        data = encode_image(image, format, params)
+        sizes.append(len(data))
+        encode_times.extend(time_call(lambda: encode_image(image, format, params), repeat=repeat, warmup=0))
+        decode_times.extend(time_call(lambda: Image.open(io.BytesIO(data)).load(), repeat=repeat, warmup=0))
+    return {
+        'encode': summarize(encode_times)['median'],
+        'decode': summarize(decode_times)['median'],
+        'kb': sum(sizes) / len(sizes) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图编码格式基准测试")
+    parser.add_argument('--corpus', default=None, help="截图目录（png / jpg / webp）")
+    parser.add_argument('--image', default=None, help="单个截图文件")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--frames', type=int, default=3, help="从设备抓取的帧数")
+    parser.add_argument('--limit', type=int, default=0, help="语料最多使用的文件数（0 不限）")
+    parser.add_argument('--repeat', type=int, default=3, help="每帧每项的计时次数")
+    parser.add_argument('--widths', type=int, nargs='+', default=[720], help="输出宽度，0 表示原尺寸")
+    parser.add_argument('--qualities', type=int, nargs='+', default=[60, 75, 85], help="有损质量档位")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    if not corpus:
+        raise SystemExit("❌ 语料为空")
+    formats = ['jpeg', 'webp'] if webp_available() else ['jpeg']
+    if len(formats) == 1:
+        print("⚠️  Pillow 不支持 WebP，只测试 JPEG / PNG")
+
+    for width in args.widths:
+        images = [scaled(image, width) for image in corpus]
+        w, h = images[0].size
+
+        rows = []
+        for quality in args.qualities:
+            baseline = None
+            for name in formats:
+                format, params = lossy_spec(name, quality)
+                result = measure(images, format, params, args.repeat)
+                baseline = baseline or result['kb']
+                rows.append((format, quality, result['encode'], result['decode'], result['kb'],
+                             f"{result['kb'] / baseline:.2f}"))
+        print(f"\n📊 有损编码 {w}x{h}（{len(images)} 帧 x {args.repeat} 次，耗时 ms 中位数，体积平均）\n")
+        print_table(('format', 'quality', 'encode', 'decode', 'KB', 'vs jpeg'), rows)
+
+        rows = []
+        baseline = None
+        for name in formats:
+            format, params = lossless_spec(name)
+            result = measure(images, format, params, args.repeat)
+            baseline = baseline or result['kb']
+            label = format + (' lossless' if params.get('lossless') else '')
+            rows.append((label, result['encode'], result['decode'], result['kb'], f"{result['kb'] / baseline:.2f}"))
+        print(f"\n📊 无损编码 {w}x{h}\n")
+        print_table(('format', 'encode', 'decode', 'KB', 'vs png'), rows)
+
+
+if __name__ == "__main__":
+    main()
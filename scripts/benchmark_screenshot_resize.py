@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图缩放模式基准测试
+
+对比 DynamicConfig.screenshot_resize 的各模式：
+- lanczos: 整图 LANCZOS（基线）
+- fast:    Image.reduce 整数倍 + LANCZOS 收尾
+- area:    cv2.resize INTER_AREA
+
+指标：
+- 耗时（ms）
+- SSIM：与基线输出的结构相似度（灰度，11x11 高斯窗口），1.0 表示完全一致
+
+图片来源：--image 指定本地截图文件；不指定时从设备抓取一帧
+
+用法:
+    python scripts/benchmark_screenshot_resize.py --image screen.png --max-width 720
+    python scripts/benchmark_screenshot_resize.py --device emulator-5554 --repeat 20
+"""
+import argparse
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.image_resize import RESIZE_MODES, resize_image
+
+
+def ssim(a: np.ndarray, b: np.ndarray) -> float:
+    """灰度 SSIM（Wang et al. 2004，高斯窗口 sigma=1.5）"""
+    a = cv2.cvtColor(a, cv2.COLOR_RGB2GRAY).astype(np.float64)
+    b = cv2.cvtColor(b, cv2.COLOR_RGB2GRAY).astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    def blur(x):
+        return cv2.GaussianBlur(x, (11, 11), 1.5)
+
+    mu_a, mu_b = blur(a), blur(b)
+    var_a = blur(a * a) - mu_a ** 2
+    var_b = blur(b * b) - mu_b ** 2
+    cov = blur(a * b) - mu_a * mu_b
+    score = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(score.mean())
+
+
+def load_image(args) -> Image.Image:
+    if args.image:
+        return Image.open(args.image).convert('RGB')
+    from mobile_mcp.core.mobile_client import MobileClient
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    return client.screen_capture.capture().pil.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图缩放模式基准测试")
+    parser.add_argument('--image', default=None, help="本地截图文件，不指定则从设备抓取")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--repeat', type=int, default=10, help="每项的计时次数")
+    parser.add_argument('--max-width', type=int, default=720, help="目标宽度（与 take_screenshot 的 max_width 一致）")
+    args = parser.parse_args()
+
+    image = load_image(args)
+    size = (args.max_width, int(image.height * args.max_width / image.width))
+    baseline = np.asarray(resize_image(image, size, 'lanczos'))
+
+    cases = [(mode, lambda mode=mode: resize_image(image, size, mode)) for mode in RESIZE_MODES]
+
+    rows = []
+    for name, func in cases:
+        stats = summarize(time_call(func, repeat=args.repeat))
+        output = np.asarray(func())
+        rows.append((name, stats['min'], stats['median'], stats['p90'], f"{ssim(baseline, output):.4f}"))
+
+    print(f"\n📊 截图缩放 {image.width}x{image.height} -> {size[0]}x{size[1]}（{args.repeat} 次，单位 ms）\n")
+    print_table(('mode', 'min', 'median', 'p90', 'ssim'), rows)
+
+
+if __name__ == "__main__":
+    main()
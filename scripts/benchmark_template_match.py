@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配基准测试（内置 templates/close_buttons 模板集）
+
+对比：
+- per-template: 每个模板单独传入截图数组，各自转灰度 / 建积分图（旧调用方式）
+- session x1.0: 所有模板共享一个 MatchSession（原分辨率，结果与旧方式一致）
+- session xN:   共享会话 + 匹配用图整体缩小（--downscales）
+
+指标：
+- 耗时（ms）
+- 匹配数、最佳匹配（模板 / 坐标 / 置信度）：用于确认缩小后结果仍可用
+
+截图来源：--image 指定本地截图文件；不指定时从设备抓取一帧
+
+用法:
+    python scripts/benchmark_template_match.py --image screen.png
+    python scripts/benchmark_template_match.py --device emulator-5554 --downscales 0.75 0.5
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+from bench_common import print_table, summarize, time_call
+
+from mobile_mcp.core.template_matcher import MatchSession, TemplateMatcher
+
+
+def load_screenshot(args) -> np.ndarray:
+    if args.image:
+        image = cv2.imread(args.image)
+        if image is None:
+            raise SystemExit(f"❌ 无法读取截图: {args.image}")
+        return image
+    from mobile_mcp.core.mobile_client import MobileClient
+    client = MobileClient(device_id=args.device, platform="android", lock_orientation=False)
+    return cv2.cvtColor(client.screen_capture.capture().array, cv2.COLOR_RGB2BGR)
+
+
+def run(matcher: TemplateMatcher, screenshot: np.ndarray, templates, downscale, shared: bool):
+    """匹配全部模板，返回 NMS 后的结果（按置信度排序）"""
+    if shared:
+        source = MatchSession(screenshot, downscale)
+    else:
+        source = screenshot
+        matcher.match_downscale = downscale
+    matches = []
+    for name, template in templates:
+        for match in matcher.match_single_template(source, template):
+            match['template'] = name
+            matches.append(match)
+    return matcher._non_max_suppression(sorted(matches, key=lambda m: m['confidence'], reverse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板匹配基准测试")
+    parser.add_argument('--image', default=None, help="本地截图文件，不指定则从设备抓取")
+    parser.add_argument('--device', default=None, help="设备ID，默认自动选择第一个")
+    parser.add_argument('--repeat', type=int, default=3, help="每项的计时次数")
+    parser.add_argument('--downscales', type=float, nargs='+', default=[0.5], help="共享会话的缩小比例")
+    args = parser.parse_args()
+
+    screenshot = load_screenshot(args)
+    matcher = TemplateMatcher()
+    templates = matcher.load_template_pyramids(category="close_buttons")
+    if not templates:
+        raise SystemExit(f"❌ 没有找到模板: {matcher.template_dir / 'close_buttons'}")
+
+    cases = [('per-template', 1.0, False), ('session x1.0', 1.0, True)]
+    cases += [(f"session x{d}", d, True) for d in args.downscales]
+
+    rows = []
+    for name, downscale, shared in cases:
+        stats = summarize(time_call(lambda: run(matcher, screenshot, templates, downscale, shared),
+                                    repeat=args.repeat))
+        matches = run(matcher, screenshot, templates, downscale, shared)
+        best = matches[0] if matches else None
+        best_text = f"{best['template']} ({best['x']},{best['y']}) {best['confidence']:.3f}" if best else '-'
+        rows.append((name, stats['min'], stats['median'], len(matches), best_text))
+
+    height, width = screenshot.shape[:2]
+    print(f"\n📊 模板匹配 {width}x{height}，{len(templates)} 个模板 x {len(matcher.scales)} 个尺度"
+          f"（{args.repeat} 次，单位 ms）\n")
+    print_table(('case', 'min', 'median', 'matches', 'best'), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无障碍事件驱动的页面稳定测试（LocalEventProducer 本地替身，不需要真机）
+
+覆盖：
+- 操作之后还没有事件时不会立即判定稳定（至少等 min_wait）
+- 安静期从操作之后的最后一个事件开始计算
+- 操作之前的旧事件不算界面响应
+- 事件持续不断时超时返回 False
+- HierarchyWatcher 在第一次等待前启动事件源
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mobile_mcp.core.accessibility_events import AccessibilityEventSource, LocalEventProducer
+from mobile_mcp.core.hierarchy_watcher import HierarchyWatcher
+
+
+class TestEventDrivenStability:
+    """AccessibilityEventSource.wait_for_quiet"""
+
+    @pytest.fixture
+    def source(self):
+        source = AccessibilityEventSource()
+        yield source
+        source.stop()
+
+    @pytest.fixture
+    def producer(self, source):
+        return LocalEventProducer(source)
+
+    @pytest.mark.asyncio
+    async def test_no_event_after_action_waits_min_wait(self, source, producer):
+        action_time = time.time()
+        stable = await source.wait_for_quiet(0.1, timeout=2.0, after=action_time, min_wait=0.4)
+        assert stable is True
+        assert time.time() - action_time >= 0.4
+
+    @pytest.mark.asyncio
+    async def test_quiet_measured_from_last_event(self, source, producer):
+        action_time = time.time()
+        producer.play([(0.1, 'TYPE_WINDOW_STATE_CHANGED'),
+                       (0.1, 'TYPE_WINDOW_CONTENT_CHANGED'),
+                       (0.1, 'TYPE_WINDOW_CONTENT_CHANGED')])
+        stable = await source.wait_for_quiet(0.2, timeout=2.0, after=action_time, min_wait=0.05)
+        assert stable is True
+        assert source.sequence == 3
+        assert time.time() - source.last_event_time >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_event_before_action_is_not_a_response(self, source, producer):
+        producer.emit('TYPE_WINDOW_CONTENT_CHANGED')
+        action_time = time.time()
+        stable = await source.wait_for_quiet(0.05, timeout=2.0, after=action_time, min_wait=0.3)
+        assert stable is True
+        assert time.time() - action_time >= 0.3
+
+    @pytest.mark.asyncio
+    async def test_continuous_events_time_out(self, source, producer):
+        action_time = time.time()
+        producer.play([(0.05, 'TYPE_VIEW_SCROLLED')] * 20)
+        stable = await source.wait_for_quiet(0.3, timeout=0.5, after=action_time)
+        assert stable is False
+
+    @pytest.mark.asyncio
+    async def test_stopped_source_is_not_stable(self, source, producer):
+        source.stop()
+        assert await source.wait_for_quiet(0.1, timeout=0.5, after=time.time()) is False
+
+    def test_feed_line_parses_change_events(self, source, producer):
+        producer.feed("EventType: TYPE_WINDOW_STATE_CHANGED; EventTime: 1; PackageName: com.example.app")
+        producer.feed("EventType: TYPE_VIEW_HOVER_ENTER; PackageName: com.example.app")
+        assert source.sequence == 1
+        assert source.last_package == 'com.example.app'
+
+
+class TestWatcherStartsEvents:
+    """HierarchyWatcher 在等待前启动事件源"""
+
+    @pytest.mark.asyncio
+    async def test_wait_for_quiet_starts_source(self):
+        command = [sys.executable, '-c',
+                   'import time; print("EventType: TYPE_WINDOW_CONTENT_CHANGED; PackageName: a.b", flush=True); '
+                   'time.sleep(5)']
+        source = AccessibilityEventSource(command=command)
+        watcher = HierarchyWatcher(mobile_client=None, events=source)
+        try:
+            assert not source.active
+            stable = await watcher.wait_for_quiet(0.1, timeout=3.0, after=time.time())
+            assert source.active
+            assert stable is True
+            assert source.sequence == 1
+        finally:
+            source.stop()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按字节预算编码测试（本地合成图片，不需要真机）
+
+覆盖：
+- 结果不超预算，且是当前缩放下的最高质量（质量 +1 即超预算）
+- 最低质量仍超预算时逐档缩小；任何档位都放不下时返回最小结果并标记 budget_met=False
+- 重页面之后遇到轻页面，从缩小档位一次回到原尺寸
+- 多线程共用一个编码器
+"""
+
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mobile_mcp.core.jpeg_budget import JPEGBudgetEncoder
+
+
+def _noise(width: int = 720, height: int = 1600, seed: int = 0) -> Image.Image:
+    """高频噪声：编码后体积大（重页面）"""
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8))
+
+
+def _flat(width: int = 720, height: int = 1600) -> Image.Image:
+    """平滑渐变：编码后体积小（轻页面）"""
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)
+    return Image.fromarray(np.repeat(np.tile(gradient, (height, 1))[..., None], 3, axis=2))
+
+
+def _jpeg_size(image: Image.Image, quality: int) -> int:
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return len(buffer.getvalue())
+
+
+class TestJPEGBudgetEncoder:
+    """JPEGBudgetEncoder.encode 搜索结果"""
+
+    @pytest.fixture
+    def encoder(self):
+        return JPEGBudgetEncoder()
+
+    def test_highest_quality_within_budget(self, encoder):
+        image = _flat()
+        budget = _jpeg_size(image, 70) + 1
+        result = encoder.encode(image, budget)
+        assert result.budget_met
+        assert result.scale == 1.0
+        assert len(result.data) <= budget
+        assert result.quality >= 70
+        if result.quality < encoder.max_quality:
+            assert _jpeg_size(image, result.quality + 1) > budget
+
+    def test_scales_down_when_min_quality_too_large(self, encoder):
+        image = _noise()
+        budget = _jpeg_size(image, encoder.min_quality) // 2
+        result = encoder.encode(image, budget)
+        assert result.budget_met
+        assert result.scale < 1.0
+        assert result.size[0] < image.width
+        assert len(result.data) <= budget
+
+    def test_impossible_budget_returns_smallest(self, encoder):
+        result = encoder.encode(_noise(), 1000)
+        assert result.budget_met is False
+        assert result.quality == encoder.min_quality
+        assert result.scale == encoder.SCALES[-1]
+
+    def test_climbs_back_to_full_scale(self, encoder):
+        budget = 60_000
+        heavy = encoder.encode(_noise(), budget)
+        assert heavy.scale < 1.0
+        light = encoder.encode(_flat(), budget)
+        assert light.budget_met
+        assert light.scale == 1.0
+        assert len(light.data) <= budget
+
+    def test_reuses_last_setting(self, encoder):
+        image = _flat()
+        budget = _jpeg_size(image, 60) + 1
+        first = encoder.encode(image, budget)
+        second = encoder.encode(image, budget)
+        assert second.quality == first.quality
+        assert second.attempts <= first.attempts
+
+    def test_shared_between_threads(self, encoder):
+        images = [_noise(360, 800, seed) if seed % 2 else _flat(360, 800) for seed in range(8)]
+        budget = 30_000
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda image: encoder.encode(image, budget), images))
+        for result in results:
+            assert result.budget_met
+            assert len(result.data) <= budget
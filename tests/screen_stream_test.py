@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕流测试（LocalStreamProducer 本地替身，不需要真机）
+
+覆盖：
+- 操作之后到达的帧可以直接取用
+- 过旧的帧（超过 max_age / 早于操作）不被使用
+- 操作后等不到新帧时超时回退；画面静止（空闲）时不等待
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mobile_mcp.core.screen_stream import LocalStreamProducer, MJPEGParser, ScreenStream
+
+
+def _image(value: int) -> np.ndarray:
+    return np.full((40, 20, 3), value, dtype=np.uint8)
+
+
+class TestScreenStream:
+    """ScreenStream 取帧规则"""
+
+    @pytest.fixture
+    def stream(self):
+        stream = ScreenStream(latency=0.05, wait_timeout=0.3, max_age=1.0, idle_after=1.0)
+        yield stream
+        stream.stop()
+
+    @pytest.fixture
+    def producer(self, stream):
+        return LocalStreamProducer(stream, screen_size=(20, 40))
+
+    def test_frame_after_action_is_served(self, stream, producer):
+        action_time = time.time()
+        producer.play([(0.1, _image(7))])
+        frame = stream.wait_for_frame(after=action_time)
+        assert frame is not None
+        assert frame.array[0, 0, 0] == 7
+        assert frame.screen_width == 20 and frame.screen_height == 40
+
+    def test_frame_before_action_is_rejected(self, stream, producer):
+        producer.emit(_image(1))
+        action_time = time.time()
+        start = time.time()
+        assert stream.wait_for_frame(after=action_time) is None
+        # 操作刚发生：等满超时后回退
+        assert time.time() - start >= 0.25
+        assert stream.stats()['misses'] == 1
+
+    def test_stale_frame_rejected_without_action(self, stream, producer):
+        stream.push(_image(1), received_at=time.time() - 5)
+        start = time.time()
+        assert stream.wait_for_frame(after=0.0) is None
+        # 从未操作视为空闲：不等待
+        assert time.time() - start < 0.1
+
+    def test_recent_frame_served_without_action(self, stream, producer):
+        producer.emit(_image(3))
+        frame = stream.wait_for_frame(after=0.0)
+        assert frame is not None and frame.array[0, 0, 0] == 3
+
+    def test_idle_screen_skips_wait(self, stream, producer):
+        action_time = time.time() - 3
+        stream.push(_image(1), received_at=action_time + 0.5)
+        start = time.time()
+        assert stream.wait_for_frame(after=action_time) is None
+        assert time.time() - start < 0.1
+
+    def test_stopped_stream_returns_none(self, stream, producer):
+        stream.stop()
+        assert stream.wait_for_frame(after=time.time()) is None
+
+    def test_mjpeg_feed_split_across_chunks(self, stream, producer):
+        from io import BytesIO
+        from PIL import Image
+        buffer = BytesIO()
+        Image.fromarray(_image(200)).save(buffer, 'JPEG')
+        data = b'--boundary\r\n' + buffer.getvalue() + b'\r\n'
+        producer.feed(data[:50])
+        assert stream.stats()['frames'] == 0
+        producer.feed(data[50:])
+        frame = stream.wait_for_frame(after=0.0)
+        assert frame is not None and frame.size == (20, 40)
+
+    def test_parser_buffer_cap(self):
+        parser = MJPEGParser(max_buffer=16)
+        assert parser.feed(b'\xff\xd8' + b'x' * 64) == []
+        assert len(parser._buffer) == 0
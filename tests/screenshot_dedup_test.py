@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图去重测试（本地合成画面，不需要真机）
+
+覆盖：
+- 状态栏时钟这类小变化在容差内命中，弹窗等大变化不命中
+- 界面操作（操作计数变化）后不复用；层级 dump 不影响去重
+- description 参与缓存键，命中时文件名与本次调用一致
+- 文件被删除后失效
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mobile_mcp.core.hierarchy_cache import HierarchyCache
+from mobile_mcp.core.managers.screenshot_manager import ScreenshotManager
+from mobile_mcp.core.screen_frame import ScreenFrame
+from mobile_mcp.core.screenshot_dedup import ScreenshotDedupCache
+from mobile_mcp.core.screenshot_store import ScreenshotStore
+from mobile_mcp.core.utils.single_flight import SingleFlight
+
+
+def _screen(seed: int = 0) -> np.ndarray:
+    """带纹理的合成画面（纯色画面的 dHash 全 0，测不出差异）"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, (48, 24, 1), dtype=np.uint8)
+    return np.repeat(np.repeat(blocks, 50, axis=0), 45, axis=1).repeat(3, axis=2)
+
+
+def _with_clock(array: np.ndarray) -> np.ndarray:
+    """模拟状态栏时钟变化"""
+    array = array.copy()
+    array[20:50, 40:120] = 255 - array[20:50, 40:120]
+    return array
+
+
+def _with_dialog(array: np.ndarray) -> np.ndarray:
+    """模拟弹窗"""
+    array = array.copy()
+    array[800:1600, 100:980] = 240
+    return array
+
+
+class FakeScreenCapture:
+    """按顺序返回预设画面"""
+
+    region_available = False
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self.captures = 0
+
+    def capture(self) -> ScreenFrame:
+        self.captures += 1
+        height, width = self.array.shape[:2]
+        return ScreenFrame(self.array, width, height)
+
+
+class TestScreenshotDedupCache:
+    """ScreenshotDedupCache 命中规则"""
+
+    @pytest.fixture
+    def result(self, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(b'x')
+        return {'success': True, 'screenshot_path': str(path)}
+
+    def test_small_change_within_tolerance_hits(self, result):
+        cache = ScreenshotDedupCache()
+        base = _screen()
+        cache.store('k', cache.hash(base[..., 0]), result, 0)
+        assert cache.lookup('k', cache.hash(_with_clock(base)[..., 0]), 0) == result
+
+    def test_large_change_misses(self, result):
+        cache = ScreenshotDedupCache()
+        base = _screen()
+        cache.store('k', cache.hash(base[..., 0]), result, 0)
+        assert cache.lookup('k', cache.hash(_with_dialog(base)[..., 0]), 0) is None
+
+    def test_action_count_change_misses(self, result):
+        cache = ScreenshotDedupCache()
+        frame_hash = cache.hash(_screen()[..., 0])
+        cache.store('k', frame_hash, result, 0)
+        assert cache.lookup('k', frame_hash, 1) is None
+        assert cache.stats()['entries'] == 0
+
+    def test_deleted_file_misses(self, result):
+        cache = ScreenshotDedupCache()
+        frame_hash = cache.hash(_screen()[..., 0])
+        cache.store('k', frame_hash, result, 0)
+        os.remove(result['screenshot_path'])
+        assert cache.lookup('k', frame_hash, 0) is None
+
+
+class TestScreenshotManagerDedup:
+    """ScreenshotManager.take_screenshot 的去重"""
+
+    @pytest.fixture
+    def client(self):
+        client = SimpleNamespace(platform='android', single_flight=SingleFlight(), screen_stream=None,
+                                 work_pool=None, screen_capture=FakeScreenCapture(_screen()))
+        client.hierarchy_cache = HierarchyCache(client)
+        return client
+
+    @pytest.fixture
+    def manager(self, client, tmp_path):
+        manager = ScreenshotManager(client)
+        manager.screenshot_dir = tmp_path
+        manager.store = ScreenshotStore(tmp_path)
+        return manager
+
+    def test_hierarchy_dump_between_screenshots_hits(self, client, manager):
+        first = manager.take_screenshot(compress=True)
+        # 轮询 / SoM / TTL 刷新抓了一次新层级（版本号递增，但没有界面操作）
+        client.hierarchy_cache.store('<hierarchy rotation="0"></hierarchy>')
+        client.screen_capture.array = _with_clock(client.screen_capture.array)
+        second = manager.take_screenshot(compress=True)
+        assert first['cache_hit'] is False
+        assert second['cache_hit'] is True
+        assert second['screenshot_path'] == first['screenshot_path']
+
+    def test_action_between_screenshots_misses(self, client, manager):
+        manager.take_screenshot(compress=True)
+        client.hierarchy_cache.invalidate('click')
+        assert manager.take_screenshot(compress=True)['cache_hit'] is False
+
+    def test_description_is_part_of_key(self, client, manager):
+        manager.take_screenshot(description="before", compress=True)
+        result = manager.take_screenshot(description="after", compress=True)
+        assert result['cache_hit'] is False
+        assert 'after' in os.path.basename(result['screenshot_path'])
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI树 / 倒排索引测试（本地 XML，不需要真机）
+
+覆盖：
+- XMLParser 基于 UITree 的元素字典与原 ElementTree 实现一致
+- 精确 / 子串 / 归一化 / resource-id 查找（含跨包同名 ID）
+- pruned() 去掉零面积、屏幕外节点并折叠纯布局链
+- diff() 新增节点的变化比例
+- 相同 dump 的结构哈希稳定，内容变化时哈希变化
+"""
+
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mobile_mcp.utils.ui_tree import UITree
+from mobile_mcp.utils.xml_parser import XMLParser
+
+
+def _node(attrs: str = '', children: str = '', **values) -> str:
+    defaults = {'text': '', 'resource-id': '', 'class': 'android.widget.FrameLayout', 'content-desc': '',
+                'clickable': 'false', 'focusable': 'false', 'scrollable': 'false', 'enabled': 'true',
+                'bounds': '[0,0][1080,2400]'}
+    # class_ -> class，resource_id -> resource-id
+    defaults.update({key.rstrip('_').replace('_', '-'): value for key, value in values.items()})
+    rendered = ' '.join(f'{key}="{value}"' for key, value in defaults.items())
+    if children:
+        return f'<node {rendered} {attrs}>{children}</node>'
+    return f'<node {rendered} {attrs}/>'
+
+
+def _hierarchy(*nodes: str) -> str:
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes" ?><hierarchy rotation="0">'
+            + ''.join(nodes) + '</hierarchy>')
+
+
+# 设置页：含跨包同名 ID、括号 / 空格文本、禁用与不可见节点、纯布局链
+PAGE = _hierarchy(
+    _node(class_='android.widget.FrameLayout', children=''.join([
+        _node(class_='android.widget.LinearLayout', children=_node(
+            class_='android.widget.LinearLayout', children=_node(
+                text='登录', resource_id='com.a:id/login', class_='android.widget.Button',
+                clickable='true', bounds='[100,200][500,300]'))),
+        _node(text='商品 (1)', resource_id='com.a:id/title', class_='android.widget.TextView',
+              bounds='[0,400][1080,480]'),
+        _node(content_desc='返回', class_='android.widget.ImageView', clickable='true',
+              bounds='[0,0][120,120]'),
+        _node(text='已禁用', class_='android.widget.Button', enabled='false', focusable='true',
+              bounds='[0,600][300,700]'),
+        _node(text='隐藏', class_='android.widget.TextView', bounds='[0,800][0,900]'),
+        _node(text='屏幕外', class_='android.widget.TextView', bounds='[0,3000][1080,3100]'),
+        _node(text='左侧滑出', class_='android.widget.TextView', bounds='[-200,1200][100,1300]'),
+        _node(class_='android.widget.FrameLayout', bounds='[0,2200][1080,2400]', children=_node(
+            resource_id='com.b:id/login', class_='android.widget.Button', clickable='true',
+            bounds='[0,2200][540,2400]')),
+    ])),
+)
+
+
+def baseline_parse(xml_string: str):
+    """原 XMLParser（ElementTree 递归）的输出，用于对照"""
+    def parse_bounds(bounds_str):
+        match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds_str)
+        if match:
+            x1, y1, x2, y2 = map(int, match.groups())
+            return {'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1}
+        return {'x': 0, 'y': 0, 'width': 0, 'height': 0}
+
+    def parse_node(node, elements, depth):
+        element = {
+            'text': node.get('text', ''),
+            'resource_id': node.get('resource-id', ''),
+            'class': node.get('class', ''),
+            'content_desc': node.get('content-desc', ''),
+            'bounds': node.get('bounds', ''),
+            'clickable': node.get('clickable', 'false') == 'true',
+            'focusable': node.get('focusable', 'false') == 'true',
+            'scrollable': node.get('scrollable', 'false') == 'true',
+            'enabled': node.get('enabled', 'true') == 'true',
+            'depth': depth,
+        }
+        if element['bounds']:
+            bounds = parse_bounds(element['bounds'])
+            element['x'] = bounds['x']
+            element['y'] = bounds['y']
+            element['width'] = bounds['width']
+            element['height'] = bounds['height']
+        element['class_name'] = element['class'].split('.')[-1] if element['class'] else ''
+        if element['text'] or element['resource_id'] or element['clickable'] or element['focusable']:
+            elements.append(element)
+        for child in node:
+            parse_node(child, elements, depth + 1)
+
+    elements = []
+    parse_node(ET.fromstring(xml_string), elements, 0)
+    return elements
+
+
+@pytest.fixture
+def tree():
+    return UITree.from_xml(PAGE)
+
+
+def _texts(tree, indexes):
+    return [tree.node(i).text or tree.node(i).content_desc or tree.node(i).resource_id for i in indexes]
+
+
+class TestParserParity:
+    """XMLParser 元素字典与原实现一致"""
+
+    def test_page_matches_baseline(self):
+        assert XMLParser().parse(PAGE) == baseline_parse(PAGE)
+
+    def test_generated_page_matches_baseline(self):
+        nodes = ''.join(_node(text=f'Item({i})' if i % 3 else '', resource_id=f'com.x:id/v{i % 7}',
+                              clickable='true' if i % 2 else 'false', bounds=f'[0,{i * 40}][1080,{i * 40 + 36}]',
+                              children=_node(class_='android.view.View', bounds=f'[0,{i * 40}][10,{i * 40 + 10}]'))
+                        for i in range(60))
+        xml_string = _hierarchy(_node(children=nodes))
+        assert XMLParser().parse(xml_string) == baseline_parse(xml_string)
+
+    def test_empty_and_invalid(self):
+        assert XMLParser().parse('') == []
+        with pytest.raises(ValueError):
+            XMLParser().parse('<hierarchy><node></hierarchy>')
+
+
+class TestIndexLookup:
+    """UITreeIndex 查找"""
+
+    def test_exact_text_and_desc(self, tree):
+        assert _texts(tree, tree.index.find_text('登录')) == ['登录']
+        assert _texts(tree, tree.index.find_text('返回')) == ['返回']
+        assert tree.index.find_text('登') == []
+
+    def test_substring(self, tree):
+        assert _texts(tree, tree.index.find_text('商品', exact=False)) == ['商品 (1)']
+        assert _texts(tree, tree.index.find_text('禁', exact=False)) == ['已禁用']
+
+    def test_normalized_ignores_spaces_and_brackets(self, tree):
+        assert _texts(tree, tree.index.find_normalized('商品1', exact=True)) == ['商品 (1)']
+        assert _texts(tree, tree.index.find_normalized('商品（1）')) == ['商品 (1)']
+
+    def test_lower_text(self):
+        tree = UITree.from_xml(_hierarchy(_node(text='  Sign In ', clickable='true')))
+        assert len(tree.index.find_text_lower('sign in', exact=True)) == 1
+        assert len(tree.index.find_text_lower('SIGN', exact=False)) == 1
+
+    def test_full_id_is_exact(self, tree):
+        ids = [tree.node(i).resource_id for i in tree.index.find_id('com.a:id/login')]
+        assert ids == ['com.a:id/login']
+
+    def test_suffix_matches_every_package(self, tree):
+        ids = [tree.node(i).resource_id for i in tree.index.find_id('login')]
+        assert ids == ['com.a:id/login', 'com.b:id/login']
+
+    def test_suffix_disabled_does_not_cross_packages(self, tree):
+        assert tree.index.find_id('login', suffix=False) == []
+        assert len(tree.index.find_id('com.b:id/login', suffix=False)) == 1
+
+
+class TestPruned:
+    """pruned() 精简规则"""
+
+    def test_layout_chain_collapsed(self, tree):
+        pruned = tree.pruned(1080, 2400)
+        login = pruned.node(pruned.index.find_text('登录')[0])
+        # 两层只有一个子节点的 LinearLayout 被折叠，按钮直接挂在根 FrameLayout 下
+        assert login.parent.class_name == 'android.widget.FrameLayout'
+        assert login.depth == tree.node(tree.index.find_text('登录')[0]).depth - 2
+        assert 'android.widget.LinearLayout' not in [node.class_name for node in pruned.nodes()]
+
+    def test_invisible_and_offscreen_removed(self, tree):
+        pruned = tree.pruned(1080, 2400)
+        assert pruned.index.find_text('隐藏') == []
+        assert pruned.index.find_text('屏幕外') == []
+        # 不传屏幕尺寸时只做零面积过滤
+        assert tree.pruned().index.find_text('屏幕外') != []
+
+    def test_meaningful_nodes_kept(self, tree):
+        pruned = tree.pruned(1080, 2400)
+        for text in ('登录', '商品 (1)', '返回', '已禁用'):
+            assert pruned.index.find_text(text), text
+        assert len(pruned.index.find_id('com.b:id/login')) == 1
+        assert len(pruned) < len(tree)
+
+
+class TestHashAndDiff:
+    """结构哈希与 diff"""
+
+    def test_hash_stable_across_identical_dumps(self):
+        assert UITree.from_xml(PAGE).root_hash == UITree.from_xml(PAGE).root_hash
+
+    def test_hash_ignores_index_attribute(self):
+        with_index = PAGE.replace('<node ', '<node index="3" ')
+        assert UITree.from_xml(with_index).root_hash == UITree.from_xml(PAGE).root_hash
+
+    def test_hash_changes_with_content(self):
+        assert UITree.from_xml(PAGE.replace('登录', '注册')).root_hash != UITree.from_xml(PAGE).root_hash
+
+    def test_identical_diff(self, tree):
+        diff = tree.diff(UITree.from_xml(PAGE))
+        assert diff == {'changed': False, 'change_ratio': 0.0, 'changed_nodes': 0, 'changed_subtrees': []}
+
+    def test_added_node_ratio(self, tree):
+        added = _node(text='新消息', class_='android.widget.TextView', bounds='[0,1000][1080,1100]')
+        new_page = PAGE.replace('</node></hierarchy>', added + '</node></hierarchy>')
+        new_tree = UITree.from_xml(new_page)
+        diff = tree.diff(new_tree)
+        assert diff['changed'] is True
+        assert diff['changed_nodes'] == 1
+        assert diff['change_ratio'] == round(1 / len(new_tree), 4)
+        assert [subtree['text'] for subtree in diff['changed_subtrees']] == ['新消息']